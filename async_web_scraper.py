@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import logging
+import time
+
+import aiohttp
+from aiohttp import web
+
+from basic_web_scraper import parse_html
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    :param sorted_values: Values in ascending order
+    :param pct: Percentile between 0 and 100
+    :return: The percentile value, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class ScrapeStats:
+    """
+    Throughput and latency counters for a crawl.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.failures = 0
+        self.bytes = 0
+        self.latencies = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, latency, size):
+        self.pages += 1
+        self.bytes += size
+        self.latencies.append(latency)
+
+    def summary(self):
+        """
+        Summarize the crawl.
+
+        :return: Dictionary with counts, bytes, pages/second and latency percentiles
+        """
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies)
+        return {
+            'pages': self.pages,
+            'failures': self.failures,
+            'bytes': self.bytes,
+            'seconds': elapsed,
+            'pages_per_second': self.pages / elapsed if elapsed else 0.0,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+        }
+
+
+async def _iterate_urls(urls):
+    """
+    Iterate a URL list, a generator or an async iterable (a live frontier) alike.
+    """
+    if hasattr(urls, '__aiter__'):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+class AsyncScraper:
+    """
+    Concurrent asyncio fetch engine feeding pages into parse_html.
+
+    A pool of worker tasks pulls URLs from a bounded queue, so URL sources of
+    any size are consumed lazily. One aiohttp session with a pooled connector
+    reuses keep-alive connections, caps open connections globally
+    (concurrency) and per host (per_host). Parsing runs on a thread so
+    the event loop keeps fetching while a page is being parsed.
+    """
+
+    def __init__(self, concurrency=64, per_host=8, timeout=30, parse=parse_html):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.parse = parse
+        self.stats = ScrapeStats()
+
+    async def _fetch(self, session, url):
+        """
+        Fetch one page and record its latency and size.
+
+        :return: Decoded HTML content, or None on failure
+        """
+        start = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                body = await response.read()
+                encoding = response.charset or 'utf-8'
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.failures += 1
+            logging.error(f"Error fetching the webpage {url}: {e!r}")
+            return None
+        self.stats.record(time.perf_counter() - start, len(body))
+        try:
+            return body.decode(encoding, errors='replace')
+        except LookupError:
+            logging.warning(f"Unknown charset {encoding!r} for {url}, decoding as UTF-8")
+            return body.decode('utf-8', errors='replace')
+
+    async def _worker(self, session, queue, results):
+        loop = asyncio.get_running_loop()
+        while True:
+            url = await queue.get()
+            if url is None:
+                return
+            html_content = await self._fetch(session, url)
+            data = None
+            if html_content is not None:
+                data = await loop.run_in_executor(None, self.parse, html_content)
+            await results.put((url, data))
+
+    async def scrape(self, urls):
+        """
+        Fetch and parse pages, yielding results as they arrive.
+
+        :param urls: List, iterable or async iterable of URLs
+        :return: Async generator of (url, parsed data or None on failure),
+                 in completion order
+        """
+        self.stats = ScrapeStats()
+        queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        # Bounded too: a slow consumer pauses the workers instead of piling up parsed pages
+        results = asyncio.Queue(maxsize=2 * self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(self._worker(session, queue, results))
+                       for _ in range(self.concurrency)]
+
+            async def feed():
+                async for url in _iterate_urls(urls):
+                    await queue.put(url)
+                for _ in workers:
+                    await queue.put(None)
+
+            feeder = asyncio.create_task(feed())
+            done = asyncio.gather(feeder, *workers)
+            # Mark the outcome as retrieved, so a consumer that stops early
+            # (and cancels the tasks below) leaves no unhandled error behind
+            done.add_done_callback(lambda future: future.cancelled() or future.exception())
+            try:
+                while not (done.done() and results.empty()):
+                    getter = asyncio.ensure_future(results.get())
+                    await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        yield getter.result()
+                    else:
+                        getter.cancel()
+                await done  # Surface any exception from the feeder or workers
+            finally:
+                for task in [feeder, *workers]:
+                    task.cancel()
+                self.stats.finished = time.perf_counter()
+
+
+def make_test_app(paragraphs=20, delay=0.0):
+    """
+    Build a local stand-in site: /page/<n> returns an HTML page with
+    `paragraphs` <p> elements after an optional delay in seconds.
+    """
+    async def page(request):
+        if delay:
+            await asyncio.sleep(delay)
+        number = request.match_info['number']
+        body = ''.join(f"<p>Page {number}, paragraph {i}.</p>" for i in range(paragraphs))
+        return web.Response(text=f"<html><body><h1>Page {number}</h1>{body}</body></html>",
+                            content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/page/{number}', page)
+    return app
+
+
+async def start_local_server(app, host='127.0.0.1', port=0):
+    """
+    Serve an aiohttp application on a local port (0 picks a free one).
+
+    :return: (runner, base URL); call `await runner.cleanup()` to stop it
+    """
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, f"http://{bound_host}:{bound_port}"
+
+
+def log_summary(stats):
+    logging.info(f"Fetched {stats['pages']} pages ({stats['failures']} failed), "
+                 f"{stats['bytes'] / 1e6:.2f} MB in {stats['seconds']:.2f} s "
+                 f"({stats['pages_per_second']:.1f} pages/second)")
+    logging.info("Latency: " + ", ".join(
+        f"{name} {stats[name] * 1000:.1f} ms" for name in ('p50', 'p90', 'p99')))
+
+
+async def run(urls, args):
+    scraper = AsyncScraper(args.concurrency, args.per_host, args.timeout)
+    async for url, data in scraper.scrape(urls):
+        if data is not None:
+            logging.debug(f"{url}: {len(data)} paragraphs")
+    log_summary(scraper.stats.summary())
+
+
+async def run_demo(args):
+    runner, base_url = await start_local_server(make_test_app(delay=args.delay))
+    try:
+        urls = (f"{base_url}/page/{n}" for n in range(args.demo))
+        await run(urls, args)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    """
+    Main function to scrape many pages concurrently.
+    """
+    parser = argparse.ArgumentParser(description="Concurrent asyncio web scraper.")
+    parser.add_argument('urls', nargs='*', help="URLs to scrape")
+    parser.add_argument('--url-file', help="File with one URL per line")
+    parser.add_argument('--concurrency', type=int, default=64, help="Maximum open connections (default: 64)")
+    parser.add_argument('--per-host', type=int, default=8, help="Maximum connections per host (default: 8)")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument('--demo', type=int, metavar='PAGES',
+                        help="Scrape PAGES pages from a local stand-in server instead")
+    parser.add_argument('--delay', type=float, default=0.01, help="Stand-in server response delay (default: 0.01)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.demo:
+        asyncio.run(run_demo(args))
+        return
+
+    urls = list(args.urls)
+    if args.url_file:
+        with open(args.url_file) as url_file:
+            urls.extend(line.strip() for line in url_file if line.strip())
+    if not urls:
+        parser.error("no URLs given")
+    asyncio.run(run(urls, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,509 @@
+import argparse
+import codecs
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from html.parser import HTMLParser
+
 import requests
 from bs4 import BeautifulSoup
-import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scrape_metrics import NULL_METRICS, ScrapeMetrics, make_sink
+from selector_rules import NON_TEXT_ELEMENTS, VOID_ELEMENTS, compile_rules
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+RETRY_STATUSES = (500, 502, 503, 504)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# parse_html's extraction expressed as selector rules, for backend='rules'
+PARAGRAPH_RULES = compile_rules({'fields': {'paragraphs': {'css': 'p', 'many': True}}})
+
+
+def create_session(retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Create a session with pooled keep-alive connections and retries.
+
+    Connection errors, timeouts and 5xx responses are retried up to `retries`
+    times with exponential backoff (backoff, 2 * backoff, 4 * backoff, ...
+    seconds), honoring any Retry-After header.
+
+    :param retries: Maximum number of retries per request
+    :param backoff: Backoff factor in seconds
+    :param pool_size: Keep-alive connections kept per host
+    :return: A configured requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
 
 
-def fetch_webpage(url):
+def get_session():
+    """
+    Return the shared session used by fetch_webpage, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+class HTTPCache:
+    """
+    On-disk cache of fetched pages, revalidated with conditional requests.
+
+    Each page is stored as <key>.body plus a <key>.json metadata file holding
+    its URL, encoding and ETag/Last-Modified validators. Only responses with
+    a validator are cached. The least recently used pages are evicted once
+    the cached bodies exceed max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> body size, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_index(self):
+        entries = []
+        for file_name in os.listdir(self.directory):
+            key, extension = os.path.splitext(file_name)
+            if extension != '.json':
+                continue
+            try:
+                size = os.path.getsize(self._path(key, '.body'))
+                entries.append((os.path.getmtime(self._path(key, '.json')), key, size))
+            except OSError:
+                self._remove_files(key)
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def lookup(self, url):
+        """
+        Find the cached copy of a page.
+
+        :param url: URL of the page
+        :return: Metadata dictionary, or None if the page is not cached
+        """
+        key = self.key(url)
+        with self._lock:
+            if key not in self._entries:
+                return None
+        try:
+            with open(self._path(key, '.json')) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('url') == url else None
+
+    def conditional_headers(self, meta):
+        """
+        Build If-None-Match / If-Modified-Since headers for a cached page.
+        """
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def read(self, url, meta):
+        """
+        Return the cached body of a page after a 304 Not Modified and mark it
+        as recently used.
+
+        :return: Decoded HTML content, or None if the body has gone missing
+        """
+        key = self.key(url)
+        try:
+            with open(self._path(key, '.body'), 'rb') as body_file:
+                body = body_file.read()
+            os.utime(self._path(key, '.json'))
+        except OSError:
+            with self._lock:
+                self._forget(key)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return body.decode(meta.get('encoding') or 'utf-8', errors='replace')
+
+    def store(self, url, response):
+        """
+        Cache a 200 response if it carries an ETag or Last-Modified validator.
+        """
+        with self._lock:
+            self.misses += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        body = response.content
+        if not (etag or last_modified) or len(body) > self.max_bytes:
+            return
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding or response.apparent_encoding,
+            'size': len(body),
+        }
+        key = self.key(url)
+        # Write to temporary files and rename, so readers never see partial pages
+        for suffix, data in (('.body', body), ('.json', json.dumps(meta).encode('utf-8'))):
+            temporary_path = self._path(key, suffix + '.tmp')
+            with open(temporary_path, 'wb') as cache_file:
+                cache_file.write(data)
+            os.replace(temporary_path, self._path(key, suffix))
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(body)
+            self._bytes += len(body)
+            self._evict()
+
+    def clear(self):
+        """
+        Delete every cached page and reset the counters.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                self._forget(key)
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        """
+        Report cache statistics.
+
+        :return: Dictionary with hits, misses, evictions, entries, bytes and max_bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _remove_files(self, key):
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key):
+        self._bytes -= self._entries.pop(key, 0)
+        self._remove_files(key)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            self._forget(key)
+            self.evictions += 1
+
+
+def fetch_webpage(url, cache=None, session=None, timeout=DEFAULT_TIMEOUT, metrics=NULL_METRICS):
     """
     Fetches the content of a webpage.
-    
+
+    Requests go through a shared session with pooled connections and retries.
+    With a cache, pages already on disk are revalidated with a conditional
+    request and only downloaded again if they changed.
+
     :param url: URL of the webpage to scrape
+    :param cache: Optional HTTPCache
+    :param session: Session to use (default: the shared session)
+    :param timeout: Request timeout in seconds
+    :param metrics: ScrapeMetrics recording the 'fetch' (request and
+                    download), 'ttfb' (DNS, connect and server time up to
+                    the response headers) and 'decode' stages
     :return: HTML content of the webpage if successful, None otherwise
     """
+    session = session or get_session()
+    meta = cache.lookup(url) if cache else None
+    headers = cache.conditional_headers(meta) if meta else {}
     try:
-        response = requests.get(url)
+        with metrics.stage('fetch'):
+            response = session.get(url, headers=headers, timeout=timeout)
+        metrics.observe('ttfb', response.elapsed.total_seconds())
+        if meta and response.status_code == 304:
+            with metrics.stage('cache_read'):
+                html_content = cache.read(url, meta)
+            if html_content is not None:
+                metrics.count('cache_hits')
+                return html_content
+            # The cached body vanished, so fetch the page unconditionally
+            with metrics.stage('fetch'):
+                response = session.get(url, timeout=timeout)
         response.raise_for_status()
-        return response.text
+        metrics.count('bytes_downloaded', len(response.content))
+        if cache:
+            try:
+                cache.store(url, response)
+            except OSError as e:
+                # Caching is best-effort; the page itself was fetched fine
+                logging.warning(f"Could not cache {url}: {e}")
+        with metrics.stage('decode'):
+            return response.text
     except requests.RequestException as e:
+        metrics.count('fetch_failures')
         logging.error(f"Error fetching the webpage: {e}")
         return None
 
 
-def parse_html(html_content):
+class ParagraphParser(HTMLParser):
+    """
+    Incremental parser that collects the text of <p> elements.
+
+    Feed it HTML in chunks of any size; finished paragraphs pile up in
+    `paragraphs` as soon as they can be emitted, and no document tree is
+    ever built. It follows BeautifulSoup's html.parser tree building: an end
+    tag closes every element opened inside its element (so a <p> left open
+    ends with its enclosing <div>), stray end tags are ignored, and text in
+    NON_TEXT_ELEMENTS is skipped. Text inside nested paragraphs counts
+    towards every enclosing paragraph, and paragraphs are emitted in
+    document order, so an inner paragraph waits for the outer one to close.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._stack = []  # Tags of the open elements, outermost first
+        self._open = []  # (stack depth, text fragments, slot) of each open <p>, outermost first
+        self._pending = deque()  # One-item slots of started paragraphs, in document order
+
+    def handle_starttag(self, tag, attrs):
+        self._stack.append(tag)
+        if tag == 'p':
+            slot = [None]
+            self._pending.append(slot)
+            self._open.append((len(self._stack), [], slot))
+        if tag in VOID_ELEMENTS:
+            self._close_to(len(self._stack) - 1)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._close_to(len(self._stack) - 1)
+
+    def handle_endtag(self, tag):
+        # Close the innermost open element with this tag, along with any
+        # unclosed elements inside it; stray end tags are ignored
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index] == tag:
+                self._close_to(index)
+                return
+
+    def handle_data(self, data):
+        if self._stack and self._stack[-1] in NON_TEXT_ELEMENTS:
+            return
+        for _, fragments, _ in self._open:
+            fragments.append(data)
+
+    def _close_to(self, depth):
+        """
+        Pop open elements until `depth` remain, then emit finished paragraphs.
+        """
+        while self._open and self._open[-1][0] > depth:
+            _, fragments, slot = self._open.pop()
+            slot[0] = ''.join(fragments)
+        del self._stack[depth:]
+        while self._pending and self._pending[0][0] is not None:
+            self.paragraphs.append(self._pending.popleft()[0])
+
+    def close(self):
+        super().close()
+        self._close_to(0)
+
+
+def iter_paragraphs(chunks):
+    """
+    Stream paragraph text out of HTML without materializing a tree.
+
+    :param chunks: HTML content as a string, or an iterable of string chunks
+    :return: Generator of paragraph texts, yielded as each paragraph closes
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    parser = ParagraphParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.paragraphs:
+            yield from parser.paragraphs
+            parser.paragraphs.clear()
+    parser.close()
+    yield from parser.paragraphs
+
+
+def parse_html(html_content, backend='soup'):
     """
     Parses HTML content and extracts data.
     
     :param html_content: HTML content of a webpage
+    :param backend: 'soup' builds a BeautifulSoup tree; 'stream' uses the
+                    incremental ParagraphParser, which is faster and needs
+                    far less memory on large pages; 'rules' applies
+                    PARAGRAPH_RULES with the selector_rules engine
     :return: Extracted data (for example, all text from <p> tags)
     """
+    if backend == 'stream':
+        return list(iter_paragraphs(html_content))
+    if backend == 'rules':
+        return PARAGRAPH_RULES.extract(html_content)[0]['paragraphs']
+    if backend != 'soup':
+        raise ValueError(f"Unknown parser backend: {backend}")
     soup = BeautifulSoup(html_content, 'html.parser')
     paragraphs = soup.find_all('p')
     return [p.get_text() for p in paragraphs]
 
 
-def main():
+def iter_webpage_paragraphs(url, session=None, timeout=DEFAULT_TIMEOUT, chunk_size=STREAM_CHUNK_SIZE):
     """
-    Main function to execute the web scraping.
+    Download a webpage and yield its paragraphs while the body is still arriving.
+
+    The response is never held whole in memory. Pages streamed this way
+    bypass the HTTP cache.
+
+    :param url: URL of the webpage to scrape
+    :param session: Session to use (default: the shared session)
+    :param timeout: Request timeout in seconds
+    :param chunk_size: Bytes read from the socket at a time
+    :return: Generator of paragraph texts
+    :raises requests.RequestException: If the request fails
+    """
+    session = session or get_session()
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size))
+        yield from iter_paragraphs(itertools.chain(chunks, (decoder.decode(b'', final=True),)))
+
+
+def scrape_url(url, args, cache, metrics):
+    """
+    Fetch, parse and log one webpage, timing each stage.
     """
-    logging.basicConfig(level=logging.INFO)
-    url = 'https://www.example.com'  # Replace with the target website
     logging.info(f"Fetching webpage: {url}")
+    html_content = fetch_webpage(url, cache, metrics=metrics)
+    if not html_content:
+        logging.error("Failed to retrieve the webpage content.")
+        return
+    metrics.count('pages')
+
+    if args.rules:
+        with metrics.stage('parse'):
+            records = args.rules.extract(html_content)
+        metrics.count('records', len(records))
+        with metrics.stage('output'):
+            for record in records:
+                logging.info(json.dumps(record, ensure_ascii=False))
+        return
+
+    logging.info("Parsing HTML content")
+    with metrics.stage('parse'):
+        data = parse_html(html_content, args.parser)
+    metrics.count('paragraphs', len(data))
     
-    html_content = fetch_webpage(url)
-    if html_content:
-        logging.info("Parsing HTML content")
-        data = parse_html(html_content)
-        
-        if data:
-            logging.info("Extracted data:")
-            for paragraph in data:
-                logging.info(paragraph)
-        else:
-            logging.warning("No data extracted from the HTML content.")
+    if data:
+        logging.info(f"Extracted {len(data)} paragraphs")
+        if args.paragraphs:
+            with metrics.stage('output'):
+                logging.info("Extracted data:")
+                for paragraph in data:
+                    logging.info(paragraph)
     else:
-        logging.error("Failed to retrieve the webpage content.")
+        logging.warning("No data extracted from the HTML content.")
+
+
+def main():
+    """
+    Main function to execute the web scraping.
+    """
+    parser = argparse.ArgumentParser(description="Fetch webpages and extract their paragraphs.")
+    parser.add_argument('urls', nargs='*', default=['https://www.example.com'], help="URLs of the target websites")
+    parser.add_argument('--cache-dir', help="Directory for the on-disk HTTP cache (default: no cache)")
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_CACHE_BYTES / 2 ** 20,
+                        help="Maximum cache size in MiB (default: 256)")
+    parser.add_argument('--parser', choices=('soup', 'stream', 'rules'), default='soup',
+                        help="HTML extraction backend (default: soup)")
+    parser.add_argument('--rules', help="JSON file of selector rules; extracts records instead of paragraphs")
+    parser.add_argument('--no-paragraphs', dest='paragraphs', action='store_false',
+                        help="Log only the paragraph count, not every paragraph")
+    parser.add_argument('--metrics', action='append', choices=('log', 'json', 'prometheus'),
+                        help="Time each stage and report through this sink (repeatable)")
+    parser.add_argument('--metrics-file', action='append', default=[],
+                        help="Output file of each json/prometheus sink, in order")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cache = HTTPCache(args.cache_dir, int(args.cache_mb * 2 ** 20)) if args.cache_dir else None
+    if args.rules:
+        with open(args.rules) as rules_file:
+            args.rules = compile_rules(json.load(rules_file))
+
+    sinks = []
+    metrics = NULL_METRICS
+    if args.metrics:
+        metrics = ScrapeMetrics()
+        paths = iter(args.metrics_file)
+        try:
+            sinks = [make_sink(kind, None if kind == 'log' else next(paths, None)) for kind in args.metrics]
+        except ValueError as e:
+            parser.error(str(e))
+
+    for url in args.urls:
+        with metrics.track(url):
+            scrape_url(url, args, cache, metrics)
+
+    if cache:
+        logging.info(f"Cache: {cache.info()}")
+    for sink in sinks:
+        sink.emit(metrics)
 
 
 if __name__ == "__main__":
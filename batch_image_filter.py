@@ -0,0 +1,229 @@
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+
+import instagram_style_image_filter as filters
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+
+# Each output image gets a sidecar file recording the filter chain that made it
+FILTER_SIDECAR_SUFFIX = '.filters'
+
+
+def parse_filter_spec(spec):
+    """
+    Parse a command-line filter such as 'sepia' or 'vignette:0.3'.
+
+    :param spec: Filter name, optionally followed by ':strength' for vignette.
+    :return: A filter spec accepted by FilterPipeline.
+    :raises ValueError: If the filter or its argument is invalid.
+    """
+    name, _, argument = spec.partition(':')
+    if name not in filters.PIPELINE_FILTERS:
+        raise ValueError(f"Unknown filter: {name}")
+    if not argument:
+        return name
+    if name != 'vignette':
+        raise ValueError(f"Filter '{name}' takes no argument")
+    return name, {'strength': float(argument)}
+
+
+def find_images(input_dir):
+    """
+    Recursively yield the paths of image files under a directory, relative to it.
+    """
+    for root, _, files in os.walk(input_dir):
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.relpath(os.path.join(root, file_name), input_dir)
+
+
+def read_file_list(list_path):
+    """
+    Yield image paths from a text file, one path per line.
+    """
+    with open(list_path) as list_file:
+        for line in list_file:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def list_output_jobs(paths, output_dir):
+    """
+    Pair listed image paths with output paths under output_dir.
+
+    Each output keeps the input's directory relative to the deepest directory
+    shared by all inputs, so files that share a name do not overwrite each other.
+
+    :param paths: Input image paths.
+    :param output_dir: Directory for the filtered images.
+    :return: List of (input path, output path) pairs.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    parents = [os.path.dirname(os.path.abspath(path)) for path in paths]
+    root = os.path.commonpath(parents)
+    return [(path, os.path.join(output_dir, os.path.relpath(os.path.abspath(path), root)))
+            for path in paths]
+
+
+def pipeline_signature(pipeline):
+    """
+    Describe a pipeline's filters and their settings as a string.
+    """
+    names = {stage_class: name for name, stage_class in filters.PIPELINE_FILTERS.items()}
+    return json.dumps([[names[type(stage)], vars(stage)] for stage in pipeline.stages], sort_keys=True)
+
+
+def is_up_to_date(input_path, output_path, signature=None):
+    """
+    Check whether output_path exists, is at least as new as input_path and,
+    if a pipeline signature is given, was made by that filter chain.
+    """
+    try:
+        if os.path.getmtime(output_path) < os.path.getmtime(input_path):
+            return False
+        if signature is None:
+            return True
+        with open(output_path + FILTER_SIDECAR_SUFFIX) as sidecar:
+            return sidecar.read() == signature
+    except OSError:
+        return False
+
+
+def process_image(input_path, output_path, pipeline, force=False):
+    """
+    Decode, filter and encode a single image. Runs inside the worker pool.
+
+    :return: (status, bytes read, bytes written, error message)
+    """
+    signature = pipeline_signature(pipeline)
+    if not force and is_up_to_date(input_path, output_path, signature):
+        return 'skipped', 0, 0, None
+
+    image = filters.load_image(input_path)
+    if image is None:
+        return 'failed', 0, 0, f"could not decode {input_path}"
+
+    try:
+        filtered = pipeline.apply(image)
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # Drop the old sidecar first, so an interrupted write is never taken as up to date
+        sidecar_path = output_path + FILTER_SIDECAR_SUFFIX
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+        if not cv2.imwrite(output_path, filtered):
+            return 'failed', 0, 0, f"could not encode {output_path}"
+        with open(sidecar_path, 'w') as sidecar:
+            sidecar.write(signature)
+        return 'processed', os.path.getsize(input_path), os.path.getsize(output_path), None
+    except (ValueError, OSError, cv2.error) as e:
+        return 'failed', 0, 0, f"{input_path}: {e}"
+
+
+def process_batch(jobs, pipeline, workers=None, use_processes=False, force=False, max_pending=None):
+    """
+    Filter every (input path, output path) job on a worker pool.
+
+    Each worker decodes, filters and encodes its own image, so with several
+    workers the I/O of some images overlaps with the compute of others
+    (OpenCV and NumPy release the GIL, so threads run in parallel). At most
+    max_pending jobs are queued at once, so huge backlogs are streamed.
+
+    :param jobs: Iterable of (input path, output path) pairs.
+    :param pipeline: FilterPipeline to apply.
+    :param workers: Pool size (default: CPU count).
+    :param use_processes: Use a process pool instead of threads.
+    :param force: Re-process images whose output is already up to date
+                  (newer than the input and made by the same filter chain).
+    :param max_pending: Maximum queued jobs (default: 4 per worker).
+    :return: Dictionary of run statistics.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    counts = collections.Counter()
+
+    def collect(future):
+        status, read_bytes, written_bytes, error = future.result()
+        counts[status] += 1
+        counts['bytes_read'] += read_bytes
+        counts['bytes_written'] += written_bytes
+        if error:
+            print(f"Error processing image: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    with executor_class(max_workers=workers) as executor:
+        pending = collections.deque()
+        for input_path, output_path in jobs:
+            if len(pending) >= max_pending:
+                collect(pending.popleft())
+            pending.append(executor.submit(process_image, input_path, output_path, pipeline, force))
+        while pending:
+            collect(pending.popleft())
+    elapsed = time.perf_counter() - start
+
+    return {
+        'processed': counts['processed'],
+        'skipped': counts['skipped'],
+        'failed': counts['failed'],
+        'bytes_read': counts['bytes_read'],
+        'bytes_written': counts['bytes_written'],
+        'seconds': elapsed,
+        'images_per_second': counts['processed'] / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    """
+    Main function to filter a directory (or list) of images in parallel.
+    """
+    parser = argparse.ArgumentParser(description="Apply a filter chain to many images in parallel.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input-dir', help="Directory to walk for images")
+    source.add_argument('--file-list', help="Text file with one image path per line")
+    parser.add_argument('--output-dir', required=True, help="Directory for the filtered images")
+    parser.add_argument('--filters', nargs='+', default=['sepia'],
+                        help="Filter chain, e.g. 'sepia vignette:0.3' (default: sepia)")
+    parser.add_argument('--workers', type=int, default=None, help="Pool size (default: CPU count)")
+    parser.add_argument('--processes', action='store_true', help="Use a process pool instead of threads")
+    parser.add_argument('--force', action='store_true', help="Re-process images that are already up to date")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        pipeline = filters.FilterPipeline([parse_filter_spec(spec) for spec in args.filters])
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.input_dir:
+        jobs = ((os.path.join(args.input_dir, path), os.path.join(args.output_dir, path))
+                for path in find_images(args.input_dir))
+    else:
+        jobs = list_output_jobs(read_file_list(args.file_list), args.output_dir)
+        seen = set()
+        for input_path, output_path in jobs:
+            if output_path in seen:
+                parser.error(f"More than one listed image would be written to {output_path}")
+            seen.add(output_path)
+
+    stats = process_batch(jobs, pipeline, args.workers, args.processes, args.force)
+    print(f"Processed {stats['processed']} images "
+          f"(skipped {stats['skipped']} up to date with these filters, {stats['failed']} failed) in {stats['seconds']:.2f} s")
+    print(f"{stats['images_per_second']:.1f} images/second, "
+          f"{stats['bytes_read'] / 1e6:.1f} MB read, {stats['bytes_written'] / 1e6:.1f} MB written")
+
+
+if __name__ == "__main__":
+    main()
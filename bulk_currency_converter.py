@@ -0,0 +1,281 @@
+import argparse
+import csv
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import currency_converter
+
+# converted: float64 amounts, NaN where a code is unknown; valid: bool mask
+BulkConversion = namedtuple('BulkConversion', ['converted', 'valid'])
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def build_rate_table(rates: dict) -> tuple:
+    """
+    Turn a rate dictionary into an index and a rate vector, once per rate set.
+
+    :param rates: Currency code -> units per base currency, as returned by
+                  currency_converter.fetch_exchange_rates.
+    :return: (code -> index dictionary, float64 rate vector). The vector has
+             one extra trailing NaN, so index -1 (an unknown code) reads NaN.
+    """
+    index = {code: position for position, code in enumerate(rates)}
+    values = np.empty(len(rates) + 1, dtype=np.float64)
+    values[:-1] = list(rates.values())
+    values[-1] = np.nan
+    return index, values
+
+
+def _pack_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Pack fixed-width strings of up to three characters into uint64 keys,
+    21 bits (one Unicode code point) per character.
+    """
+    chars = codes.reshape(-1).view(np.uint32).reshape(-1, codes.dtype.itemsize // 4).astype(np.uint64)
+    keys = np.zeros(len(chars), dtype=np.uint64)
+    for column in range(chars.shape[1]):
+        keys = (keys << np.uint64(21)) | chars[:, column]
+    return keys.reshape(codes.shape)
+
+
+def encode_currencies(codes, index: dict) -> np.ndarray:
+    """
+    Map currency codes to rate indices without a per-line dictionary lookup.
+
+    Codes of up to three characters (ISO 4217) are packed into integers and
+    matched with a binary search over the known codes; longer codes fall
+    back to np.unique, so each distinct code is still looked up only once.
+
+    :param codes: Sequence or array of currency codes.
+    :param index: Code -> index dictionary from build_rate_table.
+    :return: int32 array of indices, -1 for unknown codes.
+    """
+    codes = np.asarray(codes)
+    if codes.dtype.kind != 'U':
+        codes = codes.astype(str)
+    width = codes.dtype.itemsize // 4
+    if not 0 < width <= 3:
+        unique, inverse = np.unique(codes, return_inverse=True)
+        lookup = np.array([index.get(code, -1) for code in unique.tolist()], dtype=np.int32)
+        return lookup[inverse.reshape(codes.shape)]
+
+    known = [code for code in index if len(code) <= width]
+    if not known:
+        return np.full(codes.shape, -1, dtype=np.int32)
+    known_keys = _pack_codes(np.array(known, dtype=codes.dtype))
+    order = np.argsort(known_keys)
+    known_keys = known_keys[order]
+    known_indices = np.array([index[known[i]] for i in order], dtype=np.int32)
+
+    keys = _pack_codes(codes)
+    positions = np.searchsorted(known_keys, keys)
+    np.minimum(positions, len(known_keys) - 1, out=positions)
+    return np.where(known_keys[positions] == keys, known_indices[positions], np.int32(-1))
+
+
+def convert_encoded(amounts: np.ndarray, from_indices: np.ndarray, to_indices: np.ndarray,
+                    rate_values: np.ndarray) -> BulkConversion:
+    """
+    Convert amounts whose currencies are already encoded as rate indices.
+
+    Computes (amount / from_rate) * to_rate in the same order as
+    currency_converter.convert_currency, so results are bit-identical.
+    """
+    converted = np.divide(amounts, rate_values[from_indices], dtype=np.float64)
+    converted *= rate_values[to_indices]
+    valid = (from_indices >= 0) & (to_indices >= 0)
+    return BulkConversion(converted, valid)
+
+
+def convert_bulk(amounts, from_currencies, to_currencies, rates: dict) -> BulkConversion:
+    """
+    Convert many amounts at once.
+
+    Invalid currency codes do not raise: their rows are NaN in `converted`
+    and False in `valid`.
+
+    :param amounts: Array-like of amounts.
+    :param from_currencies: Array-like of source currency codes.
+    :param to_currencies: Array-like of target currency codes.
+    :param rates: Currency code -> units per base currency.
+    :return: BulkConversion(converted, valid).
+    :raises ValueError: If the three inputs differ in length.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if not (len(amounts) == len(from_currencies) == len(to_currencies)):
+        raise ValueError("amounts, from_currencies and to_currencies must have the same length")
+    index, rate_values = build_rate_table(rates)
+    return convert_encoded(amounts, encode_currencies(from_currencies, index),
+                           encode_currencies(to_currencies, index), rate_values)
+
+
+def _float_or_nan(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def parse_amounts(values: list) -> np.ndarray:
+    """
+    Parse amount strings as float64, with NaN for empty or non-numeric ones.
+    """
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return np.array([_float_or_nan(value) for value in values], dtype=np.float64)
+
+
+def iter_csv_columns(csv_file, chunk_rows: int = DEFAULT_CHUNK_ROWS, amount_column: str = 'amount',
+                     from_column: str = 'from', to_column: str = 'to'):
+    """
+    Read a ledger CSV as columns, chunk_rows rows at a time.
+
+    :return: Generator of (rows, amounts, from codes, to codes); rows is the
+             list of original row dictionaries, and amounts that do not
+             parse as numbers are NaN.
+    :raises ValueError: If a column is missing.
+    """
+    reader = csv.DictReader(csv_file)
+    missing = {amount_column, from_column, to_column} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    while True:
+        rows = [row for _, row in zip(range(chunk_rows), reader)]
+        if not rows:
+            return
+        amounts = parse_amounts([row[amount_column] or '' for row in rows])
+        yield (rows, amounts, np.array([row[from_column] or '' for row in rows]),
+               np.array([row[to_column] or '' for row in rows]))
+
+
+def convert_csv(input_file, output_file, rates: dict, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Convert a ledger CSV chunk by chunk, adding 'converted' and 'valid' columns.
+
+    Rows with an unknown currency code, an amount that is not a finite
+    number, or more or fewer fields than the header are written with an
+    empty 'converted' and valid=0; extra fields are dropped.
+
+    :return: Dictionary with the numbers of rows and invalid rows.
+    """
+    index, rate_values = build_rate_table(rates)
+    writer = None
+    counts = {'rows': 0, 'invalid': 0}
+    for rows, amounts, from_codes, to_codes in iter_csv_columns(input_file, chunk_rows):
+        result = convert_encoded(amounts, encode_currencies(from_codes, index),
+                                 encode_currencies(to_codes, index), rate_values)
+        # DictReader puts extra fields under None and fills missing ones with None
+        ragged = np.array([None in row or None in row.values() for row in rows])
+        result = BulkConversion(result.converted, result.valid & np.isfinite(amounts) & ~ragged)
+        if writer is None:
+            fieldnames = [name for name in rows[0] if name is not None]
+            writer = csv.DictWriter(output_file, fieldnames=fieldnames + ['converted', 'valid'],
+                                    extrasaction='ignore')
+            writer.writeheader()
+        for row, converted, valid in zip(rows, result.converted.tolist(), result.valid.tolist()):
+            row['converted'] = f"{converted:.2f}" if valid else ''
+            row['valid'] = int(valid)
+            writer.writerow(row)
+        counts['rows'] += len(rows)
+        counts['invalid'] += int((~result.valid).sum())
+    return counts
+
+
+def convert_per_call(amounts, from_currencies, to_currencies, rates: dict) -> BulkConversion:
+    """
+    Reference: convert_currency once per line, catching each invalid code.
+    """
+    converted = np.empty(len(amounts), dtype=np.float64)
+    valid = np.ones(len(amounts), dtype=bool)
+    for i, (amount, from_currency, to_currency) in enumerate(zip(amounts, from_currencies, to_currencies)):
+        try:
+            converted[i] = currency_converter.convert_currency(amount, from_currency, to_currency, rates)
+        except ValueError:
+            converted[i] = np.nan
+            valid[i] = False
+    return BulkConversion(converted, valid)
+
+
+def benchmark(count: int, seed: int = 0) -> None:
+    """
+    Time convert_bulk against per-call convert_currency on a synthetic ledger.
+    """
+    rates = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 149.5, "AUD": 1.52,
+             "CAD": 1.36, "CHF": 0.88, "CNY": 7.24, "INR": 83.2, "BRL": 4.97}
+    rng = np.random.default_rng(seed)
+    codes = np.array(list(rates) + ["XXX"])
+    # About 1% of the codes are unknown
+    weights = np.full(len(codes), 0.99 / len(rates))
+    weights[-1] = 0.01
+    amounts = rng.uniform(0.01, 10_000, size=count).round(2)
+    from_codes = rng.choice(codes, size=count, p=weights)
+    to_codes = rng.choice(codes, size=count, p=weights)
+    amount_list, from_list, to_list = amounts.tolist(), from_codes.tolist(), to_codes.tolist()
+
+    start = time.perf_counter()
+    expected = convert_per_call(amount_list, from_list, to_list, rates)
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = convert_bulk(amounts, from_codes, to_codes, rates)
+    bulk = time.perf_counter() - start
+
+    identical = (np.array_equal(result.valid, expected.valid)
+                 and np.array_equal(result.converted, expected.converted, equal_nan=True))
+    print(f"Converted {count:,} lines ({(~result.valid).sum():,} with invalid codes)")
+    print(f"  per-call convert_currency: {per_call:.3f} s ({count / per_call:,.0f} lines/second)")
+    print(f"  convert_bulk:              {bulk:.3f} s ({count / bulk:,.0f} lines/second)")
+    print(f"  speedup {per_call / bulk:.1f}x, identical results: {identical}")
+
+
+def main():
+    """
+    Main function to convert a ledger CSV, or benchmark the bulk API.
+    """
+    parser = argparse.ArgumentParser(description="Convert a ledger CSV (amount,from,to columns) in bulk.")
+    parser.add_argument("input", nargs="?", help="Input CSV file")
+    parser.add_argument("output", nargs="?", help="Output CSV file (default: stdout)")
+    parser.add_argument("--api-url", default=currency_converter.DEFAULT_API_URL, help="Exchange rate API URL")
+    parser.add_argument("--api-key", default="your_api_key_here", help="API key")
+    parser.add_argument("--cache-file", default=currency_converter.DEFAULT_CACHE_PATH, help="Rate cache file")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows converted per chunk")
+    parser.add_argument("--benchmark", type=int, metavar="LINES",
+                        help="Benchmark convert_bulk against convert_currency on LINES lines and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if not args.input:
+        parser.error("an input CSV is required unless --benchmark is given")
+
+    provider = currency_converter.RateProvider(args.api_url, args.api_key,
+                                               currency_converter.RateCache(args.cache_file))
+    try:
+        result = provider.get_rates()
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    output_file = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        with open(args.input, newline="") as input_file:
+            counts = convert_csv(input_file, output_file, result.rates, args.chunk_rows)
+    except (OSError, ValueError) as e:
+        print(f"Error converting {args.input}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+        provider.wait_for_refresh()
+    print(f"Converted {counts['rows']} rows ({counts['invalid']} with invalid amounts or currency codes), "
+          f"rates {currency_converter.describe_age(result.age)} old ({result.status})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
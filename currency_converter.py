@@ -1,22 +1,187 @@
-import requests
+import argparse
+import json
+import os
+import random
 import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+DEFAULT_API_URL = "https://api.exchangerate-api.com/v4/latest/USD"
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "currency_converter", "rates.json")
+DEFAULT_TTL = 60 * 60  # Rates younger than this are used without any request
+DEFAULT_STALE_TTL = 24 * 60 * 60  # Older rates up to ttl + this are served while refreshing
+DEFAULT_TIMEOUT = 10
+
+# rates: currency -> units per base currency; age: seconds since the rates
+# were fetched; status: 'fresh', 'fetched', 'stale' (served while a refresh
+# runs in the background) or 'offline' (the API failed, last good snapshot);
+# base: the base currency named by the API, or None if it named none
+RateResult = namedtuple('RateResult', ['rates', 'age', 'status', 'base'], defaults=(None,))
+
+# Rate conventions understood by RateTable
+UNITS_PER_BASE = "units_per_base"  # 1 base = rate units (exchange rate APIs, this script)
+BASE_PER_UNIT = "base_per_unit"  # 1 unit = rate base (projects/2025-12-24-Currency-Converter.py)
 
-def fetch_exchange_rates(api_url, api_key):
+def fetch_rate_snapshot(api_url, api_key, timeout=DEFAULT_TIMEOUT):
     """
-    Fetches current exchange rates from the given API.
+    Fetches current exchange rates and their base currency from the given API.
 
     :param api_url: URL of the exchange rate API
     :param api_key: API key for authentication
-    :return: A dictionary containing currency exchange rates
+    :param timeout: Request timeout in seconds
+    :return: (rates dictionary, base currency code or None if the payload names none)
     :raises: Exception if there is an issue with the API request
     """
     try:
-        response = requests.get(api_url, headers={"apikey": api_key})
+        response = requests.get(api_url, headers={"apikey": api_key}, timeout=timeout)
         response.raise_for_status()  # Raise an HTTPError for bad responses
         data = response.json()
-        return data['rates']
-    except requests.RequestException as e:
-        raise Exception(f"Error fetching exchange rates: {e}")
+        return data['rates'], data.get('base') or data.get('base_code')
+    except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
+        raise Exception(f"Error fetching exchange rates: {e!r}")
+
+def fetch_exchange_rates(api_url, api_key, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetches current exchange rates from the given API.
+
+    :param api_url: URL of the exchange rate API
+    :param api_key: API key for authentication
+    :param timeout: Request timeout in seconds
+    :return: A dictionary containing currency exchange rates
+    :raises: Exception if there is an issue with the API request
+    """
+    return fetch_rate_snapshot(api_url, api_key, timeout)[0]
+
+class RateCache:
+    """
+    File-backed snapshot of the last good exchange rates.
+
+    The snapshot is a JSON file holding the rates, the API URL they came from
+    and the time they were fetched. It is replaced atomically (written to a
+    temporary file, then renamed), so a crash or a concurrent reader never
+    sees a half-written file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def load(self, api_url):
+        """
+        Read the snapshot for api_url.
+
+        :return: (rates, fetched_at, base) or None if there is no usable snapshot;
+                 base is None if the API named no base currency
+        """
+        try:
+            with open(self.path) as cache_file:
+                snapshot = json.load(cache_file)
+            if snapshot['api_url'] != api_url:
+                return None
+            return snapshot['rates'], snapshot['fetched_at'], snapshot.get('base')
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def save(self, api_url, rates, fetched_at, base=None):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False, suffix='.tmp') as temporary_file:
+            json.dump({'api_url': api_url, 'fetched_at': fetched_at, 'rates': rates, 'base': base},
+                      temporary_file)
+        os.replace(temporary_file.name, self.path)
+
+class RateProvider:
+    """
+    Serves exchange rates from a RateCache, going to the API only when needed.
+
+    - Younger than ttl: the cached rates are returned without a request.
+    - Older, but within ttl + stale_ttl: the cached rates are returned at once
+      and refreshed on a background thread (stale-while-revalidate).
+    - Older still, or no snapshot: the rates are fetched; if the API is down,
+      the last good snapshot is returned whatever its age.
+    """
+
+    def __init__(self, api_url, api_key, cache, timeout=DEFAULT_TIMEOUT, clock=time.time):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.cache = cache
+        self.timeout = timeout
+        self.clock = clock
+        self._refresh_thread = None
+        self._refresh_lock = threading.Lock()
+
+    def _fetch_and_store(self):
+        rates, base = fetch_rate_snapshot(self.api_url, self.api_key, self.timeout)
+        fetched_at = self.clock()
+        try:
+            self.cache.save(self.api_url, rates, fetched_at, base)
+        except OSError as e:
+            print(f"Warning: could not save the rate cache: {e}", file=sys.stderr)
+        return rates, fetched_at, base
+
+    def _refresh_in_background(self):
+        def refresh():
+            try:
+                self._fetch_and_store()
+            except Exception as e:
+                print(f"Warning: background rate refresh failed: {e}", file=sys.stderr)
+
+        with self._refresh_lock:
+            if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                self._refresh_thread = threading.Thread(target=refresh, daemon=True)
+                self._refresh_thread.start()
+
+    def get_rates(self):
+        """
+        Get the exchange rates, with their age and where they came from.
+
+        :return: A RateResult
+        :raises: Exception if the API fails and there is no snapshot to fall back on
+        """
+        now = self.clock()
+        cached = self.cache.load(self.api_url)
+        if cached:
+            rates, fetched_at, base = cached
+            age = max(0.0, now - fetched_at)
+            if age <= self.cache.ttl:
+                return RateResult(rates, age, 'fresh', base)
+            if age <= self.cache.ttl + self.cache.stale_ttl:
+                self._refresh_in_background()
+                return RateResult(rates, age, 'stale', base)
+        try:
+            rates, fetched_at, base = self._fetch_and_store()
+            return RateResult(rates, max(0.0, self.clock() - fetched_at), 'fetched', base)
+        except Exception:
+            if not cached:
+                raise
+            rates, fetched_at, base = cached
+            return RateResult(rates, max(0.0, now - fetched_at), 'offline', base)
+
+    def wait_for_refresh(self, timeout=None):
+        """
+        Wait for a background refresh, so a short-lived program saves it before exiting.
+        """
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+def describe_age(seconds):
+    """
+    Format a cache age such as '45 s', '12 min' or '3.5 h'.
+    """
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
 
 def convert_currency(amount, from_currency, to_currency, rates):
     """
@@ -37,37 +202,244 @@ def convert_currency(amount, from_currency, to_currency, rates):
     except KeyError:
         raise ValueError(f"Invalid currency code: {from_currency} or {to_currency}")
 
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET with the stand-in server's rates, or a 503 while it is down.
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        if server.down:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"base": "USD", "rates": server.rates}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in_server(rates=None):
+    """
+    Start a local stand-in for the rate API on a free port.
+
+    Set `server.down = True` to make it fail and `server.rates` to change the
+    rates; `server.requests` counts the requests it received.
+
+    :return: (server, API URL); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.rates = dict(rates or {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 149.5, "INR": 83.2})
+    server.down = False
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/latest/USD"
+
+def run_demo(cache_path):
+    """
+    Walk through fresh, cached, stale-while-revalidate and offline lookups
+    against the local stand-in server, with a fake clock.
+    """
+    server, api_url = start_stand_in_server()
+    clock = [time.time()]
+    provider = RateProvider(api_url, "demo", RateCache(cache_path, ttl=3600, stale_ttl=86400),
+                            clock=lambda: clock[0])
+
+    def show(step):
+        result = provider.get_rates()
+        provider.wait_for_refresh()
+        converted = convert_currency(100, "USD", "EUR", result.rates)
+        print(f"{step.ljust(36)} 100 USD = {converted:.2f} EUR  "
+              f"(rates {describe_age(result.age)} old, {result.status}; API requests so far: {server.requests})")
+
+    try:
+        show("First run, empty cache:")
+        show("Again, within the TTL:")
+        clock[0] += 2 * 3600
+        server.rates["EUR"] = 0.95
+        show("Two hours later (stale):")
+        show("Right after the background refresh:")
+        clock[0] += 3 * 86400
+        server.down = True
+        show("Three days later, API down:")
+    finally:
+        server.shutdown()
+
+class RateTable:
+    """
+    Exchange rates of one snapshot with every cross rate precomputed.
+
+    Rates in either convention are normalized to units per base currency.
+    The base is the one the API names when given (added at 1 if the payload
+    leaves it out); otherwise the currency quoted at exactly 1, or else the
+    first currency. Cross rates do not depend on which base is chosen.
+    matrix[i][j] is the number of units of currency j one unit of currency
+    i buys, so a conversion between any pair is a single indexed lookup and
+    a multiplication. Rebasing derives a new table from the same snapshot
+    without refetching.
+    """
+
+    def __init__(self, rates, base=None, convention=UNITS_PER_BASE):
+        if convention not in (UNITS_PER_BASE, BASE_PER_UNIT):
+            raise ValueError(f"Unknown rate convention: {convention}")
+        if not rates:
+            raise ValueError("No exchange rates")
+        if base is None:
+            base = next((code for code, rate in rates.items() if rate == 1), next(iter(rates)))
+        elif base not in rates:
+            rates = {base: 1.0, **rates}  # Some APIs leave their own base out of the rates
+        try:
+            units = [float(rate) for rate in rates.values()]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Exchange rates must be numbers: {e}")
+        if any(not unit > 0 for unit in units):
+            raise ValueError("Exchange rates must be positive")
+        if convention == BASE_PER_UNIT:
+            units = [1.0 / unit for unit in units]
+        base_unit = units[list(rates).index(base)]
+        self.base = base
+        self.codes = tuple(rates)
+        self.index = {code: position for position, code in enumerate(self.codes)}
+        self.units = tuple(unit / base_unit for unit in units)  # Normalized so the base is exactly 1
+        self.matrix = [[to_units / from_units for to_units in self.units] for from_units in self.units]
+
+    def rate(self, from_currency, to_currency):
+        """
+        Units of to_currency one unit of from_currency buys.
+
+        :raises ValueError: if a currency code is unknown
+        """
+        try:
+            return self.matrix[self.index[from_currency]][self.index[to_currency]]
+        except KeyError:
+            raise ValueError(f"Invalid currency code: {from_currency} or {to_currency}")
+
+    def convert(self, amount, from_currency, to_currency):
+        """
+        Converts an amount with the precomputed cross rate.
+
+        :raises ValueError: if a currency code is unknown
+        """
+        index = self.index
+        try:
+            return amount * self.matrix[index[from_currency]][index[to_currency]]
+        except KeyError:
+            raise ValueError(f"Invalid currency code: {from_currency} or {to_currency}")
+
+    def convert_index(self, amount, from_index, to_index):
+        """
+        Converts an amount between currencies given by their positions in codes.
+        """
+        return amount * self.matrix[from_index][to_index]
+
+    def rebase(self, base):
+        """
+        Returns the same snapshot expressed against another base currency.
+
+        :raises ValueError: if the base currency is unknown
+        """
+        if base not in self.index:
+            raise ValueError(f"Invalid currency code: {base}")
+        return RateTable(self.rates(), base)
+
+    def rates(self, convention=UNITS_PER_BASE):
+        """
+        Returns the rates as a dictionary in the given convention.
+        """
+        if convention == BASE_PER_UNIT:
+            return {code: 1.0 / units for code, units in zip(self.codes, self.units)}
+        return dict(zip(self.codes, self.units))
+
+def benchmark_lookups(count, seed=0):
+    """
+    Time random-pair conversions with convert_currency and with a RateTable.
+    """
+    rates = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 149.5, "AUD": 1.52, "CAD": 1.36,
+             "CHF": 0.88, "CNY": 7.24, "INR": 83.2, "BRL": 4.97, "MXN": 17.1, "SEK": 10.4}
+    rng = random.Random(seed)
+    codes = list(rates)
+    pairs = [(rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+
+    start = time.perf_counter()
+    table = RateTable(rates)
+    build = time.perf_counter() - start
+    index_pairs = [(table.index[from_code], table.index[to_code]) for from_code, to_code in pairs]
+
+    runs = {
+        "convert_currency (two dict lookups)": lambda: [convert_currency(100.0, a, b, rates) for a, b in pairs],
+        "RateTable.convert (by code)": lambda: [table.convert(100.0, a, b) for a, b in pairs],
+        "RateTable.convert_index": lambda: [table.convert_index(100.0, i, j) for i, j in index_pairs],
+    }
+    print(f"{len(codes)} currencies, table built in {build * 1e6:.0f} us; {count:,} random-pair conversions")
+    baseline = None
+    for name, run in runs.items():
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {name.ljust(36)} {count / elapsed:12,.0f} lookups/second ({baseline / elapsed:.2f}x)")
+
 def main():
     """
     Main function to execute the currency conversion program.
     """
-    # Configuration for the currency conversion API
-    api_url = "https://api.exchangerate-api.com/v4/latest/USD"
-    api_key = "your_api_key_here"  # Replace with a valid API key
+    parser = argparse.ArgumentParser(description="Convert between currencies using cached live rates.")
+    parser.add_argument("amount", nargs="?", type=float, help="Amount to convert (prompted if omitted)")
+    parser.add_argument("from_currency", nargs="?", help="Source currency code")
+    parser.add_argument("to_currency", nargs="?", help="Target currency code")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="Exchange rate API URL")
+    parser.add_argument("--api-key", default="your_api_key_here", help="API key")  # Replace with a valid API key
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_PATH, help="Rate cache file")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Seconds the cached rates are fresh")
+    parser.add_argument("--stale-ttl", type=float, default=DEFAULT_STALE_TTL,
+                        help="Further seconds stale rates are served while refreshing")
+    parser.add_argument("--benchmark-lookups", type=int, metavar="COUNT",
+                        help="Benchmark random-pair conversions and exit")
+    parser.add_argument("--demo", action="store_true",
+                        help="Show the cache behaviour against a local stand-in API and exit")
+    args = parser.parse_args()
 
-    # Fetch the latest exchange rates
-    try:
-        exchange_rates = fetch_exchange_rates(api_url, api_key)
-    except Exception as e:
-        print(e)
-        sys.exit(1)
+    if args.benchmark_lookups:
+        benchmark_lookups(args.benchmark_lookups)
+        return
+    if args.demo:
+        run_demo(os.path.join(tempfile.mkdtemp(), "rates.json"))
+        return
 
-    # Get user input for conversion
+    # Get user input for conversion first, so a typo costs no API request
     try:
-        amount = float(input("Enter amount to convert: "))
-        from_currency = input("Enter source currency code (e.g., USD): ").upper()
-        to_currency = input("Enter target currency code (e.g., EUR): ").upper()
+        amount = args.amount if args.amount is not None else float(input("Enter amount to convert: "))
+        from_currency = (args.from_currency or input("Enter source currency code (e.g., USD): ")).upper()
+        to_currency = (args.to_currency or input("Enter target currency code (e.g., EUR): ")).upper()
     except ValueError as e:
         print(f"Invalid input: {e}")
         sys.exit(1)
 
+    # Get the exchange rates, from the cache when they are recent enough
+    provider = RateProvider(args.api_url, args.api_key, RateCache(args.cache_file, args.ttl, args.stale_ttl))
+    try:
+        result = provider.get_rates()
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
     # Perform currency conversion
     try:
-        converted_amount = convert_currency(amount, from_currency, to_currency, exchange_rates)
-        print(f"{amount} {from_currency} is {converted_amount:.2f} {to_currency}")
+        table = RateTable(result.rates, result.base)
+        converted_amount = table.convert(amount, from_currency, to_currency)
+        print(f"{amount} {from_currency} is {converted_amount:.2f} {to_currency} "
+              f"(rates {describe_age(result.age)} old, {result.status})")
     except ValueError as e:
         print(e)
         sys.exit(1)
+    finally:
+        provider.wait_for_refresh()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,422 @@
+import argparse
+import collections
+import csv
+import hashlib
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from itertools import compress, islice
+
+import numpy as np
+
+import email_validator
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DEFAULT_CHUNK_SIZE = 20_000
+DEFAULT_MEMORY_KEYS = 4_000_000
+DEFAULT_BLOOM_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.001
+DEDUP_MODES = ("exact", "bloom", "none")
+
+
+def normalize_email(email):
+    """
+    Strip surrounding whitespace and lowercase the domain.
+
+    The local part is left alone: it is case-sensitive in principle, and
+    lowercasing it would merge addresses some providers treat as distinct.
+    """
+    email = email.strip()
+    local, at, domain = email.rpartition("@")
+    return local + at + domain.lower() if at else email
+
+
+def email_key(email):
+    """
+    64-bit dedup key of a normalized address, as 8 bytes.
+
+    blake2b rather than hash(), which is salted differently in every worker.
+    """
+    return hashlib.blake2b(email.encode("utf-8"), digest_size=8).digest()
+
+
+def clean_chunk(addresses, policy):
+    """
+    Normalize and validate a chunk of raw addresses. Runs inside the worker processes.
+
+    Addresses with a line break inside (possible in quoted CSV fields) are
+    invalid whatever the policy, since the output files hold one address
+    per line; they are returned with the line breaks escaped, after the
+    other invalid addresses.
+
+    :param addresses: List of raw address strings; blank ones are dropped
+    :param policy: email_validator policy name
+    :return: (valid addresses, invalid addresses, dedup keys of the valid ones as bytes)
+    """
+    normalized = list(filter(None, map(normalize_email, addresses)))
+    broken = []
+    joined = "".join(normalized)
+    if "\n" in joined or "\r" in joined:
+        broken = [email.replace("\r", "\\r").replace("\n", "\\n")
+                  for email in normalized if "\n" in email or "\r" in email]
+        normalized = [email for email in normalized if "\n" not in email and "\r" not in email]
+    valid, invalid = email_validator.EmailValidator(policy).partition(normalized)
+    return valid, invalid + broken, b"".join(map(email_key, valid))
+
+
+def _sorted_contains(sorted_keys, keys):
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(sorted_keys, keys)
+    np.minimum(positions, len(sorted_keys) - 1, out=positions)
+    return sorted_keys[positions] == keys
+
+
+class SpillingKeySet:
+    """
+    Exact set of 64-bit keys whose memory use is capped at memory_keys keys.
+
+    New keys go into a sorted in-memory array. When it fills up it is
+    written to a temporary file as a sorted run and memory-mapped, so
+    lookups are binary searches over the array and every run. Exact up to
+    64-bit hash collisions (about one in 10^4 for 10^8 addresses).
+    """
+
+    def __init__(self, memory_keys=DEFAULT_MEMORY_KEYS, directory=None):
+        self.memory_keys = memory_keys
+        self.directory = tempfile.mkdtemp(prefix="email-dedup-", dir=directory)
+        self.recent = np.empty(0, dtype=np.uint64)
+        self.runs = []
+        self.count = 0
+
+    def first_seen(self, keys):
+        """
+        Add keys and report which ones were new.
+
+        :param keys: uint64 array
+        :return: Boolean mask, True where a key was not seen before (only its
+                 first occurrence within keys counts as new)
+        """
+        unique, first = np.unique(keys, return_index=True)
+        seen = _sorted_contains(self.recent, unique)
+        for run in self.runs:
+            seen |= _sorted_contains(run, unique)
+        new = unique[~seen]
+        self.recent = np.insert(self.recent, np.searchsorted(self.recent, new), new)
+        self.count += len(new)
+        if len(self.recent) >= self.memory_keys:
+            self._spill()
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[first[~seen]] = True
+        return mask
+
+    def _spill(self):
+        path = os.path.join(self.directory, f"run-{len(self.runs):05d}.u64")
+        self.recent.tofile(path)
+        self.runs.append(np.memmap(path, dtype=np.uint64, mode="r"))
+        self.recent = np.empty(0, dtype=np.uint64)
+
+    def close(self):
+        self.runs = []
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def describe(self):
+        return f"exact, {self.count:,} keys, {len(self.runs)} spilled runs"
+
+
+class BloomKeySet:
+    """
+    Fixed-size Bloom filter over 64-bit keys.
+
+    Memory stays at about 1.44 * log2(1 / error_rate) bits per capacity
+    key however many keys are added, but a new address is wrongly taken for
+    a duplicate (and dropped) with probability up to error_rate once
+    capacity keys have been added.
+    """
+
+    def __init__(self, capacity=DEFAULT_BLOOM_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.size = max(64, int(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * np.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys):
+        # Double hashing: position i is key + i * step, step derived from the key
+        step = (keys * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(17) | np.uint64(1)
+        rounds = np.arange(self.hashes, dtype=np.uint64)
+        return (keys[:, None] + rounds * step[:, None]) % np.uint64(self.size)
+
+    def first_seen(self, keys):
+        """
+        Add keys and report which ones were (probably) new, like SpillingKeySet.first_seen.
+        """
+        unique, first = np.unique(keys, return_index=True)
+        positions = self._positions(unique)
+        present = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        new = ~present.all(axis=1)
+        added = positions[new].ravel()
+        np.bitwise_or.at(self.bits, added >> np.uint64(3),
+                         np.left_shift(1, (added & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        self.count += int(new.sum())
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[first[new]] = True
+        return mask
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return f"bloom, {self.count:,} keys, {self.bits.nbytes / 2 ** 20:.1f} MiB, {self.hashes} hashes"
+
+
+def make_key_set(mode, memory_keys=DEFAULT_MEMORY_KEYS, capacity=DEFAULT_BLOOM_CAPACITY,
+                 error_rate=DEFAULT_ERROR_RATE, directory=None):
+    """
+    Build the dedup structure for a mode in DEDUP_MODES ('none' returns None).
+    """
+    if mode == "exact":
+        return SpillingKeySet(memory_keys, directory)
+    if mode == "bloom":
+        return BloomKeySet(capacity, error_rate)
+    if mode == "none":
+        return None
+    raise ValueError(f"Unknown dedup mode {mode!r}, expected one of: {', '.join(DEDUP_MODES)}")
+
+
+def read_addresses(stream, column=None):
+    """
+    Lazily yield raw addresses from a text or CSV stream.
+
+    :param stream: File object with one address per line, or a CSV file
+    :param column: CSV column name or 0-based index; None reads plain lines
+    :raises ValueError: If the column is not in the CSV header
+    """
+    if column is None:
+        yield from stream
+        return
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    if column.isdigit():
+        index = int(column)
+    elif column in header:
+        index = header.index(column)
+    else:
+        raise ValueError(f"Column {column!r} not found in CSV header")
+    for row in reader:
+        if len(row) > index:
+            yield row[index]
+
+
+def read_chunks(addresses, chunk_size):
+    """
+    Group an iterable of addresses into lists of at most chunk_size addresses.
+    """
+    addresses = iter(addresses)
+    while True:
+        chunk = list(islice(addresses, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def peak_rss():
+    """
+    Peak resident set size in bytes of this process and of its largest finished child.
+
+    :return: (self, children), or (None, None) where the resource module is missing
+    """
+    if resource is None:
+        return None, None
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is in KiB on Linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def clean_stream(input_stream, valid_stream, invalid_stream=None, policy="lenient", key_set=None,
+                 column=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None):
+    """
+    Normalize, validate and deduplicate every address in input_stream.
+
+    Chunks are validated in a process pool while the input is read, with at
+    most max_pending chunks in flight, and results are written in input
+    order as they come back, so memory use is bounded by the window and the
+    dedup structure rather than by the size of the list.
+
+    :param input_stream: File object with one address per line, or a CSV file
+    :param valid_stream: File object that receives the first occurrence of each valid address
+    :param invalid_stream: File object that receives invalid addresses, or None
+    :param policy: email_validator policy name
+    :param key_set: SpillingKeySet, BloomKeySet, or None to keep duplicates
+    :param column: CSV column name or index, or None for plain text
+    :param workers: Number of worker processes (default: CPU count)
+    :param chunk_size: Number of addresses sent to a worker per task
+    :param max_pending: Maximum chunks in flight (default: 4 per worker)
+    :return: Dictionary of run statistics
+    """
+    email_validator.EmailValidator(policy)  # Fail fast on a bad policy name
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    counts = collections.Counter()
+
+    def write_results(results):
+        valid, invalid, keys = results
+        counts["valid"] += len(valid)
+        counts["invalid"] += len(invalid)
+        if key_set is not None and valid:
+            valid = list(compress(valid, key_set.first_seen(np.frombuffer(keys, dtype=np.uint64)).tolist()))
+        counts["unique"] += len(valid)
+        if valid:
+            valid_stream.write("\n".join(valid) + "\n")
+        if invalid_stream is not None and invalid:
+            invalid_stream.write("\n".join(invalid) + "\n")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for chunk in read_chunks(read_addresses(input_stream, column), chunk_size):
+            if len(pending) >= max_pending:
+                write_results(pending.popleft().get())
+            pending.append(pool.apply_async(clean_chunk, (chunk, policy)))
+        while pending:
+            write_results(pending.popleft().get())
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+
+    total = counts["valid"] + counts["invalid"]
+    rss_self, rss_workers = peak_rss()
+    return {
+        "addresses": total,
+        "valid": counts["valid"],
+        "invalid": counts["invalid"],
+        "unique": counts["unique"],
+        "duplicates": counts["valid"] - counts["unique"],
+        "seconds": elapsed,
+        "addresses_per_second": total / elapsed if elapsed else 0.0,
+        "peak_rss": rss_self,
+        "peak_rss_workers": rss_workers,
+        "dedup": key_set.describe() if key_set is not None else "off",
+    }
+
+
+def print_report(stats, stream=sys.stderr):
+    """
+    Print a throughput and memory summary for a cleaning run.
+    """
+    print(f"Addresses: {stats['addresses']:,} (valid {stats['valid']:,}, invalid {stats['invalid']:,}, "
+          f"duplicates {stats['duplicates']:,}, written {stats['unique']:,})", file=stream)
+    print(f"Elapsed: {stats['seconds']:.2f} s, {stats['addresses_per_second']:,.0f} addresses/second", file=stream)
+    print(f"Dedup: {stats['dedup']}", file=stream)
+    if stats["peak_rss"] is not None:
+        print(f"Peak RSS: {stats['peak_rss'] / 2 ** 20:.1f} MiB main process, "
+              f"{stats['peak_rss_workers'] / 2 ** 20:.1f} MiB largest worker", file=stream)
+
+
+def write_sample_list(path, count, seed=0, batch_size=100_000):
+    """
+    Write a synthetic address list with duplicates and unnormalized spellings.
+
+    Batches reuse generator seeds, so about half the addresses repeat
+    earlier ones; some get padding or an upper-case domain. Written in
+    batches, so it does not hold the list in memory.
+    """
+    rng = random.Random(seed)
+    batches = -(-count // batch_size)
+    with open(path, "w") as output:
+        for batch in range(batches):
+            size = min(batch_size, count - batch * batch_size)
+            lines = []
+            for email in email_validator.generate_emails(size, seed=rng.randrange(max(1, batches // 2))):
+                roll = rng.random()
+                if roll < 0.1:
+                    email = f"  {email}\t"
+                elif roll < 0.2:
+                    local, at, domain = email.rpartition("@")
+                    email = local + at + domain.upper()
+                lines.append(email)
+            output.write("\n".join(lines) + "\n")
+
+
+def main():
+    """
+    Main function to clean an email list in parallel.
+    """
+    parser = argparse.ArgumentParser(
+        description="Validate, normalize and deduplicate a large email list (one address per line, or CSV).")
+    parser.add_argument("input", nargs="?", default="-", help="Address file, or '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="File for valid unique addresses, or '-' for stdout")
+    parser.add_argument("--invalid", help="File for invalid addresses (default: discard)")
+    parser.add_argument("--column", help="Read a CSV file and take addresses from this column (name or index)")
+    parser.add_argument("--policy", choices=list(email_validator.POLICIES), default="lenient",
+                        help="Validation policy (default: lenient)")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="exact",
+                        help="exact: hashed keys, spilled to disk beyond --memory-keys; "
+                             "bloom: fixed memory, may drop a few unique addresses; none: keep duplicates")
+    parser.add_argument("--memory-keys", type=int, default=DEFAULT_MEMORY_KEYS,
+                        help="Keys kept in memory before spilling to disk in exact mode (8 bytes each)")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_BLOOM_CAPACITY,
+                        help="Expected unique addresses in bloom mode")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE,
+                        help="Bloom filter false-positive rate at capacity")
+    parser.add_argument("--spill-dir", help="Directory for spilled runs (default: system temp)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Addresses per worker task (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--benchmark", type=int, metavar="COUNT",
+                        help="Clean a generated list of COUNT addresses with these options and report")
+    args = parser.parse_args()
+
+    if args.chunk_size < 1 or args.memory_keys < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--workers, --chunk-size and --memory-keys must be positive")
+    if args.capacity < 1:
+        parser.error("--capacity must be positive")
+    if not 0 < args.error_rate < 1:
+        parser.error("--error-rate must be between 0 and 1")
+
+    scratch = None
+    if args.benchmark:
+        scratch = tempfile.mkdtemp(prefix="email-clean-")
+        args.input = os.path.join(scratch, "emails.txt")
+        args.output = os.path.join(scratch, "valid.txt")
+        args.column = None
+        write_sample_list(args.input, args.benchmark)
+
+    key_set = make_key_set(args.dedup, args.memory_keys, args.capacity, args.error_rate, args.spill_dir)
+    streams = []
+    try:
+        input_stream = sys.stdin if args.input == "-" else open(args.input, newline="", errors="replace")
+        streams.append(input_stream)
+        output_stream = sys.stdout if args.output == "-" else open(args.output, "w")
+        streams.append(output_stream)
+        invalid_stream = open(args.invalid, "w") if args.invalid else None
+        streams.append(invalid_stream)
+        stats = clean_stream(input_stream, output_stream, invalid_stream, args.policy, key_set,
+                             args.column, args.workers, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"Error cleaning {args.input}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        for stream in streams:
+            if stream not in (None, sys.stdin, sys.stdout):
+                stream.close()
+        if key_set is not None:
+            key_set.close()
+        if scratch:
+            size = os.path.getsize(args.input)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print_report(stats)
+    if scratch:
+        print(f"Input: {size / 2 ** 20:.1f} MiB, {size / 2 ** 20 / stats['seconds']:.1f} MiB/second", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,31 @@
+import argparse
+import random
 import re
+import string
+import sys
+import time
+from itertools import compress, islice
+from operator import not_
+
+# RFC 5321 limits: 254 characters for the address, 64 for the local part
+MAX_EMAIL_LENGTH = 254
+MAX_LOCAL_LENGTH = 64
+
+# Addresses validated per batch when streaming
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Pattern used by is_valid_email, compiled once instead of looked up per call
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+
+# Validation policies, anchored with \Z and used with match. Neither character
+# class admits '@', so a match also guarantees exactly one '@'.
+#   lenient: the is_valid_email pattern (single-label domain, any TLD characters)
+#   strict:  the projects/ Email-Validator pattern (dotted domains, alphabetic TLD
+#            of at least two letters, '%' allowed in the local part)
+POLICIES = {
+    'lenient': re.compile(r'[a-zA-Z0-9_.+-]{1,%d}@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+\Z' % MAX_LOCAL_LENGTH),
+    'strict': re.compile(r'[a-zA-Z0-9._%%+-]{1,%d}@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z' % MAX_LOCAL_LENGTH),
+}
 
 def is_valid_email(email):
     """
@@ -10,11 +37,8 @@ def is_valid_email(email):
     Returns:
         bool: True if the email is valid, False otherwise.
     """
-    # Define a regex pattern for validating an email address
-    email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-    
-    # Use re.match to check if the email matches the pattern
-    if re.match(email_regex, email):
+    # Use the precompiled pattern to check if the email matches
+    if EMAIL_REGEX.match(email):
         return True
     else:
         return False
@@ -35,10 +59,188 @@ def validate_email_list(email_list):
             valid_emails.append(email)
     return valid_emails
 
+class EmailValidator:
+    """
+    Bulk email validation engine with a precompiled policy pattern.
+
+    Each address first passes a cheap length pre-filter, then the compiled
+    pattern (which also enforces a single '@' and the local-part limit).
+    For lists, the length check runs once over the whole list (max of the
+    lengths, in C) so the common case is a single filter() over the pattern.
+    Unlike is_valid_email, a trailing newline is never accepted.
+
+    Args:
+        policy (str): 'lenient' or 'strict', see POLICIES.
+        max_length (int): Longest address accepted.
+    """
+
+    def __init__(self, policy='lenient', max_length=MAX_EMAIL_LENGTH):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of: {', '.join(POLICIES)}")
+        self.policy = policy
+        self.max_length = max_length
+        self._match = POLICIES[policy].match
+
+    def is_valid(self, email):
+        """
+        Returns:
+            bool: True if the email is valid under this policy.
+        """
+        return len(email) <= self.max_length and self._match(email) is not None
+
+    def _check(self, email):
+        return len(email) <= self.max_length and self._match(email)
+
+    def _checker(self, emails):
+        # emails must be a list; skip the per-address length check when no address can fail it
+        if max(map(len, emails), default=0) <= self.max_length:
+            return self._match
+        return self._check
+
+    def validate(self, emails):
+        """
+        Args:
+            emails (iterable): Addresses to validate.
+
+        Returns:
+            list: The valid addresses, in order.
+        """
+        emails = list(emails)
+        return list(filter(self._checker(emails), emails))
+
+    def partition(self, emails):
+        """
+        Args:
+            emails (iterable): Addresses to validate.
+
+        Returns:
+            tuple: (list of valid addresses, list of invalid addresses).
+        """
+        emails = list(emails)
+        results = list(map(self._checker(emails), emails))
+        return list(compress(emails, results)), list(compress(emails, map(not_, results)))
+
+    def iter_results(self, emails, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Validates an iterable of addresses lazily, chunk_size at a time.
+
+        Yields:
+            tuple: (email, True if valid) for each address.
+        """
+        emails = iter(emails)
+        while True:
+            chunk = list(islice(emails, chunk_size))
+            if not chunk:
+                return
+            yield from zip(chunk, map(bool, map(self._checker(chunk), chunk)))
+
+def iter_file_results(file, policy='lenient'):
+    """
+    Streams validation results for a file with one address per line.
+
+    Lines are stripped of surrounding whitespace and blank lines are skipped,
+    so files of any size are validated in constant memory.
+
+    Args:
+        file (str or file object): Path or open text file.
+        policy (str): 'lenient' or 'strict'.
+
+    Yields:
+        tuple: (email, True if valid) for each non-blank line.
+    """
+    if isinstance(file, str):
+        with open(file, encoding='utf-8', errors='replace') as handle:
+            yield from iter_file_results(handle, policy)
+        return
+    yield from EmailValidator(policy).iter_results(filter(None, map(str.strip, file)))
+
+def generate_emails(count, seed=0):
+    """
+    Generates a synthetic list of addresses, roughly 70% valid, for benchmarks.
+    """
+    rng = random.Random(seed)
+    characters = string.ascii_lowercase + string.digits
+    tlds = ['com', 'org', 'net', 'co', 'io', 'de']
+    emails = []
+    for _ in range(count):
+        user = ''.join(rng.choices(characters, k=rng.randint(3, 12)))
+        if rng.random() < 0.3:
+            user += rng.choice('._+-') + ''.join(rng.choices(characters, k=rng.randint(2, 6)))
+        domain = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        kind = rng.random()
+        if kind < 0.7:
+            emails.append(f"{user}@{domain}.{rng.choice(tlds)}")
+        elif kind < 0.8:
+            emails.append(f"{user}{domain}.{rng.choice(tlds)}")
+        elif kind < 0.9:
+            emails.append(f"{user}@{domain}@{domain}.{rng.choice(tlds)}")
+        else:
+            emails.append(f"{user} {domain}@{domain}.{rng.choice(tlds)}")
+    return emails
+
+def _best_time(function, repeat):
+    """
+    Runs function repeat times and returns (its result, the fastest time).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def benchmark(count, repeat=3):
+    """
+    Compares validate_email_list with EmailValidator on synthetic addresses,
+    reporting the best of repeat runs.
+    """
+    emails = generate_emails(count)
+    print(f"Validating {count:,} addresses, best of {repeat} runs")
+
+    uncompiled, original = _best_time(
+        lambda: [email for email in emails if re.match(EMAIL_REGEX.pattern, email)], repeat)
+    print(f"  re.match per call (original): {original:.3f} s ({count / original:,.0f} addresses/second)")
+    expected, baseline = _best_time(lambda: validate_email_list(emails), repeat)
+    print(f"  validate_email_list:          {baseline:.3f} s ({count / baseline:,.0f} addresses/second)")
+
+    for policy in POLICIES:
+        validator = EmailValidator(policy)
+        valid, elapsed = _best_time(lambda: validator.validate(emails), repeat)
+        note = f", same result: {valid == expected == uncompiled}" if policy == 'lenient' else ''
+        print(f"  EmailValidator({policy!r}):{' ' * (11 - len(policy))}{elapsed:.3f} s "
+              f"({count / elapsed:,.0f} addresses/second, {len(valid):,} valid, "
+              f"{original / elapsed:.1f}x original, {baseline / elapsed:.1f}x validate_email_list{note})")
+
+    lines = [email + '\n' for email in emails]
+    streamed, elapsed = _best_time(lambda: sum(valid for _, valid in iter_file_results(lines)), repeat)
+    print(f"  iter_file_results (lenient):  {elapsed:.3f} s ({count / elapsed:,.0f} addresses/second, "
+          f"{streamed:,} valid)")
+
 def main():
     """
-    Main function to demonstrate the email validation.
+    Main function to validate an address file, or demonstrate the email validation.
     """
+    parser = argparse.ArgumentParser(description="Validate email addresses, one per line.")
+    parser.add_argument("file", nargs="?", help="File of addresses; without it a short demo runs")
+    parser.add_argument("--policy", choices=list(POLICIES), default='lenient', help="Validation policy")
+    parser.add_argument("--invalid", action="store_true", help="Print the invalid addresses instead")
+    parser.add_argument("--benchmark", type=int, metavar="COUNT",
+                        help="Benchmark validate_email_list against EmailValidator on COUNT addresses")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+    if args.file:
+        try:
+            for email, valid in iter_file_results(args.file, args.policy):
+                if valid != args.invalid:
+                    print(email)
+        except OSError as e:
+            print(f"Error reading {args.file}: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
     # Sample list of email addresses for testing
     test_emails = [
         "valid.email@example.com",
@@ -0,0 +1,90 @@
+import argparse
+import time
+
+import numpy as np
+
+import instagram_style_image_filter as filters
+
+# (rows, cols) of the benchmark images
+IMAGE_SIZES = {
+    "4K": (2160, 3840),
+    "12MP": (3000, 4000),
+}
+
+CHAINED_FILTERS = {
+    "sepia": filters.apply_sepia,
+    "grayscale": filters.apply_grayscale,
+    "vignette": filters.apply_vignette,
+}
+
+
+def random_image(rows, cols, seed=0):
+    """
+    Build a random BGR test image.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(rows, cols, 3), dtype=np.uint8)
+
+
+def run_chained(image, chain):
+    """
+    Apply the filters one after another with the apply_* functions.
+    """
+    for name in chain:
+        image = CHAINED_FILTERS[name](image)
+    return image
+
+
+def best_time(func, repeat):
+    """
+    Return the fastest of repeat runs of func, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_pipeline(chain, repeat):
+    """
+    Compare chained apply_* calls against a fused FilterPipeline.
+
+    :param chain: Filter names, in order
+    :param repeat: Runs per measurement (the fastest is reported)
+    """
+    pipeline = filters.FilterPipeline(chain)
+    print(f"Chain: {' -> '.join(chain)}")
+    print("image      chained MP/s    fused MP/s   speedup   identical")
+    for label, (rows, cols) in IMAGE_SIZES.items():
+        image = random_image(rows, cols)
+        out = np.empty(pipeline.output_shape(image.shape), dtype=np.uint8)
+        megapixels = rows * cols / 1e6
+
+        chained = best_time(lambda: run_chained(image, chain), repeat)
+        fused = best_time(lambda: pipeline.apply(image, out), repeat)
+        identical = np.array_equal(run_chained(image, chain), pipeline.apply(image))
+        print(f"{label.ljust(8)}{megapixels / chained:15.1f}{megapixels / fused:14.1f}"
+              f"{chained / fused:9.2f}x{str(identical).rjust(12)}")
+
+
+def main():
+    """
+    Main function to run the image filter benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Image filter benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Chained apply_* calls vs fused FilterPipeline")
+    pipeline_parser.add_argument("--filters", nargs="+", default=["sepia", "vignette"],
+                                 choices=list(filters.PIPELINE_FILTERS))
+    pipeline_parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5)")
+
+    args = parser.parse_args()
+    if args.command == "pipeline":
+        benchmark_pipeline(args.filters, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
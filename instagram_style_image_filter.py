@@ -1,6 +1,24 @@
+import threading
+from collections import OrderedDict
+
 import cv2
 import numpy as np
-from typing import Tuple
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+# Sepia color matrix, applied to BGR pixels
+SEPIA_KERNEL = np.array([[0.272, 0.534, 0.131],
+                         [0.349, 0.686, 0.168],
+                         [0.393, 0.769, 0.189]])
+
+# Rows processed per strip by FilterPipeline; small enough that a strip of a
+# 4K image and its scratch buffers stay in cache between stages.
+DEFAULT_STRIP_ROWS = 64
+
+# Default memory cap of the vignette mask cache (a 12MP mask is ~48 MB)
+DEFAULT_MASK_CACHE_BYTES = 256 * 1024 * 1024
+
+# Default peak working memory of FilterPipeline.apply_tiled
+DEFAULT_TILE_MEMORY_BUDGET = 64 * 1024 * 1024
 
 
 def apply_sepia(image: np.ndarray) -> np.ndarray:
@@ -11,12 +29,8 @@ def apply_sepia(image: np.ndarray) -> np.ndarray:
     :return: The image with a sepia filter applied.
     """
     try:
-        # Define sepia filter kernel
-        kernel = np.array([[0.272, 0.534, 0.131],
-                           [0.349, 0.686, 0.168],
-                           [0.393, 0.769, 0.189]])
         # Apply the filter
-        sepia_img = cv2.transform(image, kernel)
+        sepia_img = cv2.transform(image, SEPIA_KERNEL)
         # Clip values to ensure they remain in valid range
         return np.clip(sepia_img, 0, 255).astype(np.uint8)
     except Exception as e:
@@ -38,6 +52,137 @@ def apply_grayscale(image: np.ndarray) -> np.ndarray:
         return image
 
 
+def _vignette_factors(rows: int, cols: int, strength: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the separable factors of the vignette mask.
+
+    The mask is the outer product of a column and a row Gaussian kernel,
+    normalized by its Frobenius norm, which for an outer product is the
+    product of the two kernel norms. Any block of rows of the mask can
+    therefore be built without building the whole mask.
+
+    :return: (rows, 1) row factors and (1, cols) column factors.
+    """
+    kernel_x = cv2.getGaussianKernel(cols, cols * strength)
+    kernel_y = cv2.getGaussianKernel(rows, rows * strength)
+    scale = 255 / (np.linalg.norm(kernel_y) * np.linalg.norm(kernel_x))
+    return kernel_y * scale, kernel_x.T
+
+
+def _mask_rows(factors: Tuple[np.ndarray, np.ndarray], row_start: int, row_end: int) -> np.ndarray:
+    row_factors, col_factors = factors
+    return (row_factors[row_start:row_end] * col_factors).astype(np.float32)
+
+
+def _build_vignette_mask(rows: int, cols: int, strength: float) -> np.ndarray:
+    """
+    Build a read-only float32 vignette mask of shape (rows, cols).
+    """
+    mask = _mask_rows(_vignette_factors(rows, cols, strength), 0, rows)
+    mask.flags.writeable = False  # Cached masks are shared between callers
+    return mask
+
+
+class VignetteMaskCache:
+    """
+    Thread-safe LRU cache of vignette masks keyed by (rows, cols, strength).
+
+    The least recently used masks are evicted once the cached masks exceed
+    max_bytes; a mask larger than max_bytes is built but never cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MASK_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._masks = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, rows: int, cols: int, strength: float) -> np.ndarray:
+        """
+        Return the mask for the given geometry, building it on a miss.
+
+        :param rows: Image height in pixels.
+        :param cols: Image width in pixels.
+        :param strength: The strength of the vignette effect.
+        :return: A read-only (rows, cols) float32 mask.
+        """
+        key = (rows, cols, float(strength))
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+
+        mask = _build_vignette_mask(rows, cols, strength)
+        with self._lock:
+            if mask.nbytes <= self.max_bytes and key not in self._masks:
+                self._masks[key] = mask
+                self._bytes += mask.nbytes
+                self._evict()
+        return mask
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """
+        Change the memory cap, evicting masks if needed.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """
+        Drop every cached mask and reset the counters.
+        """
+        with self._lock:
+            self._masks.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        """
+        Report cache statistics.
+
+        :return: Dictionary with hits, misses, entries, bytes and max_bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._masks),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes:
+            _, mask = self._masks.popitem(last=False)
+            self._bytes -= mask.nbytes
+
+
+# Shared by apply_vignette and FilterPipeline
+VIGNETTE_MASK_CACHE = VignetteMaskCache()
+
+
+def vignette_mask(rows: int, cols: int, strength: float = 0.5) -> np.ndarray:
+    """
+    Get the vignette mask for an image of the given size.
+
+    Masks come from VIGNETTE_MASK_CACHE, so images that share a resolution
+    and strength reuse the same precomputed mask.
+
+    :param rows: Image height in pixels.
+    :param cols: Image width in pixels.
+    :param strength: The strength of the vignette effect.
+    :return: A read-only (rows, cols) float32 array of per-pixel scale factors.
+    """
+    return VIGNETTE_MASK_CACHE.get(rows, cols, strength)
+
+
 def apply_vignette(image: np.ndarray, strength: float = 0.5) -> np.ndarray:
     """
     Apply a vignette filter to the given image.
@@ -48,22 +193,293 @@ def apply_vignette(image: np.ndarray, strength: float = 0.5) -> np.ndarray:
     """
     try:
         rows, cols = image.shape[:2]
-        # Create vignette mask
-        kernel_x = cv2.getGaussianKernel(cols, cols * strength)
-        kernel_y = cv2.getGaussianKernel(rows, rows * strength)
-        kernel = kernel_y * kernel_x.T
-        mask = 255 * kernel / np.linalg.norm(kernel)
-        vignette_img = np.copy(image)
-
-        for i in range(3):
-            vignette_img[:, :, i] = vignette_img[:, :, i] * mask
+        # Get the (cached) vignette mask and scale every channel at once
+        mask = vignette_mask(rows, cols, strength)
+        if image.ndim == 3:
+            mask = mask[:, :, np.newaxis]
+        vignette_img = image * mask
 
-        return np.clip(vignette_img, 0, 255).astype(np.uint8)
+        return np.clip(vignette_img, 0, 255, out=vignette_img).astype(np.uint8)
     except Exception as e:
         print(f"Error applying vignette filter: {e}")
         return image
 
 
+class _SepiaStage:
+    """Pipeline stage equivalent to apply_sepia."""
+
+    in_place = False
+
+    def output_channels(self, channels: int) -> int:
+        if channels != 3:
+            raise ValueError("Sepia requires a 3-channel BGR image")
+        return 3
+
+    def scratch_bytes_per_pixel(self, channels: int) -> int:
+        return 3
+
+    def prepare(self, rows: int, cols: int, channels: int, tiled: bool = False) -> None:
+        return None
+
+    def run(self, state, src: np.ndarray, dst: np.ndarray, row_start: int) -> None:
+        cv2.transform(src, SEPIA_KERNEL, dst=dst)
+
+
+class _GrayscaleStage:
+    """Pipeline stage equivalent to apply_grayscale."""
+
+    in_place = False
+
+    def output_channels(self, channels: int) -> int:
+        if channels != 3:
+            raise ValueError("Grayscale requires a 3-channel BGR image")
+        return 1
+
+    def scratch_bytes_per_pixel(self, channels: int) -> int:
+        return 1
+
+    def prepare(self, rows: int, cols: int, channels: int, tiled: bool = False) -> None:
+        return None
+
+    def run(self, state, src: np.ndarray, dst: np.ndarray, row_start: int) -> None:
+        cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+class _VignetteStage:
+    """
+    Pipeline stage equivalent to apply_vignette.
+
+    The mask depends on the whole image size, so it is fetched once per
+    image in prepare() and each strip uses the matching rows of it. In tiled
+    mode only the separable factors are kept and each strip builds its own
+    rows of the mask, bit-identical to the full mask.
+    """
+
+    in_place = True
+
+    def __init__(self, strength: float = 0.5):
+        self.strength = strength
+
+    def output_channels(self, channels: int) -> int:
+        return channels
+
+    def scratch_bytes_per_pixel(self, channels: int) -> int:
+        # float32 product plus the float64 and float32 mask rows in tiled mode
+        return 4 * channels + 12
+
+    def prepare(self, rows: int, cols: int, channels: int, tiled: bool = False) -> dict:
+        if tiled:
+            mask = None
+            factors = _vignette_factors(rows, cols, self.strength)
+        else:
+            mask = vignette_mask(rows, cols, self.strength)
+            factors = None
+        return {"mask": mask, "factors": factors, "channels": channels, "scratch": None}
+
+    def run(self, state: dict, src: np.ndarray, dst: np.ndarray, row_start: int) -> None:
+        row_end = row_start + src.shape[0]
+        if state["mask"] is not None:
+            mask = state["mask"][row_start:row_end]
+        else:
+            mask = _mask_rows(state["factors"], row_start, row_end)
+        if state["channels"] > 1:
+            mask = mask[:, :, np.newaxis]
+        if state["scratch"] is None or state["scratch"].shape[0] < src.shape[0]:
+            state["scratch"] = np.empty(src.shape, dtype=np.float32)
+        scratch = state["scratch"][:src.shape[0]]
+        np.multiply(src, mask, out=scratch)
+        # Same clipping and truncating float -> uint8 cast as apply_vignette
+        np.minimum(scratch, 255, out=scratch)
+        np.copyto(dst, scratch, casting="unsafe")
+
+
+PIPELINE_FILTERS = {
+    "sepia": _SepiaStage,
+    "grayscale": _GrayscaleStage,
+    "vignette": _VignetteStage,
+}
+
+FilterSpec = Union[str, Tuple[str, dict]]
+
+# Marks stages that write straight into the output (or output strip)
+_OUTPUT = object()
+
+
+class FilterPipeline:
+    """
+    An ordered chain of filters applied to an image in a single pass.
+
+    The image is processed in strips of rows: every filter runs on a strip
+    before the next strip is read, so each pixel is loaded from memory once
+    and the intermediate results stay in cache. Output and scratch buffers
+    are preallocated, and filters that can work in place (vignette) reuse
+    the previous stage's buffer. The result is identical to calling the
+    apply_* functions one after another.
+
+    Filters are given by name ("sepia", "grayscale", "vignette") or as a
+    (name, kwargs) tuple such as ("vignette", {"strength": 0.3}). Per-image
+    state lives in apply(), so one pipeline can be shared between threads.
+    """
+
+    def __init__(self, filters: Sequence[FilterSpec], strip_rows: int = DEFAULT_STRIP_ROWS):
+        if not filters:
+            raise ValueError("A pipeline needs at least one filter")
+        if strip_rows < 1:
+            raise ValueError("strip_rows must be positive")
+        self.stages = [self._make_stage(spec) for spec in filters]
+        self.strip_rows = strip_rows
+
+    @staticmethod
+    def _make_stage(spec: FilterSpec):
+        name, kwargs = (spec, {}) if isinstance(spec, str) else spec
+        try:
+            stage_class = PIPELINE_FILTERS[name]
+        except KeyError:
+            raise ValueError(f"Unknown filter: {name}")
+        return stage_class(**kwargs)
+
+    def output_shape(self, shape: Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        Compute the shape of the filtered image.
+
+        :param shape: Shape of the input image.
+        :return: Shape of the output image.
+        :raises ValueError: If a filter cannot handle its input channels.
+        """
+        channels = shape[2] if len(shape) == 3 else 1
+        for stage in self.stages:
+            channels = stage.output_channels(channels)
+        return shape[:2] + ((channels,) if channels > 1 else ())
+
+    def _plan(self, shape: Tuple[int, ...], strip_rows: int, tiled: bool = False) -> Tuple[list, list]:
+        """
+        Prepare per-image stage state and decide where each stage writes:
+        straight into the output when every later stage can work in place,
+        otherwise into a scratch strip.
+
+        :return: (states, targets), one entry per stage. A target is None to
+                 reuse the previous stage's buffer, _OUTPUT for the output
+                 strip, or a preallocated scratch array.
+        """
+        rows, cols = shape[:2]
+        channels = shape[2] if len(shape) == 3 else 1
+        states = []
+        targets = []
+        for index, stage in enumerate(self.stages):
+            states.append(stage.prepare(rows, cols, channels, tiled))
+            channels = stage.output_channels(channels)
+            later = self.stages[index + 1:]
+            if index > 0 and stage.in_place:
+                targets.append(None)
+            elif all(next_stage.in_place for next_stage in later):
+                targets.append(_OUTPUT)
+            else:
+                strip_shape = (strip_rows, cols) + ((channels,) if channels > 1 else ())
+                targets.append(np.empty(strip_shape, dtype=np.uint8))
+        return states, targets
+
+    def _run_strip(self, states: list, targets: list, src: np.ndarray,
+                   out_strip: np.ndarray, row_start: int) -> None:
+        """
+        Run every stage on one strip of rows starting at row_start.
+        """
+        for stage, state, target in zip(self.stages, states, targets):
+            if target is None:
+                dst = src
+            elif target is _OUTPUT:
+                dst = out_strip
+            else:
+                dst = target[:src.shape[0]]
+            stage.run(state, src, dst, row_start)
+            src = dst
+
+    def apply(self, image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Run the whole filter chain over an image.
+
+        :param image: The input image in BGR (or grayscale) format.
+        :param out: Optional preallocated uint8 output buffer.
+        :return: The filtered image (out, if given).
+        """
+        rows = image.shape[0]
+        out_shape = self.output_shape(image.shape)
+        if out is None:
+            out = np.empty(out_shape, dtype=np.uint8)
+        elif out.shape != out_shape or out.dtype != np.uint8:
+            raise ValueError(f"Output buffer must be uint8 with shape {out_shape}")
+
+        states, targets = self._plan(image.shape, self.strip_rows)
+        for row_start in range(0, rows, self.strip_rows):
+            row_end = min(row_start + self.strip_rows, rows)
+            self._run_strip(states, targets, image[row_start:row_end], out[row_start:row_end], row_start)
+        return out
+
+    def tile_rows(self, shape: Tuple[int, ...], memory_budget: int) -> int:
+        """
+        Pick the strip height that keeps apply_tiled within a memory budget.
+
+        The estimate covers the input and output strips, one output-sized
+        conversion buffer for the writer and every stage's scratch memory.
+
+        :param shape: Shape of the input image.
+        :param memory_budget: Peak working memory in bytes.
+        :return: Rows per strip (at least 1).
+        """
+        cols = shape[1]
+        channels = shape[2] if len(shape) == 3 else 1
+        bytes_per_pixel = channels
+        for stage in self.stages:
+            bytes_per_pixel += stage.scratch_bytes_per_pixel(channels)
+            channels = stage.output_channels(channels)
+        bytes_per_pixel += 2 * channels
+        return max(1, memory_budget // (bytes_per_pixel * cols))
+
+    def apply_tiled(self, shape: Tuple[int, ...], read_rows: Callable[[np.ndarray], None],
+                    write_rows: Callable[[np.ndarray], None],
+                    memory_budget: int = DEFAULT_TILE_MEMORY_BUDGET) -> None:
+        """
+        Stream an image through the filter chain one strip at a time.
+
+        Neither the input nor the output image is ever held in memory as a
+        whole: read_rows fills a strip buffer with the next rows of the
+        input, and write_rows receives each filtered strip in order. The
+        vignette mask is built per strip from its separable factors, so the
+        output is identical to apply() on the whole image.
+
+        :param shape: Shape of the input image.
+        :param read_rows: Callback filling the given buffer with the next rows.
+        :param write_rows: Callback receiving each filtered strip (the buffer
+                           is reused, so it must be consumed immediately).
+        :param memory_budget: Approximate peak working memory in bytes.
+        """
+        rows = shape[0]
+        strip_rows = min(rows, self.tile_rows(shape, memory_budget))
+        out_shape = self.output_shape(shape)
+        in_strip = np.empty((strip_rows,) + tuple(shape[1:]), dtype=np.uint8)
+        out_strip = np.empty((strip_rows,) + tuple(out_shape[1:]), dtype=np.uint8)
+
+        states, targets = self._plan(shape, strip_rows, tiled=True)
+        for row_start in range(0, rows, strip_rows):
+            count = min(strip_rows, rows - row_start)
+            src = in_strip[:count]
+            read_rows(src)
+            self._run_strip(states, targets, src, out_strip[:count], row_start)
+            write_rows(out_strip[:count])
+
+    __call__ = apply
+
+
+def apply_filters(image: np.ndarray, filters: Sequence[FilterSpec]) -> np.ndarray:
+    """
+    Apply an ordered list of filters to an image in a single fused pass.
+
+    :param image: The input image in BGR format.
+    :param filters: Filter names or (name, kwargs) tuples, see FilterPipeline.
+    :return: The filtered image.
+    """
+    return FilterPipeline(filters).apply(image)
+
+
 def load_image(file_path: str) -> np.ndarray:
     """
     Load an image from a file path.
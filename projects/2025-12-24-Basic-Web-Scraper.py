@@ -1,75 +1,511 @@
 # Hey everyone! I'm a fresher and I built a super basic web scraper!
-# This script will visit a website, grab some text, and print it out.
+# It started by grabbing the first page of quotes.toscrape.com; now it crawls
+# every page, politely, and saves the quotes as it goes.
 
 # First, we need some tools!
 # You'll need to install 'requests' and 'BeautifulSoup4'.
 # Open your terminal/command prompt and type:
 # pip install requests beautifulsoup4
 
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib import robotparser
+from urllib.parse import urldefrag, urljoin, urlsplit
+
 import requests # This library helps us download web pages from the internet
 from bs4 import BeautifulSoup # This library helps us easily read and navigate HTML content
 
-# 1. Define the website we want to scrape
 # I picked a website that's specifically designed for practicing web scraping!
-target_url = "http://quotes.toscrape.com/"
-
-print(f"Starting the scraper for: {target_url}")
-print("-" * 40)
-
-try:
-    # 2. Make a request to the website
-    # This is like opening a web browser and going to the URL.
-    # The 'requests.get()' function tries to fetch the page content.
-    response = requests.get(target_url)
-
-    # Check if the request was successful (status code 200 means everything is OK!)
-    if response.status_code == 200:
-        print("Successfully fetched the page content!")
-        
-        # 3. Parse the HTML content
-        # We use BeautifulSoup to turn the raw HTML text into a Python object
-        # that we can easily search through using its methods.
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Now, let's find the data we want!
-        # On this 'quotes.toscrape.com' site, each quote is wrapped in a <div> tag
-        # that has a specific class called "quote".
-        # We use 'find_all()' to get a list of all such <div> elements.
-        all_quotes_divs = soup.find_all('div', class_='quote')
-
-        print(f"Found {len(all_quotes_divs)} quotes on this page.")
-        print("-" * 40)
-
-        # 4. Loop through each found quote and extract the specific text and author
-        quote_number = 1
-        for quote_div in all_quotes_divs:
-            # Inside each 'quote_div', the actual quote text is usually in a <span> tag
-            # with the class "text". We find it and use '.get_text()' to grab its content.
-            quote_text = quote_div.find('span', class_='text').get_text()
-            
-            # The author's name is typically in a <small> tag with the class "author".
-            # Again, we find it and extract its text.
-            author = quote_div.find('small', class_='author').get_text()
-
-            # Print out what we found for each quote!
-            print(f"Quote #{quote_number}:")
-            print(f"  Text: {quote_text}")
-            print(f"  Author: {author}")
-            print("-" * 40)
-            quote_number += 1
+TARGET_URL = "http://quotes.toscrape.com/"
+USER_AGENT = "QuotesCrawler/1.0"
+
+# Be nice to the website: wait at least this many seconds between two
+# requests to the same host (robots.txt Crawl-delay can make it longer)
+DEFAULT_DELAY = 1.0
+
+# Save the crawl state every this many pages so it can be resumed
+CHECKPOINT_EVERY = 10
+
+# The fixture site always uses this port, so its checkpoints can be resumed
+FIXTURE_PORT = 8765
+
+
+class HashedSet:
+    """Remembers strings by a 16-byte hash instead of the whole string.
+
+    Exact up to hash collisions (practically never), and much smaller than
+    a set of full URLs on big crawls. Checkpoints append only the digests
+    added since the last one to a side file, so saving stays cheap however
+    big the set grows.
+    """
+
+    kind = "hashed"
+    DIGEST_SIZE = 16
+
+    def __init__(self, digests=(), saved_bytes=0):
+        self.digests = set(digests)
+        self.unsaved = [] # Digests added since the last save, in order
+        self.saved_bytes = saved_bytes # Length of the side file the last checkpoint counts on
+
+    @classmethod
+    def _digest(cls, item):
+        return hashlib.blake2b(item.encode("utf-8"), digest_size=cls.DIGEST_SIZE).digest()
+
+    def add(self, item):
+        digest = self._digest(item)
+        if digest not in self.digests:
+            self.digests.add(digest)
+            self.unsaved.append(digest)
+
+    def __contains__(self, item):
+        return self._digest(item) in self.digests
+
+    def __len__(self):
+        return len(self.digests)
+
+    def save(self, path):
+        """Appends the new digests to the side file at path and returns the
+        checkpoint state. Anything past the previous checkpoint's length (left
+        by a crash, or by an older crawl) is overwritten."""
+        with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as digest_file:
+            digest_file.seek(self.saved_bytes)
+            digest_file.write(b"".join(self.unsaved))
+            digest_file.truncate()
+            digest_file.flush()
+            os.fsync(digest_file.fileno())
+        self.saved_bytes += len(self.unsaved) * self.DIGEST_SIZE
+        self.unsaved = []
+        return {"kind": self.kind, "bytes": self.saved_bytes}
+
+    @classmethod
+    def load(cls, state, path):
+        if "digests" in state: # Checkpoint written before the side file existed
+            seen = cls()
+            seen.unsaved = [bytes.fromhex(digest) for digest in state["digests"]]
+            seen.digests.update(seen.unsaved)
+            return seen
+        try:
+            with open(path, "rb") as digest_file:
+                data = digest_file.read(state["bytes"])
+        except FileNotFoundError:
+            data = b""
+        if len(data) != state["bytes"]:
+            raise ValueError(f"{path} is shorter than its checkpoint records")
+        size = cls.DIGEST_SIZE
+        return cls((data[i:i + size] for i in range(0, len(data), size)), len(data))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set for very large crawls.
+
+    Never forgets an item, but may wrongly claim to have seen one with
+    probability error_rate once `capacity` items have been added. Memory
+    stays the same however many items are added.
+    """
+
+    kind = "bloom"
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001, bits=None):
+        size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.size = size
+        self.hashes = max(1, round(size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        """Returns the checkpoint state; fixed-size, so it needs no side file."""
+        return {"kind": self.kind, "capacity": self.capacity, "error_rate": self.error_rate,
+                "count": self.count, "bits": base64.b64encode(bytes(self.bits)).decode("ascii")}
+
+    @classmethod
+    def load(cls, state, path):
+        bloom = cls(state["capacity"], state["error_rate"], bytearray(base64.b64decode(state["bits"])))
+        bloom.count = state["count"]
+        return bloom
+
+
+SEEN_SET_TYPES = {HashedSet.kind: HashedSet, BloomFilter.kind: BloomFilter}
+
+
+def new_seen_set(kind, capacity):
+    return BloomFilter(capacity) if kind == BloomFilter.kind else HashedSet()
+
+
+def load_seen_set(state, path):
+    return SEEN_SET_TYPES[state["kind"]].load(state, path)
+
+
+def seen_set_paths(checkpoint_path):
+    """Side files next to a checkpoint holding the URL and quote seen-sets."""
+    return checkpoint_path + ".seen-urls", checkpoint_path + ".seen-quotes"
+
+
+class PoliteFetcher:
+    """Downloads pages while obeying robots.txt and a per-host rate limit."""
+
+    def __init__(self, delay=DEFAULT_DELAY, user_agent=USER_AGENT, timeout=30):
+        self.delay = delay
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.session = requests.Session() # Reuses connections between requests
+        self.session.headers["User-Agent"] = user_agent
+        self.robots = {} # host -> RobotFileParser
+        self.next_request = {} # host -> earliest time of the next request
+
+    def _wait_turn(self, host):
+        """Sleeps until the host may be contacted again."""
+        now = time.monotonic()
+        wait = self.next_request.get(host, now) - now
+        if wait > 0:
+            time.sleep(wait)
+        robots = self.robots.get(host)
+        crawl_delay = robots.crawl_delay(self.user_agent) if robots else None
+        self.next_request[host] = time.monotonic() + max(self.delay, float(crawl_delay or 0))
+
+    def _robots_for(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        if host not in self.robots:
+            robots = robotparser.RobotFileParser(urljoin(host, "/robots.txt"))
+            self._wait_turn(host)
+            try:
+                response = self.session.get(robots.url, timeout=self.timeout)
+                if response.status_code in (401, 403):
+                    robots.disallow_all = True
+                elif response.status_code >= 400:
+                    robots.allow_all = True # No robots.txt means everything is allowed
+                else:
+                    robots.parse(response.text.splitlines())
+            except requests.exceptions.RequestException:
+                robots.allow_all = True
+            self.robots[host] = robots
+        return host, self.robots[host]
 
+    def allowed(self, url):
+        """Checks robots.txt before we visit a URL."""
+        _, robots = self._robots_for(url)
+        return robots.can_fetch(self.user_agent, url)
+
+    def fetch(self, url):
+        """Returns the page's HTML, or None if the request failed."""
+        host, _ = self._robots_for(url)
+        self._wait_turn(host)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.text
+        except requests.exceptions.RequestException as e:
+            print(f"An error occurred while fetching {url}: {e}")
+            return None
+
+
+def extract_quotes(soup):
+    """Finds every quote on a page.
+
+    On 'quotes.toscrape.com' each quote is a <div class="quote"> holding the
+    text in <span class="text">, the author in <small class="author"> and
+    tag links in <a class="tag">.
+    """
+    records = []
+    for quote_div in soup.find_all("div", class_="quote"):
+        text = quote_div.find("span", class_="text")
+        author = quote_div.find("small", class_="author")
+        if text is None or author is None:
+            continue
+        records.append({
+            "text": text.get_text(),
+            "author": author.get_text(),
+            "tags": [tag.get_text() for tag in quote_div.find_all("a", class_="tag")],
+        })
+    return records
+
+
+def extract_links(soup, page_url, follow):
+    """Finds the links to crawl next.
+
+    follow="pagination" only takes the "Next" button; follow="all" takes
+    every link on the page (tag pages, author pages, ...).
+    """
+    if follow == "pagination":
+        anchors = soup.select("li.next a[href]")
     else:
-        # If the status code is not 200, something went wrong with fetching the page.
-        print(f"Oops! Couldn't retrieve the page. Status code: {response.status_code}")
-
-except requests.exceptions.RequestException as e:
-    # This 'try-except' block helps us handle potential errors.
-    # 'RequestException' catches common network errors, like no internet connection,
-    # or if the website is unavailable.
-    print(f"An error occurred while trying to connect to the website: {e}")
-except Exception as e:
-    # This is a general catch-all for any other unexpected errors that might occur.
-    print(f"An unexpected error occurred during scraping: {e}")
-
-print("\nScraping process finished!")
-print("Hope you learned something cool about web scraping!")
\ No newline at end of file
+        anchors = soup.find_all("a", href=True)
+    return [urldefrag(urljoin(page_url, anchor["href"]))[0] for anchor in anchors]
+
+
+class QuotesCrawler:
+    """Crawls a site breadth-first and appends quote records to a JSONL file.
+
+    The frontier holds the URLs still to visit and the seen-set makes sure
+    each URL is queued only once (and each quote written only once). Every
+    CHECKPOINT_EVERY pages the frontier, seen-sets and output size are
+    saved, so an interrupted crawl picks up where it left off.
+    """
+
+    def __init__(self, start_url, output_path, checkpoint_path, fetcher, follow="pagination",
+                 seen_kind=HashedSet.kind, capacity=1_000_000, max_pages=None):
+        self.start_url = start_url
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.fetcher = fetcher
+        self.follow = follow
+        self.max_pages = max_pages
+        self.allowed_host = urlsplit(start_url).netloc # Stay on the same website
+        self.frontier = deque([start_url])
+        self.seen_urls = new_seen_set(seen_kind, capacity)
+        self.seen_urls.add(start_url)
+        self.seen_quotes = new_seen_set(seen_kind, capacity)
+        self.pages = 0
+        self.quotes = 0
+        self.output_bytes = 0
+
+    def load_checkpoint(self):
+        """Restores a saved crawl. Returns True if there was one to resume.
+
+        Raises ValueError if the checkpoint belongs to a crawl of another start URL.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state.get("start_url") != self.start_url:
+            raise ValueError(f"{self.checkpoint_path} is a checkpoint of a crawl of {state.get('start_url')}, "
+                             f"not {self.start_url}; use --fresh or another --checkpoint file")
+        self.frontier = deque(state["frontier"])
+        urls_path, quotes_path = seen_set_paths(self.checkpoint_path)
+        self.seen_urls = load_seen_set(state["seen_urls"], urls_path)
+        self.seen_quotes = load_seen_set(state["seen_quotes"], quotes_path)
+        self.pages = state["pages"]
+        self.quotes = state["quotes"]
+        self.output_bytes = state["output_bytes"]
+        # Drop records written after the checkpoint; those pages get crawled again
+        if os.path.exists(self.output_path):
+            with open(self.output_path, "r+b") as output_file:
+                output_file.truncate(self.output_bytes)
+        return True
+
+    def save_checkpoint(self):
+        """Writes the crawl state atomically (temporary file, then rename).
+
+        The seen-sets' side files are written first; the checkpoint records
+        how much of them it counts on, so a crash in between loses nothing.
+        """
+        if not self.checkpoint_path:
+            return
+        urls_path, quotes_path = seen_set_paths(self.checkpoint_path)
+        state = {
+            "start_url": self.start_url,
+            "frontier": list(self.frontier),
+            "seen_urls": self.seen_urls.save(urls_path),
+            "seen_quotes": self.seen_quotes.save(quotes_path),
+            "pages": self.pages,
+            "quotes": self.quotes,
+            "output_bytes": self.output_bytes,
+        }
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as temporary_file:
+            json.dump(state, temporary_file)
+        os.replace(temporary_file.name, self.checkpoint_path)
+
+    def _enqueue(self, url):
+        if urlsplit(url).netloc != self.allowed_host or url in self.seen_urls:
+            return
+        self.seen_urls.add(url)
+        self.frontier.append(url)
+
+    def crawl(self):
+        """Runs until the frontier is empty or max_pages pages were crawled.
+
+        A URL leaves the frontier only once its page is fully processed, so a
+        crawl interrupted while waiting for, fetching or parsing a page visits
+        that page again on resume (its quotes are already in the seen-set).
+        """
+        with open(self.output_path, "ab") as output_file:
+            try:
+                while self.frontier and (self.max_pages is None or self.pages < self.max_pages):
+                    url = self.frontier[0]
+                    if not self.fetcher.allowed(url):
+                        print(f"Skipping {url} (disallowed by robots.txt)")
+                        self.frontier.popleft()
+                        continue
+                    html = self.fetcher.fetch(url)
+                    if html is not None:
+                        soup = BeautifulSoup(html, "html.parser")
+                        new_quotes = 0
+                        for record in extract_quotes(soup):
+                            key = record["author"] + "\0" + record["text"]
+                            if key in self.seen_quotes:
+                                continue
+                            self.seen_quotes.add(key)
+                            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                            output_file.write(line)
+                            self.output_bytes += len(line)
+                            new_quotes += 1
+                        self.quotes += new_quotes
+                        for link in extract_links(soup, url, self.follow):
+                            self._enqueue(link)
+                    self.frontier.popleft()
+                    self.pages += 1
+                    if html is not None:
+                        print(f"Page {self.pages}: {url} ({new_quotes} new quotes, {len(self.frontier)} queued)")
+                    if self.pages % CHECKPOINT_EVERY == 0:
+                        output_file.flush()
+                        self.save_checkpoint()
+            finally:
+                # Also runs on Ctrl+C, so the crawl can be resumed later
+                output_file.flush()
+                self.save_checkpoint()
+
+
+# ---------------------------------------------------------------------------
+# A tiny copy of quotes.toscrape.com for testing without the internet
+# ---------------------------------------------------------------------------
+
+def build_fixture_site(directory, pages=10, quotes_per_page=10):
+    """Writes a static look-alike of quotes.toscrape.com into directory.
+
+    It has numbered pages with "Next" buttons, tag pages that repeat quotes
+    from the numbered pages, and a /private/ page that robots.txt forbids.
+    Returns the number of distinct quotes on the site.
+    """
+    def write(path, html):
+        full_path = os.path.join(directory, path.strip("/"), "index.html")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as page_file:
+            page_file.write(f"<html><body>{html}</body></html>")
+
+    def quote_html(number):
+        tags = "".join(f'<a class="tag" href="/tag/{tag}/">{tag}</a>' for tag in (f"t{number % 7}", f"t{number % 5}"))
+        return (f'<div class="quote"><span class="text">“Quote number {number}.”</span>'
+                f'<span>by <small class="author">Author {number % 13}</small></span>'
+                f'<div class="tags">{tags}</div></div>')
+
+    for page in range(1, pages + 1):
+        first = (page - 1) * quotes_per_page
+        body = "".join(quote_html(number) for number in range(first, first + quotes_per_page))
+        if page < pages:
+            body += f'<ul class="pager"><li class="next"><a href="/page/{page + 1}/">Next</a></li></ul>'
+        if page == 1:
+            body += '<a href="/private/">Secret</a>'
+        write("/" if page == 1 else f"/page/{page}/", body)
+    total = pages * quotes_per_page
+    for tag in {f"t{n % 7}" for n in range(total)} | {f"t{n % 5}" for n in range(total)}:
+        numbers = [n for n in range(total) if tag in (f"t{n % 7}", f"t{n % 5}")][:quotes_per_page]
+        write(f"/tag/{tag}/", "".join(quote_html(number) for number in numbers))
+    write("/private/", quote_html(-1))
+    with open(os.path.join(directory, "robots.txt"), "w") as robots_file:
+        robots_file.write("User-agent: *\nDisallow: /private/\n")
+    return total
+
+
+class QuietRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files without logging every request, to keep the output readable."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixture_site(directory, port=FIXTURE_PORT):
+    """Serves a directory on a local port (0 picks a free one) in a background thread."""
+    handler = partial(QuietRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl quotes.toscrape.com (or a local copy) into a JSONL file.")
+    parser.add_argument("--url", default=TARGET_URL, help="Page to start from")
+    parser.add_argument("--output", default="quotes.jsonl", help="JSONL file the quotes are appended to")
+    parser.add_argument("--checkpoint", default="quotes.checkpoint.json",
+                        help="Crawl state file, used to resume after an interruption")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--follow", choices=("pagination", "all"), default="pagination",
+                        help="Follow only 'Next' buttons, or every link on the site")
+    parser.add_argument("--seen-set", choices=tuple(SEEN_SET_TYPES), default=HashedSet.kind,
+                        help="How visited URLs are remembered (bloom: fixed memory for huge crawls)")
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="Expected URL count for --seen-set bloom")
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="Seconds between requests to one host")
+    parser.add_argument("--max-pages", type=int, help="Stop after this many pages in this run (resume later)")
+    parser.add_argument("--fixture", type=int, metavar="PAGES",
+                        help="Crawl a local fixture site with PAGES pages instead of the real one")
+    parser.add_argument("--fixture-port", type=int, default=FIXTURE_PORT, help="Port of the fixture site")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.fixture:
+        site_dir = tempfile.mkdtemp(prefix="quotes-fixture-")
+        expected = build_fixture_site(site_dir, args.fixture)
+        server, url = serve_fixture_site(site_dir, args.fixture_port)
+        print(f"Serving a fixture site with {expected} quotes at {url}")
+
+    if args.fresh:
+        for path in (args.output, args.checkpoint, *seen_set_paths(args.checkpoint)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    crawler = QuotesCrawler(url, args.output, args.checkpoint, PoliteFetcher(args.delay),
+                            follow=args.follow, seen_kind=args.seen_set, capacity=args.capacity,
+                            max_pages=args.max_pages)
+    try:
+        resumed = crawler.load_checkpoint()
+    except ValueError as e:
+        print(f"Error: {e}")
+        if server:
+            server.shutdown()
+        sys.exit(1)
+    if resumed:
+        print(f"Resuming: {crawler.pages} pages done, {len(crawler.frontier)} queued")
+        if args.max_pages:
+            crawler.max_pages = crawler.pages + args.max_pages
+    print(f"Starting the crawler for: {url}")
+    print("-" * 40)
+
+    try:
+        crawler.crawl()
+    except KeyboardInterrupt:
+        print("\nInterrupted! Run the same command again to resume.")
+    finally:
+        if server:
+            server.shutdown()
+
+    print("-" * 40)
+    print(f"Crawled {crawler.pages} pages and saved {crawler.quotes} quotes to {args.output}")
+    if not crawler.frontier:
+        print("Crawl complete!")
+
+
+if __name__ == "__main__":
+    main()
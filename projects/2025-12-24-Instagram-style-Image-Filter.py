@@ -1,10 +1,190 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk, ImageFilter, ImageEnhance
+import numpy as np
 import os
+import sys
+import threading
+import time
+
+# How often background jobs are polled from the Tk main loop (about one frame)
+JOB_POLL_MS = 16
+
+# Memory cap for cached filter results (a 12MP RGB image is about 36 MB)
+FILTER_CACHE_BYTES = 256 * 1024 * 1024
+
+# Rows converted per step by the vectorized sepia filter. Bounds the float64
+# temporaries to a few MB even for large phone photos.
+SEPIA_STRIP_ROWS = 256
+
+
+class JobCancelled(Exception):
+    """Raised inside a background job once a newer job has superseded it."""
+
+
+def check_cancelled(cancel_event):
+    """Stops the current job early if cancel_event has been set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled()
+
+
+def apply_sepia_vectorized(image, cancel_event=None):
+    """Applies the sepia tone filter with NumPy, a strip of rows at a time.
+
+    Uses the same float64 formulas, in the same order, as the per-pixel
+    loop, followed by the same truncation and cap at 255, so the output is
+    bit-identical to _apply_sepia_filter_loop. If cancel_event is set, stops
+    at the next strip by raising JobCancelled.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    pixels = np.asarray(image)
+    sepia = np.empty_like(pixels)
+    for start in range(0, pixels.shape[0], SEPIA_STRIP_ROWS):
+        check_cancelled(cancel_event)
+        strip = pixels[start:start + SEPIA_STRIP_ROWS].astype(np.float64)
+        r, g, b = strip[..., 0], strip[..., 1], strip[..., 2]
+        out = sepia[start:start + SEPIA_STRIP_ROWS]
+        out[..., 0] = np.minimum(0.393 * r + 0.769 * g + 0.189 * b, 255)
+        out[..., 1] = np.minimum(0.349 * r + 0.686 * g + 0.168 * b, 255)
+        out[..., 2] = np.minimum(0.272 * r + 0.534 * g + 0.131 * b, 255)
+    return Image.fromarray(sepia, "RGB")
+
+
+def _apply_sepia_filter_loop(image):
+    """Reference per-pixel sepia implementation, kept for benchmarking."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    sepia_image = image.copy()
+    width, height = sepia_image.size
+    pixels = sepia_image.load()
+    for y in range(height):
+        for x in range(width):
+            r, g, b = pixels[x, y]
+            tr = int(0.393 * r + 0.769 * g + 0.189 * b)
+            tg = int(0.349 * r + 0.686 * g + 0.168 * b)
+            tb = int(0.272 * r + 0.534 * g + 0.131 * b)
+            pixels[x, y] = (min(255, tr), min(255, tg), min(255, tb))
+    return sepia_image
+
+
+# Every filter offered in the GUI, each backed by a vectorized implementation
+# (PIL's C routines or NumPy). "None" returns an unmodified copy.
+FILTERS = {
+    "None": lambda image: image.copy(),
+    "Grayscale": lambda image: image.convert("L").convert("RGB"), # Convert to L (grayscale) then back to RGB
+    "Sepia": apply_sepia_vectorized,
+    "Blur": lambda image: image.filter(ImageFilter.BLUR),
+    "Sharpen": lambda image: image.filter(ImageFilter.SHARPEN),
+    "Emboss": lambda image: image.filter(ImageFilter.EMBOSS),
+    "Lighten (Brightness +20%)": lambda image: ImageEnhance.Brightness(image).enhance(1.2), # 20% brighter
+    "Darken (Brightness -20%)": lambda image: ImageEnhance.Brightness(image).enhance(0.8), # 20% darker
+    "More Contrast (+20%)": lambda image: ImageEnhance.Contrast(image).enhance(1.2), # 20% more contrast
+    "Less Contrast (-20%)": lambda image: ImageEnhance.Contrast(image).enhance(0.8), # 20% less contrast
+}
+
+
+# Filters that work in strips and accept a cancel_event, so a superseded
+# full-resolution render stops part way. The others are single PIL calls.
+CANCELLABLE_FILTERS = {
+    "Sepia": apply_sepia_vectorized,
+}
+
+
+def apply_named_filter(image, filter_name, cancel_event=None):
+    """Applies the filter called filter_name and returns a new image.
+    Raises JobCancelled if cancel_event is set before or during the filter."""
+    if filter_name not in FILTERS:
+        raise ValueError(f"Unknown filter: {filter_name}")
+    check_cancelled(cancel_event)
+    if filter_name in CANCELLABLE_FILTERS:
+        return CANCELLABLE_FILTERS[filter_name](image, cancel_event)
+    return FILTERS[filter_name](image)
+
+
+class ImageLRUCache:
+    """Least-recently-used cache of PIL images, bounded by their pixel bytes.
+    Only used from the Tk thread, so it needs no locking."""
+
+    def __init__(self, max_bytes=FILTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def image_bytes(image):
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key):
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.images.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        size = self.image_bytes(image)
+        if size > self.max_bytes:
+            return # Would evict everything else; not worth caching
+        if key in self.images:
+            self.total_bytes -= self.image_bytes(self.images.pop(key))
+        self.images[key] = image
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.images.popitem(last=False)
+            self.total_bytes -= self.image_bytes(evicted)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def load_image_with_proxy(file_path, proxy_size):
+    """Loads an image as RGB and builds its downscaled preview proxy.
+    Runs on a background worker, since decoding a large photo is slow."""
+    # Ensure RGB mode for consistency across filters
+    image = Image.open(file_path).convert("RGB")
+    proxy = image.copy()
+    proxy.thumbnail(proxy_size, Image.Resampling.LANCZOS)
+    return image, proxy
+
+
+def image_identity(file_path):
+    """Identifies an image file by path, modification time and size, so
+    reopening an unchanged file reuses its cached filter results."""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+
+def benchmark_sepia(width=1200, height=900):
+    """Times the per-pixel loop against the vectorized sepia filter and
+    checks that both produce identical pixels."""
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8), "RGB")
+
+    start = time.perf_counter()
+    reference = _apply_sepia_filter_loop(image)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = apply_sepia_vectorized(image)
+    vectorized_seconds = time.perf_counter() - start
+
+    identical = np.array_equal(np.asarray(reference), np.asarray(vectorized))
+    print(f"Sepia on a {width}x{height} image:")
+    print(f"  per-pixel loop: {loop_seconds:.3f} s")
+    print(f"  vectorized:     {vectorized_seconds:.3f} s ({loop_seconds / vectorized_seconds:.0f}x faster)")
+    print(f"  bit-identical:  {identical}")
 
 class InstagramFilterApp:
-    def __init__(self, master):
+    def __init__(self, master, debug=False):
         self.master = master
         master.title("Instagram-style Image Filter (Fresher Project)")
         master.geometry("1200x800") # A bit larger window for images
@@ -12,11 +192,24 @@ class InstagramFilterApp:
         self.original_image_path = None
         self.original_pil_image = None
         self.display_original_image = None # For Tkinter PhotoImage reference
-        self.filtered_pil_image = None
+        self.filtered_pil_image = None # Full-resolution result, used when saving
         self.display_filtered_image = None # For Tkinter PhotoImage reference
+        self.proxy_pil_image = None # Downscaled original used for instant previews
+        self.image_key = None # Identity of the open image, used in cache keys
+
+        # Filtered previews and full-resolution results, keyed by
+        # (image identity, filter name); switching back to a filter is instant
+        self.preview_cache = ImageLRUCache()
+        self.render_cache = ImageLRUCache()
 
         self.MAX_DISPLAY_SIZE = (500, 500) # Max size for images displayed in GUI
 
+        # Slow work (decoding, full-resolution filtering) runs on these workers;
+        # results are picked up by polling from the Tk main loop.
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.jobs = {} # Job name -> (latest Future, its cancel Event); older ones are superseded
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # --- GUI Layout ---
         self.main_frame = ttk.Frame(master, padding="10")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -67,28 +260,98 @@ class InstagramFilterApp:
         ]
         self.filter_menu = ttk.OptionMenu(self.control_frame, self.filter_var, *self.filter_options)
         self.filter_menu.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        # Live preview: picking a filter applies it to the proxy right away
+        self.filter_var.trace_add("write", lambda *args: self._on_filter_selected())
+
+        # Status bar, plus cache statistics in debug mode
+        self.debug_var = tk.StringVar(master, value="")
+        if debug:
+            ttk.Label(self.main_frame, textvariable=self.debug_var, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_var = tk.StringVar(master, value="")
+        ttk.Label(self.main_frame, textvariable=self.status_var, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X)
+
+    def _submit_job(self, name, on_done, on_error, func, *args, cancellable=False):
+        """Runs func(*args) on a worker and calls on_done(result) or
+        on_error(exception) on the Tk thread. Submitting a new job with the
+        same name supersedes the previous one: it is cancelled if it has not
+        started yet, and its result is discarded otherwise. A cancellable
+        job also gets a cancel_event keyword argument, which is set when it
+        is superseded so that it can stop early instead of running to the end."""
+        self._cancel_job(name)
+        cancel_event = threading.Event()
+        if cancellable:
+            future = self.executor.submit(func, *args, cancel_event=cancel_event)
+        else:
+            future = self.executor.submit(func, *args)
+        self.jobs[name] = (future, cancel_event)
+        self.master.after(JOB_POLL_MS, self._poll_job, name, future, on_done, on_error)
+
+    def _cancel_job(self, name):
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            future, cancel_event = job
+            future.cancel()
+            cancel_event.set()
+
+    def _poll_job(self, name, future, on_done, on_error):
+        job = self.jobs.get(name)
+        if job is None or job[0] is not future:
+            return # Superseded or cancelled
+        if not future.done():
+            self.master.after(JOB_POLL_MS, self._poll_job, name, future, on_done, on_error)
+            return
+        del self.jobs[name]
+        try:
+            result = future.result()
+        except Exception as e:
+            on_error(e)
+            return
+        on_done(result)
+
+    def on_close(self):
+        for name in list(self.jobs):
+            self._cancel_job(name)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
 
     def open_image(self):
         file_path = filedialog.askopenfilename(
             filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
         )
         if file_path:
-            try:
-                self.original_image_path = file_path
-                # Ensure RGB mode for consistency across filters
-                self.original_pil_image = Image.open(file_path).convert("RGB") 
-                self.filtered_pil_image = None # Clear previous filtered image
-
-                self.display_image(self.original_pil_image, self.original_image_label)
-                self.filtered_image_label.config(image='') # Clear filtered image display
-                self.display_filtered_image = None
-
-                self.apply_button.config(state=tk.NORMAL)
-                self.save_button.config(state=tk.DISABLED) # Cannot save until filtered
-                self.filter_var.set("None") # Reset filter selection
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to open image: {e}")
-                self.reset_app()
+            # Drop the previous image and any render of it
+            self._cancel_job("render")
+            self.proxy_pil_image = None
+            self.filter_var.set("None") # Reset filter selection
+            self.apply_button.config(state=tk.DISABLED)
+            self.save_button.config(state=tk.DISABLED)
+            self.status_var.set(f"Loading {os.path.basename(file_path)}...")
+            # Decode off the main thread; _on_image_loaded finishes the job
+            self._submit_job("load", lambda images: self._on_image_loaded(file_path, *images),
+                             self._on_image_load_failed,
+                             load_image_with_proxy, file_path, self.MAX_DISPLAY_SIZE)
+
+    def _on_image_loaded(self, file_path, image, proxy):
+        try:
+            self.image_key = image_identity(file_path)
+        except OSError:
+            self.image_key = (file_path, id(image)) # File vanished; cache for this session only
+        self.original_image_path = file_path
+        self.original_pil_image = image
+        self.proxy_pil_image = proxy
+        self.filtered_pil_image = None # Clear previous filtered image
+
+        self.display_image(self.proxy_pil_image, self.original_image_label)
+        self.filtered_image_label.config(image='') # Clear filtered image display
+        self.display_filtered_image = None
+
+        self.apply_button.config(state=tk.NORMAL)
+        self.save_button.config(state=tk.DISABLED) # Cannot save until filtered
+        self.status_var.set(f"Loaded {os.path.basename(file_path)} ({image.width}x{image.height})")
+
+    def _on_image_load_failed(self, error):
+        messagebox.showerror("Error", f"Failed to open image: {error}")
+        self.reset_app()
 
     def display_image(self, pil_image, label_widget):
         """Displays a PIL image in a Tkinter Label, resizing it for fit."""
@@ -96,8 +359,11 @@ class InstagramFilterApp:
             label_widget.config(image='')
             return
 
-        display_image = pil_image.copy()
-        display_image.thumbnail(self.MAX_DISPLAY_SIZE, Image.Resampling.LANCZOS)
+        # Proxies and previews already fit, so only larger images are resized
+        display_image = pil_image
+        if pil_image.width > self.MAX_DISPLAY_SIZE[0] or pil_image.height > self.MAX_DISPLAY_SIZE[1]:
+            display_image = pil_image.copy()
+            display_image.thumbnail(self.MAX_DISPLAY_SIZE, Image.Resampling.LANCZOS)
         
         # Convert to PhotoImage and store a reference to prevent garbage collection
         tk_image = ImageTk.PhotoImage(display_image)
@@ -116,80 +382,76 @@ class InstagramFilterApp:
             return
 
         selected_filter = self.filter_var.get()
-        if selected_filter == "None":
-            self.filtered_pil_image = self.original_pil_image.copy()
-            self.display_image(self.filtered_pil_image, self.filtered_image_label)
-            self.save_button.config(state=tk.NORMAL)
-            return
-
+        cache_key = (self.image_key, selected_filter)
         try:
-            # Create a copy to apply filters, keeping original intact
-            current_image = self.original_pil_image.copy()
-
-            if selected_filter == "Grayscale":
-                self.filtered_pil_image = current_image.convert("L").convert("RGB") # Convert to L (grayscale) then back to RGB
-            elif selected_filter == "Sepia":
-                self.filtered_pil_image = self._apply_sepia_filter(current_image)
-            elif selected_filter == "Blur":
-                self.filtered_pil_image = current_image.filter(ImageFilter.BLUR)
-            elif selected_filter == "Sharpen":
-                self.filtered_pil_image = current_image.filter(ImageFilter.SHARPEN)
-            elif selected_filter == "Emboss":
-                self.filtered_pil_image = current_image.filter(ImageFilter.EMBOSS)
-            elif selected_filter == "Lighten (Brightness +20%)":
-                enhancer = ImageEnhance.Brightness(current_image)
-                self.filtered_pil_image = enhancer.enhance(1.2) # 20% brighter
-            elif selected_filter == "Darken (Brightness -20%)":
-                enhancer = ImageEnhance.Brightness(current_image)
-                self.filtered_pil_image = enhancer.enhance(0.8) # 20% darker
-            elif selected_filter == "More Contrast (+20%)":
-                enhancer = ImageEnhance.Contrast(current_image)
-                self.filtered_pil_image = enhancer.enhance(1.2) # 20% more contrast
-            elif selected_filter == "Less Contrast (-20%)":
-                enhancer = ImageEnhance.Contrast(current_image)
-                self.filtered_pil_image = enhancer.enhance(0.8) # 20% less contrast
-            else:
-                self.filtered_pil_image = current_image.copy() # Fallback, should not happen
-
-            self.display_image(self.filtered_pil_image, self.filtered_image_label)
-            self.save_button.config(state=tk.NORMAL)
-
+            # Preview on the small proxy, which is fast enough for the main thread.
+            # Every filter returns a new image, keeping the original intact.
+            preview = self.preview_cache.get(cache_key)
+            if preview is None:
+                preview = apply_named_filter(self.proxy_pil_image, selected_filter)
+                self.preview_cache.put(cache_key, preview)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to apply filter: {e}")
+            self._cancel_job("render")
             self.filtered_pil_image = None
             self.display_image(None, self.filtered_image_label)
             self.save_button.config(state=tk.DISABLED)
+            return
 
-    def _apply_sepia_filter(self, image):
-        """Applies a sepia tone filter by direct pixel manipulation.
-        This approach demonstrates basic pixel-level image processing.
-        """
-        # Ensure image is in RGB mode for consistent pixel manipulation
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        # Make a modifiable copy to prevent altering the original image
-        sepia_image = image.copy()
-        
-        width, height = sepia_image.size
-        # Load pixel data for faster access during iteration
-        pixels = sepia_image.load() 
-
-        for y in range(height):
-            for x in range(width):
-                r, g, b = pixels[x, y]
+        self.display_image(preview, self.filtered_image_label)
+        self.save_button.config(state=tk.NORMAL)
 
-                # Sepia transformation formulas
-                # These are common matrix values for sepia conversion
-                tr = int(0.393 * r + 0.769 * g + 0.189 * b)
-                tg = int(0.349 * r + 0.686 * g + 0.168 * b)
-                tb = int(0.272 * r + 0.534 * g + 0.131 * b)
+        self.filtered_pil_image = self.render_cache.get(cache_key)
+        if self.filtered_pil_image is not None:
+            self._cancel_job("render")
+            self.status_var.set(f"{selected_filter}: full-resolution render ready (cached)")
+        else:
+            # Render the full-resolution result in the background for saving;
+            # this supersedes the render for any previously selected filter
+            self.status_var.set(f"Preview: {selected_filter} (rendering full resolution...)")
+            self._submit_job("render", lambda image: self._on_render_done(cache_key, image),
+                             self._on_render_failed,
+                             apply_named_filter, self.original_pil_image, selected_filter,
+                             cancellable=True)
+        self._update_debug_status()
+
+    def _on_filter_selected(self):
+        if self.proxy_pil_image is not None:
+            self.apply_filter()
+
+    def _on_render_done(self, cache_key, image):
+        self.render_cache.put(cache_key, image)
+        self.filtered_pil_image = image
+        self.status_var.set(f"{self.filter_var.get()}: full-resolution render ready")
+        self._update_debug_status()
+
+    def _update_debug_status(self):
+        parts = []
+        for name, cache in (("preview", self.preview_cache), ("full-res", self.render_cache)):
+            parts.append(f"{name} cache: {cache.hits}/{cache.hits + cache.misses} hits "
+                         f"({cache.hit_rate():.0%}), {len(cache.images)} images, "
+                         f"{cache.total_bytes / 2 ** 20:.1f} MB")
+        self.debug_var.set(" | ".join(parts))
+
+    def _on_render_failed(self, error):
+        self.filtered_pil_image = None
+        self.save_button.config(state=tk.DISABLED)
+        self.status_var.set(f"Full-resolution render failed: {error}")
 
-                # Cap values at 255 to ensure they stay within valid RGB range
-                pixels[x, y] = (min(255, tr), min(255, tg), min(255, tb))
-        return sepia_image
+    def _apply_sepia_filter(self, image):
+        """Applies a sepia tone filter (vectorized, see apply_sepia_vectorized)."""
+        return apply_sepia_vectorized(image)
 
     def save_image(self):
+        if "render" in self.jobs:
+            # The full-resolution render is still running; check again next frame
+            self.status_var.set("Finishing full-resolution render before saving...")
+            self.save_button.config(state=tk.DISABLED)
+            self.master.after(JOB_POLL_MS, self.save_image)
+            return
+        if self.filtered_pil_image is not None:
+            self.save_button.config(state=tk.NORMAL)
+
         if self.filtered_pil_image is None:
             messagebox.showwarning("Warning", "No filtered image to save!")
             return
@@ -216,8 +478,11 @@ class InstagramFilterApp:
 
     def reset_app(self):
         """Resets the application state, clearing images and disabling controls."""
+        self._cancel_job("render")
         self.original_image_path = None
         self.original_pil_image = None
+        self.proxy_pil_image = None
+        self.image_key = None
         self.filtered_pil_image = None
         
         self.display_image(None, self.original_image_label)
@@ -229,6 +494,10 @@ class InstagramFilterApp:
 
 
 if __name__ == "__main__":
+    if "--benchmark-sepia" in sys.argv:
+        benchmark_sepia()
+        sys.exit(0)
+
     root = tk.Tk()
-    app = InstagramFilterApp(root)
+    app = InstagramFilterApp(root, debug="--debug" in sys.argv)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,478 @@
+import argparse
+import contextlib
+import datetime
+import fcntl
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import currency_converter
+from bulk_currency_converter import BulkConversion, encode_currencies
+
+HEADER_FILE = "header.json"
+# flock target serializing writers against each other and against readers
+# opening the store (the header itself is replaced on every commit)
+LOCK_FILE = "lock"
+DATES_FILE = "dates.i4"  # int32 days since 1970-01-01, ascending
+RATES_FILE = "rates.f8"  # float64 rows of units per base, one column per currency; NaN = not quoted
+# Data files of generation N > 0 are dates.N.i4 and rates.N.f8
+DATA_FILE_RE = re.compile(r"^(dates|rates)(?:\.(\d+))?\.(i4|f8)$")
+
+
+def to_day(date) -> int:
+    """
+    Convert a date, datetime or 'YYYY-MM-DD' string to days since 1970-01-01.
+    """
+    return int(np.datetime64(date, "D").astype(np.int64))
+
+
+def to_days(dates) -> np.ndarray:
+    """
+    Vectorized to_day for an array-like of dates.
+    """
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _replace_file(path: str, data) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False, suffix=".tmp") as temporary_file:
+        temporary_file.write(data)
+        temporary_file.flush()
+        os.fsync(temporary_file.fileno())
+    os.replace(temporary_file.name, path)
+
+
+def _write_at(path: str, offset: int, data) -> None:
+    """
+    Write data at offset, drop anything after it and flush it to disk.
+    """
+    with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as data_file:
+        data_file.seek(offset)
+        data_file.write(data)
+        data_file.truncate()
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+
+def _data_files(generation: int) -> tuple:
+    """
+    Names of the dates and rates files of a store generation.
+    """
+    if generation == 0:
+        return DATES_FILE, RATES_FILE
+    return f"dates.{generation}.i4", f"rates.{generation}.f8"
+
+
+class RateHistory:
+    """
+    Columnar on-disk store of daily exchange rate snapshots.
+
+    Dates and a (date x currency) float64 matrix live in two raw files that
+    are appended to as snapshots arrive and memory-mapped for reads, so
+    years of history cost no load time and only the pages a query touches
+    are read. A lookup for date D uses the latest snapshot on or before D
+    (weekends and holidays reuse the previous quote), found by binary search.
+
+    The header is the commit record: it names the generation of the data
+    files, the currency columns and the number of rows, and every update
+    ends by atomically replacing it. Appends write past the committed rows
+    first; rewrites (backfills, new currencies) write a new generation of
+    files. A crash before the header is replaced leaves the previous state
+    intact, and the leftovers are dropped by the next update.
+
+    Readers only map the committed rows and never modify files. Updates
+    hold an exclusive lock, reload the header and clean up after any
+    crashed update before writing; opening the store takes a shared lock
+    so an update cannot delete the files it is about to map.
+    """
+
+    def __init__(self, directory: str, base: str = "USD"):
+        """
+        :raises ValueError: If the data files are shorter than the header records
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._dates = None
+        self._rates = None
+        with self._locked(fcntl.LOCK_SH):
+            found = self._load_header()
+            if found:
+                self._map()
+        if not found:
+            with self._locked(fcntl.LOCK_EX):
+                if not self._load_header():  # Another process may have created it meanwhile
+                    self.base = base
+                    self.currencies = []
+                    self.index = {}
+                    self._commit(0, 0)
+                self._map()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextlib.contextmanager
+    def _locked(self, operation: int):
+        with open(self._path(LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), operation)
+            yield
+
+    def _load_header(self) -> bool:
+        """
+        Read the committed state and check the data files hold it.
+
+        :return: False if the store has no header yet
+        :raises ValueError: If the data files are shorter than the header records
+        """
+        header_path = self._path(HEADER_FILE)
+        if not os.path.exists(header_path):
+            return False
+        with open(header_path) as header_file:
+            header = json.load(header_file)
+        self._unmap()
+        self.base = header["base"]
+        self.currencies = header["currencies"]
+        self.generation = header.get("generation", 0)
+        self.rows = header.get("rows")
+        if self.rows is None:  # Written before the header recorded rows
+            dates_path = self._path(_data_files(0)[0])
+            self.rows = os.path.getsize(dates_path) // 4 if os.path.exists(dates_path) else 0
+        self.index = {code: position for position, code in enumerate(self.currencies)}
+        for path, size in zip(self._data_paths(), self._committed_sizes()):
+            actual = os.path.getsize(path) if os.path.exists(path) else 0
+            if actual < size:
+                raise ValueError(f"Rate history in {self.directory} is damaged: {os.path.basename(path)} "
+                                 f"has {actual} bytes, the header records {size}")
+        return True
+
+    def _committed_sizes(self) -> tuple:
+        return self.rows * 4, self.rows * len(self.currencies) * 8
+
+    @contextlib.contextmanager
+    def _updating(self):
+        """
+        Hold the writer lock for an update, starting from the latest
+        committed state with any crashed update's leftovers removed.
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._load_header()
+            self._recover()
+            yield
+            self._map()  # Map before unlocking, while the files cannot be replaced
+
+    def _data_paths(self, generation: int = None) -> tuple:
+        return tuple(self._path(name) for name in _data_files(self.generation if generation is None else generation))
+
+    def _commit(self, generation: int, rows: int, currencies: list = None) -> None:
+        """
+        Atomically switch the store to a generation, row count and column list.
+        """
+        currencies = self.currencies if currencies is None else currencies
+        header = {"base": self.base, "currencies": currencies, "generation": generation, "rows": rows}
+        _replace_file(self._path(HEADER_FILE), json.dumps(header).encode("utf-8"))
+        old_generation = getattr(self, "generation", generation)
+        self.generation, self.rows, self.currencies = generation, rows, currencies
+        if old_generation != generation:
+            self._remove_stale_files()
+
+    def _recover(self) -> None:
+        """
+        Cut uncommitted appends off the data files and delete files of
+        other generations. Only called with the writer lock held.
+        """
+        for path, size in zip(self._data_paths(), self._committed_sizes()):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                _write_at(path, size, b"")
+        self._remove_stale_files()
+
+    def _remove_stale_files(self) -> None:
+        current = set(_data_files(self.generation))
+        for name in os.listdir(self.directory):
+            if DATA_FILE_RE.match(name) and name not in current:
+                os.remove(self._path(name))
+
+    def _map(self) -> None:
+        """
+        Memory-map the dates and rates, or reuse the existing maps.
+        """
+        if self._dates is not None:
+            return
+        rows = self.rows
+        if rows == 0 or not self.currencies:
+            self._dates = np.empty(0, dtype=np.int32)
+            self._rates = np.empty((0, len(self.currencies)), dtype=np.float64)
+            return
+        dates_path, rates_path = self._data_paths()
+        self._dates = np.memmap(dates_path, dtype=np.int32, mode="r", shape=(rows,))
+        self._rates = np.memmap(rates_path, dtype=np.float64, mode="r", shape=(rows, len(self.currencies)))
+
+    def _unmap(self) -> None:
+        self._dates = None
+        self._rates = None
+
+    @property
+    def dates(self) -> np.ndarray:
+        self._map()
+        return self._dates
+
+    @property
+    def rates(self) -> np.ndarray:
+        self._map()
+        return self._rates
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _row(self, rates: dict) -> np.ndarray:
+        row = np.full(len(self.currencies), np.nan)
+        for code, rate in rates.items():
+            row[self.index[code]] = rate
+        return row
+
+    def _rewrite(self, days: np.ndarray, rows: np.ndarray, currencies: list = None) -> None:
+        """
+        Write complete data files as the next generation, then commit them.
+        """
+        generation = self.generation + 1
+        dates_path, rates_path = self._data_paths(generation)
+        _write_at(dates_path, 0, days.astype(np.int32).tobytes())
+        _write_at(rates_path, 0, np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+        self._unmap()
+        self._commit(generation, len(days), currencies)
+
+    def _add_currencies(self, codes) -> None:
+        """
+        Widen the matrix with new currency columns (rewrites the data files).
+        """
+        new = [code for code in dict.fromkeys(codes) if code not in self.index]
+        if not new:
+            return
+        old = np.array(self.rates)
+        widened = np.full((len(old), len(self.currencies) + len(new)), np.nan)
+        widened[:, :old.shape[1]] = old
+        self._rewrite(np.array(self.dates), widened, self.currencies + new)
+        self.index = {code: position for position, code in enumerate(self.currencies)}
+
+    def add_snapshot(self, date, rates: dict) -> None:
+        """
+        Store the rates of one day, as units per self.base.
+
+        Snapshots arriving in date order are appended; a snapshot for the
+        latest day replaces it, and an older day (a backfill) is inserted
+        by rewriting the files.
+        """
+        self.add_snapshots([(date, rates)])
+
+    def add_snapshots(self, snapshots) -> None:
+        """
+        Store many (date, rates) snapshots at once.
+        """
+        snapshots = sorted(((to_day(date), rates) for date, rates in snapshots), key=lambda item: item[0])
+        if not snapshots:
+            return
+        with self._updating():
+            self._store(snapshots)
+
+    def _store(self, snapshots: list) -> None:
+        """
+        Write sorted (day, rates) snapshots; the writer lock must be held.
+        """
+        self._add_currencies([code for _, rates in snapshots for code in rates])
+        days = np.array([day for day, _ in snapshots], dtype=np.int32)
+        rows = np.array([self._row(rates) for _, rates in snapshots])
+        # Keep the last snapshot of each day
+        last = np.append(days[1:] != days[:-1], True)
+        days, rows = days[last], rows[last]
+
+        existing = self.dates
+        if len(existing) == 0 or days[0] > existing[-1]:
+            # Write past the committed rows; they count only once the header says so
+            self._unmap()
+            dates_path, rates_path = self._data_paths()
+            _write_at(dates_path, self.rows * 4, days.tobytes())
+            _write_at(rates_path, self.rows * len(self.currencies) * 8, rows.tobytes())
+            self._commit(self.generation, self.rows + len(days))
+            return
+
+        all_days = np.concatenate([existing, days])
+        all_rows = np.concatenate([np.array(self.rates), rows])
+        order = np.argsort(all_days, kind="stable")
+        all_days, all_rows = all_days[order], all_rows[order]
+        last = np.append(all_days[1:] != all_days[:-1], True)
+        self._rewrite(all_days[last], all_rows[last])
+
+    def _rows_for(self, days: np.ndarray) -> np.ndarray:
+        """
+        Index of the latest snapshot on or before each day; -1 before the first one.
+        """
+        return np.searchsorted(self.dates, days, side="right") - 1
+
+    def rates_on(self, date) -> dict:
+        """
+        Rates in force on a date.
+
+        :raises ValueError: If the date precedes the stored history
+        """
+        row = int(self._rows_for(np.array([to_day(date)]))[0])
+        if row < 0:
+            raise ValueError(f"No rates stored on or before {date}")
+        values = self.rates[row]
+        return {code: float(values[i]) for i, code in enumerate(self.currencies) if not np.isnan(values[i])}
+
+    def convert(self, amount: float, from_currency: str, to_currency: str, date) -> float:
+        """
+        Convert an amount at the rates in force on a date.
+
+        :raises ValueError: If a currency was not quoted then or the date precedes the history
+        """
+        result = self.convert_many([amount], [from_currency], [to_currency], [date])
+        if not result.valid[0]:
+            raise ValueError(f"No {from_currency}/{to_currency} rate on or before {date}")
+        return float(result.converted[0])
+
+    def convert_many(self, amounts, from_currencies, to_currencies, dates) -> BulkConversion:
+        """
+        Convert many dated amounts in one vectorized pass.
+
+        Rows whose date precedes the history or whose currencies are unknown
+        (or were not quoted then) are NaN and marked invalid.
+
+        :return: BulkConversion(converted, valid)
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        rows = self._rows_for(to_days(dates))
+        from_indices = encode_currencies(from_currencies, self.index)
+        to_indices = encode_currencies(to_currencies, self.index)
+        valid = (rows >= 0) & (from_indices >= 0) & (to_indices >= 0)
+        rates = self.rates
+        if len(rates) == 0:
+            return BulkConversion(np.full(len(amounts), np.nan), np.zeros(len(amounts), dtype=bool))
+        rows, from_indices, to_indices = (np.where(valid, indices, 0) for indices in (rows, from_indices, to_indices))
+        converted = amounts / rates[rows, from_indices]
+        converted *= rates[rows, to_indices]
+        valid &= ~np.isnan(converted)
+        converted[~valid] = np.nan
+        return BulkConversion(converted, valid)
+
+    def series(self, currency: str, start, end, quote: str = None) -> tuple:
+        """
+        Rates of a currency between two dates, inclusive.
+
+        :param quote: Express the series in units of currency per one quote
+                      currency (default: per base currency)
+        :return: (datetime64[D] dates, float64 rates)
+        """
+        lo = int(np.searchsorted(self.dates, to_day(start), side="left"))
+        hi = int(np.searchsorted(self.dates, to_day(end), side="right"))
+        column = self.rates[lo:hi, self.index[currency]]
+        if quote is not None:
+            column = column / self.rates[lo:hi, self.index[quote]]
+        return np.asarray(self.dates[lo:hi]).astype("datetime64[D]"), np.asarray(column)
+
+
+def generate_history(history: RateHistory, years: int, currencies: int = 30, seed: int = 0) -> None:
+    """
+    Fill a store with synthetic daily random-walk rates (weekdays only).
+    """
+    rng = np.random.default_rng(seed)
+    codes = ["USD"] + [f"C{i:02d}" for i in range(1, currencies)]
+    start = np.datetime64("2000-01-03")
+    days = np.arange(start, start + np.timedelta64(365 * years, "D"))
+    days = days[np.is_busday(days)]
+    walk = np.exp(np.cumsum(rng.normal(0, 0.004, size=(len(days), currencies)), axis=0))
+    levels = rng.uniform(0.5, 150, size=currencies)
+    levels[0] = 1.0
+    walk[:, 0] = 1.0
+    values = walk * levels
+    history.add_snapshots((day, dict(zip(codes, row))) for day, row in zip(days.tolist(), values.tolist()))
+
+
+def benchmark(directory: str, years: int, lookups: int, seed: int = 0) -> None:
+    """
+    Build a synthetic history and time dated conversions against it.
+    """
+    history = RateHistory(directory)
+    start = time.perf_counter()
+    generate_history(history, years)
+    ingest = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in history._data_paths())
+    print(f"Ingested {len(history):,} daily snapshots x {len(history.currencies)} currencies "
+          f"({size / 2 ** 20:.1f} MiB) in {ingest:.2f} s")
+
+    # Reopen so every read goes through a fresh memory map
+    history = RateHistory(directory)
+    rng = np.random.default_rng(seed)
+    codes = np.array(history.currencies)
+    first, last = int(history.dates[0]), int(history.dates[-1])
+    dates = rng.integers(first, last + 1, size=lookups).astype("datetime64[D]")
+    from_codes, to_codes = rng.choice(codes, size=lookups), rng.choice(codes, size=lookups)
+    amounts = rng.uniform(1, 10_000, size=lookups)
+
+    start = time.perf_counter()
+    result = history.convert_many(amounts, from_codes, to_codes, dates)
+    elapsed = time.perf_counter() - start
+    print(f"Converted {lookups:,} dated amounts in {elapsed:.3f} s ({lookups / elapsed:,.0f} lookups/second)")
+
+    # Cross-check a sample against a linear scan of the snapshots
+    mismatches = 0
+    for i in rng.choice(lookups, size=200, replace=False):
+        day = to_day(dates[i])
+        row = max(j for j, d in enumerate(history.dates.tolist()) if d <= day)
+        rates = dict(zip(history.currencies, history.rates[row].tolist()))
+        expected = currency_converter.convert_currency(amounts[i], from_codes[i], to_codes[i], rates)
+        mismatches += expected != result.converted[i]
+    print(f"Mismatches against a linear scan on a 200-lookup sample: {mismatches}")
+
+
+def main():
+    """
+    Main function to record, query or benchmark the historical rate store.
+    """
+    parser = argparse.ArgumentParser(description="Historical exchange rate store.")
+    parser.add_argument("--store", default=os.path.join(os.path.dirname(currency_converter.DEFAULT_CACHE_PATH), "history"),
+                        help="Store directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Fetch today's rates and add them to the store")
+    record_parser.add_argument("--api-url", default=currency_converter.DEFAULT_API_URL, help="Exchange rate API URL")
+    record_parser.add_argument("--api-key", default="your_api_key_here", help="API key")
+
+    convert_parser = subparsers.add_parser("convert", help="Convert an amount at a past date's rates")
+    convert_parser.add_argument("amount", type=float)
+    convert_parser.add_argument("from_currency")
+    convert_parser.add_argument("to_currency")
+    convert_parser.add_argument("date", help="YYYY-MM-DD")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Time dated lookups on synthetic history")
+    benchmark_parser.add_argument("--years", type=int, default=20, help="Years of daily history (default: 20)")
+    benchmark_parser.add_argument("--lookups", type=int, default=5_000_000, help="Dated lookups (default: 5M)")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark(tempfile.mkdtemp(prefix="rate-history-"), args.years, args.lookups)
+        return
+
+    try:
+        history = RateHistory(args.store)
+        if args.command == "record":
+            rates, base = currency_converter.fetch_rate_snapshot(args.api_url, args.api_key)
+            if base is not None and base != history.base:
+                # Store the snapshot per the store's base; fails if the API does not quote it
+                rates = currency_converter.RateTable(rates, base).rebase(history.base).rates()
+            history.add_snapshot(datetime.date.today(), rates)
+            print(f"Stored {len(rates)} rates for {datetime.date.today()} ({len(history)} days in the store)")
+        else:
+            converted = history.convert(args.amount, args.from_currency.upper(), args.to_currency.upper(), args.date)
+            print(f"{args.amount} {args.from_currency.upper()} was {converted:.2f} {args.to_currency.upper()} "
+                  f"on {args.date}")
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
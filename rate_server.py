@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import contextlib
+import logging
+import time
+
+from aiohttp import web
+
+import currency_converter
+
+DEFAULT_REFRESH_INTERVAL = 15 * 60
+# First retry delay after a failed refresh; it doubles per failure, up to the refresh interval
+RETRY_DELAY = 30
+MAX_BATCH_SIZE = 10_000
+
+
+class RateService:
+    """
+    Holds one in-memory rate snapshot and keeps it fresh in the background.
+
+    The snapshot (a RateTable plus its fetch time) is replaced as a whole,
+    so requests always read a consistent table without locking. Fetching
+    runs on a worker thread, so a slow or failing API never blocks
+    requests; after a failed refresh the previous snapshot keeps serving
+    and retries back off, so an API outage costs few extra calls.
+    """
+
+    def __init__(self, api_url, api_key, cache, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.table = None
+        self.fetched_at = None
+        self.last_error = None
+        self._task = None
+
+    def _install(self, rates, fetched_at, base):
+        self.table = currency_converter.RateTable(rates, base)
+        self.fetched_at = fetched_at
+
+    def _fetch(self):
+        rates, base = currency_converter.fetch_rate_snapshot(self.api_url, self.api_key)
+        fetched_at = time.time()
+        try:
+            self.cache.save(self.api_url, rates, fetched_at, base)
+        except OSError as e:
+            logging.warning(f"Could not save the rate cache: {e}")
+        return rates, fetched_at, base
+
+    async def refresh(self):
+        """
+        Fetch new rates on a worker thread and swap them in.
+
+        :return: True if the snapshot was updated
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            self._install(*await loop.run_in_executor(None, self._fetch))
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Rate refresh failed, keeping the previous snapshot: {e}")
+            return False
+        self.last_error = None
+        logging.info(f"Rates refreshed ({len(self.table.codes)} currencies)")
+        return True
+
+    async def _refresh_loop(self):
+        failures = 0
+        while True:
+            if failures:
+                # Back off instead of calling the metered API every second during an outage
+                delay = min(RETRY_DELAY * 2 ** (failures - 1), self.refresh_interval)
+            else:
+                delay = self.refresh_interval - self.age() if self.table else 0
+            await asyncio.sleep(max(delay, 1.0))
+            failures = 0 if await self.refresh() else failures + 1
+
+    async def start(self, app=None):
+        """
+        Load the cached snapshot (or fetch one) and start refreshing.
+        """
+        cached = self.cache.load(self.api_url)
+        if cached:
+            try:
+                self._install(*cached)
+            except ValueError as e:
+                logging.warning(f"Ignoring the cached rates: {e}")
+                cached = None
+        if not cached or self.age() > self.refresh_interval:
+            refreshed = await self.refresh()
+            if not refreshed and not cached:
+                raise RuntimeError(f"No rates available: {self.last_error}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self, app=None):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def age(self):
+        return max(0.0, time.time() - self.fetched_at)
+
+    def status(self):
+        return {
+            "base": self.table.base,
+            "currencies": len(self.table.codes),
+            "rates_age": self.age(),
+            "stale": self.age() > self.refresh_interval,
+            "last_error": self.last_error,
+        }
+
+    def convert(self, amount, from_currency, to_currency):
+        """
+        Convert one amount with the current snapshot.
+
+        :return: Result dictionary
+        :raises ValueError: if the amount or a currency code is invalid
+        """
+        from_currency, to_currency = str(from_currency).upper(), str(to_currency).upper()
+        rate = self.table.rate(from_currency, to_currency)
+        amount = float(amount)
+        return {"amount": amount, "from": from_currency, "to": to_currency,
+                "rate": rate, "converted": amount * rate}
+
+
+def _error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+async def handle_convert(request):
+    service = request.app["service"]
+    query = request.query
+    try:
+        result = service.convert(query["amount"], query["from"], query["to"])
+    except KeyError as e:
+        return _error(400, f"Missing query parameter: {e.args[0]}")
+    except ValueError as e:
+        return _error(400, str(e))
+    result["rates_age"] = service.age()
+    return web.json_response(result)
+
+
+async def handle_batch(request):
+    """
+    POST {"conversions": [{"amount": 10, "from": "USD", "to": "EUR"}, ...]}.
+
+    Each item gets a result or an "error"; one bad item never fails the batch.
+    """
+    service = request.app["service"]
+    try:
+        conversions = (await request.json())["conversions"]
+    except (ValueError, KeyError, TypeError):
+        return _error(400, 'Expected a JSON body like {"conversions": [{"amount": 1, "from": "USD", "to": "EUR"}]}')
+    if not isinstance(conversions, list) or len(conversions) > MAX_BATCH_SIZE:
+        return _error(400, f"conversions must be a list of at most {MAX_BATCH_SIZE} items")
+
+    results = []
+    for item in conversions:
+        try:
+            results.append(service.convert(item["amount"], item["from"], item["to"]))
+        except (KeyError, TypeError, ValueError) as e:
+            results.append({"error": f"Invalid conversion {item!r}: {e}"})
+    return web.json_response({"results": results, "rates_age": service.age()})
+
+
+async def handle_rates(request):
+    service = request.app["service"]
+    return web.json_response({**service.status(), "rates": service.table.rates()})
+
+
+async def handle_health(request):
+    return web.json_response(request.app["service"].status())
+
+
+def make_app(service):
+    """
+    Build the aiohttp application serving a RateService.
+    """
+    app = web.Application()
+    app["service"] = service
+    app.router.add_get("/convert", handle_convert)
+    app.router.add_post("/convert/batch", handle_batch)
+    app.router.add_get("/rates", handle_rates)
+    app.router.add_get("/health", handle_health)
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+    return app
+
+
+def main():
+    """
+    Main function to run the currency conversion service.
+    """
+    parser = argparse.ArgumentParser(description="HTTP currency conversion service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--api-url", default=currency_converter.DEFAULT_API_URL, help="Exchange rate API URL")
+    parser.add_argument("--api-key", default="your_api_key_here", help="API key")
+    parser.add_argument("--cache-file", default=currency_converter.DEFAULT_CACHE_PATH, help="Rate cache file")
+    parser.add_argument("--refresh-interval", type=float, default=DEFAULT_REFRESH_INTERVAL,
+                        help="Seconds between background rate refreshes (default: 900)")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Serve rates from a local stand-in API instead of --api-url")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api_url = args.api_url
+    if args.stand_in:
+        _, api_url = currency_converter.start_stand_in_server()
+    service = RateService(api_url, args.api_key, currency_converter.RateCache(args.cache_file),
+                          args.refresh_interval)
+    web.run_app(make_app(service), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
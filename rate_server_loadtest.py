@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from async_web_scraper import percentile
+
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "INR"]
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_until_ready(base_url, timeout=15.0):
+    """
+    Poll /health until the server answers.
+
+    :raises RuntimeError: If it does not answer within timeout seconds
+    """
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def make_request(rng, batch_size):
+    """
+    Build one random request: (method, path, params, JSON body).
+    """
+    if batch_size:
+        conversions = [{"amount": round(rng.uniform(1, 1000), 2), "from": rng.choice(CURRENCIES),
+                        "to": rng.choice(CURRENCIES)} for _ in range(batch_size)]
+        return "POST", "/convert/batch", None, {"conversions": conversions}
+    params = {"amount": f"{rng.uniform(1, 1000):.2f}", "from": rng.choice(CURRENCIES), "to": rng.choice(CURRENCIES)}
+    return "GET", "/convert", params, None
+
+
+async def run_load(base_url, total, concurrency, batch_size, seed=0):
+    """
+    Send `total` requests from `concurrency` clients over keep-alive connections.
+
+    :return: Dictionary with requests/second, error count and latency percentiles
+    """
+    rng = random.Random(seed)
+    requests = [make_request(rng, batch_size) for _ in range(total)]
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    async def client(session):
+        nonlocal errors, next_request
+        while next_request < total:
+            method, path, params, body = requests[next_request]
+            next_request += 1
+            start = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, params=params, json=body) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": total / elapsed,
+        "conversions_per_second": total * (batch_size or 1) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+    }
+
+
+async def run(args):
+    base_url = args.url
+    server = None
+    if args.spawn:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        cache_file = os.path.join(tempfile.mkdtemp(prefix="rate-server-"), "rates.json")
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "rate_server.py"),
+                                   "--port", str(port), "--stand-in", "--cache-file", cache_file],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_until_ready(base_url)
+        stats = await run_load(base_url, args.requests, args.concurrency, args.batch_size)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    kind = f"batches of {args.batch_size}" if args.batch_size else "single conversions"
+    print(f"{stats['requests']} requests ({kind}), concurrency {args.concurrency}, {stats['errors']} errors")
+    print(f"{stats['rps']:,.0f} requests/second ({stats['conversions_per_second']:,.0f} conversions/second) "
+          f"in {stats['seconds']:.2f} s")
+    print("Latency: " + ", ".join(f"{name} {stats[name] * 1000:.2f} ms" for name in ("p50", "p90", "p99")))
+
+
+def main():
+    """
+    Main function to load-test the rate server.
+    """
+    parser = argparse.ArgumentParser(description="Load-test rate_server.py.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server base URL")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start rate_server.py with a stand-in rate API on a free port and test it")
+    parser.add_argument("--requests", type=int, default=20_000, help="Requests to send (default: 20000)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients (default: 64)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Conversions per POST /convert/batch request (default: 0, single GET /convert)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the stage duration histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram of durations, as Prometheus exposes them.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile as the upper bound of the bucket that holds it.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class _Stage:
+    """
+    Times one stage and records it on exit.
+    """
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class ScrapeMetrics:
+    """
+    Counters, per-stage duration histograms and per-URL stage timings.
+
+    Wrap each stage in `with metrics.stage('parse'):` and each URL in
+    `with metrics.track(url):`; count events with `metrics.count(name, n)`.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self.urls = []
+        self._current = None
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        if self._current is not None:
+            stages = self._current['stages']
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def track(self, url):
+        """
+        Attribute the stages timed inside the block to url.
+        """
+        record = {'url': url, 'stages': {}}
+        self._current = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['total'] = time.perf_counter() - start
+            self.urls.append(record)
+            self._current = None
+
+    def snapshot(self):
+        """
+        :return: Dictionary with counters, histograms and per-URL timings
+        """
+        return {
+            'counters': dict(self.counters),
+            'histograms': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            'urls': list(self.urls),
+        }
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """
+    Disabled metrics with the ScrapeMetrics interface.
+
+    Every call returns at once without reading the clock or allocating, so
+    instrumented code costs nothing measurable when metrics are off.
+    """
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def observe(self, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def track(self, url):
+        return _NULL_STAGE
+
+
+NULL_METRICS = NullMetrics()
+
+
+class LogSink:
+    """
+    Log a human-readable summary of the metrics.
+    """
+
+    def emit(self, metrics):
+        for name, value in sorted(metrics.counters.items()):
+            logging.info(f"{name}: {value}")
+        for name, histogram in metrics.histograms.items():
+            if histogram.count:
+                logging.info(f"{name}: {histogram.count} x, total {histogram.sum * 1000:.1f} ms, "
+                             f"mean {histogram.sum / histogram.count * 1000:.2f} ms, "
+                             f"p50 <= {histogram.quantile(0.5) * 1000:g} ms, "
+                             f"p99 <= {histogram.quantile(0.99) * 1000:g} ms")
+        for record in metrics.urls:
+            stages = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in record['stages'].items())
+            logging.info(f"{record['url']}: {stages} (total {record['total'] * 1000:.1f} ms)")
+
+
+def _write_atomically(path, text):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as output_file:
+        output_file.write(text)
+    os.replace(temporary_path, path)
+
+
+class JSONSink:
+    """
+    Write the metrics snapshot to a JSON file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, metrics):
+        _write_atomically(self.path, json.dumps(metrics.snapshot(), indent=2))
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class PrometheusSink:
+    """
+    Write the metrics in the Prometheus text exposition format, e.g. for the
+    node_exporter textfile collector.
+    """
+
+    def __init__(self, path, prefix='scraper'):
+        self.path = path
+        self.prefix = prefix
+
+    def render(self, metrics):
+        lines = []
+        for name, value in sorted(metrics.counters.items()):
+            metric = f"{self.prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        if metrics.histograms:
+            metric = f"{self.prefix}_stage_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, histogram in sorted(metrics.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{_format_bound(bound)}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.sum!r}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def emit(self, metrics):
+        _write_atomically(self.path, self.render(metrics))
+
+
+def make_sink(kind, path=None):
+    """
+    Build a sink by name: 'log', 'json' or 'prometheus'.
+
+    :raises ValueError: If the kind is unknown or a file sink has no path
+    """
+    if kind == 'log':
+        return LogSink()
+    if kind not in ('json', 'prometheus'):
+        raise ValueError(f"Unknown metrics sink: {kind}")
+    if not path:
+        raise ValueError(f"The {kind} metrics sink needs an output file")
+    return JSONSink(path) if kind == 'json' else PrometheusSink(path)
@@ -0,0 +1,327 @@
+import re
+from html.parser import HTMLParser
+
+# Elements that never have an end tag, so they are matched but never opened
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+
+# Elements whose content is code rather than text, left out of field text
+# as BeautifulSoup's get_text() does
+NON_TEXT_ELEMENTS = frozenset({'script', 'style'})
+
+_COMPOUND_RE = re.compile(r'''
+    (?P<tag>\*|[a-zA-Z][\w-]*)?
+    (?P<rest>(?:\#[\w-]+|\.[\w-]+|\[[^\]]+\])*)
+''', re.VERBOSE)
+_PART_RE = re.compile(r'#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+_ATTR_RE = re.compile(r'''^\s*(?P<name>[\w-]+)\s*(?:(?P<op>[~^$*]?=)\s*(?P<quote>["']?)(?P<value>.*?)(?P=quote))?\s*$''')
+
+_ATTR_TESTS = {
+    None: lambda actual, expected: actual is not None,
+    '=': lambda actual, expected: actual == expected,
+    '~=': lambda actual, expected: actual is not None and expected in actual.split(),
+    '^=': lambda actual, expected: actual is not None and actual.startswith(expected),
+    '$=': lambda actual, expected: actual is not None and actual.endswith(expected),
+    '*=': lambda actual, expected: actual is not None and expected in actual,
+}
+
+
+class _Element:
+    """
+    An open element as seen by the matcher: tag name, id, classes and attributes.
+    """
+
+    __slots__ = ('tag', 'id', 'classes', 'attrs')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.id = self.attrs.get('id')
+        self.classes = frozenset((self.attrs.get('class') or '').split())
+
+
+class _Compound:
+    """
+    One compound selector such as 'div.quote[data-id]'.
+    """
+
+    __slots__ = ('tag', 'id', 'classes', 'attr_tests')
+
+    def __init__(self, text):
+        match = _COMPOUND_RE.fullmatch(text)
+        if not text or not match:
+            raise ValueError(f"Unsupported selector: {text!r}")
+        tag = match.group('tag')
+        self.tag = None if tag in (None, '*') else tag.lower()
+        self.id = None
+        classes = set()
+        self.attr_tests = []
+        for part in _PART_RE.finditer(match.group('rest')):
+            if part.group('id'):
+                self.id = part.group('id')
+            elif part.group('cls'):
+                classes.add(part.group('cls'))
+            else:
+                attr = _ATTR_RE.match(part.group('attr'))
+                if not attr:
+                    raise ValueError(f"Unsupported attribute selector: [{part.group('attr')}]")
+                self.attr_tests.append((attr.group('name').lower(), _ATTR_TESTS[attr.group('op')],
+                                        attr.group('value')))
+        self.classes = frozenset(classes)
+
+    def matches(self, element):
+        return ((self.tag is None or self.tag == element.tag)
+                and (self.id is None or self.id == element.id)
+                and self.classes <= element.classes
+                and all(test(element.attrs.get(name), value) for name, test, value in self.attr_tests))
+
+
+class Selector:
+    """
+    Precompiled CSS selector.
+
+    Supports type, universal, #id, .class and [attr], [attr=v], [attr~=v],
+    [attr^=v], [attr$=v], [attr*=v] selectors, the descendant (' ') and child
+    ('>') combinators, and comma-separated groups. Matching runs against the
+    stack of open elements, so it needs no document tree.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.alternatives = [self._compile(group) for group in text.split(',')]
+
+    @staticmethod
+    def _compile(group):
+        tokens = re.sub(r'\s*>\s*', ' > ', group.strip()).split()
+        if not tokens or tokens[0] == '>' or tokens[-1] == '>':
+            raise ValueError(f"Unsupported selector: {group!r}")
+        steps = []  # (compound, combinator to the previous step), rightmost first
+        combinator = ' '
+        for token in reversed(tokens):
+            if token == '>':
+                if combinator == '>':
+                    raise ValueError(f"Unsupported selector: {group!r}")
+                steps[-1] = (steps[-1][0], '>')
+                combinator = '>'
+                continue
+            steps.append((_Compound(token), ' '))
+            combinator = ' '
+        return steps
+
+    def matches(self, stack, floor=0):
+        """
+        Check whether the last element of stack matches.
+
+        :param stack: Open elements, root first; the last one is tested
+        :param floor: Ancestors below this index are out of scope (used to
+                      match relative to a record element)
+        """
+        return any(self._match(steps, 0, stack, len(stack) - 1, floor) for steps in self.alternatives)
+
+    def _match(self, steps, step, stack, index, floor):
+        compound, combinator = steps[step]
+        if not compound.matches(stack[index]):
+            return False
+        if step + 1 == len(steps):
+            return True
+        if combinator == '>':
+            return index - 1 >= floor and self._match(steps, step + 1, stack, index - 1, floor)
+        return any(self._match(steps, step + 1, stack, ancestor, floor)
+                   for ancestor in range(index - 1, floor - 1, -1))
+
+
+class FieldRule:
+    """
+    A compiled field: a selector plus what to take from each match.
+    """
+
+    def __init__(self, name, spec):
+        if isinstance(spec, str):
+            spec = {'css': spec}
+        if 'css' not in spec:
+            raise ValueError(f"Field '{name}' needs a 'css' selector")
+        self.name = name
+        self.selector = Selector(spec['css'])
+        self.attr = spec.get('attr')
+        self.many = bool(spec.get('many', False))
+        self.strip = bool(spec.get('strip', False))
+
+
+class ExtractionRules:
+    """
+    A compiled rule set, reusable across any number of documents.
+
+    Rules are plain dictionaries (and so can live in a JSON file):
+
+        {
+            "record": "div.quote",
+            "fields": {
+                "text": "span.text",
+                "author": {"css": "small.author", "strip": true},
+                "tags": {"css": "a.tag", "many": true},
+                "link": {"css": "a", "attr": "href"}
+            }
+        }
+
+    Each element matching `record` yields one record; field selectors are
+    matched inside it. Without `record`, the whole document is one record.
+    A field takes the text of its first match (or the value of `attr`), or
+    a list of every match with "many"; missing fields are None or [].
+    """
+
+    def __init__(self, rules):
+        record = rules.get('record')
+        self.record = Selector(record) if record else None
+        fields = rules.get('fields')
+        if not fields:
+            raise ValueError("Rules need at least one field")
+        self.fields = [FieldRule(name, spec) for name, spec in fields.items()]
+
+    def iter_records(self, chunks):
+        """
+        Extract records in a single streaming pass over the document.
+
+        :param chunks: HTML content as a string, or an iterable of string chunks
+        :return: Generator of record dictionaries, in document order
+        """
+        if isinstance(chunks, str):
+            chunks = (chunks,)
+        parser = _RuleParser(self)
+        for chunk in chunks:
+            parser.feed(chunk)
+            if parser.records:
+                yield from parser.records
+                parser.records.clear()
+        parser.close()
+        yield from parser.records
+
+    def extract(self, html_content):
+        """
+        Extract every record of a document.
+
+        :param html_content: HTML content of a webpage
+        :return: List of record dictionaries
+        """
+        return list(self.iter_records(html_content))
+
+
+def compile_rules(rules):
+    """
+    Compile a rule dictionary once for reuse on many documents.
+
+    :raises ValueError: If a selector or field specification is invalid
+    """
+    return rules if isinstance(rules, ExtractionRules) else ExtractionRules(rules)
+
+
+class _Capture:
+    __slots__ = ('rule', 'depth', 'fragments', 'values', 'slot')
+
+    def __init__(self, rule, depth, values, slot):
+        self.rule = rule
+        self.depth = depth
+        self.fragments = []
+        self.values = values
+        self.slot = slot
+
+
+class _RuleParser(HTMLParser):
+    """
+    Event-driven matcher: tests every start tag against the compiled
+    selectors while keeping only the stack of open elements and the text
+    of the fields currently being captured.
+    """
+
+    def __init__(self, rules):
+        super().__init__(convert_charrefs=True)
+        self.rules = rules
+        self.records = []
+        self.stack = []
+        self.captures = []
+        self.record_depth = None
+        self.values = None
+        if rules.record is None:
+            self._start_record(0)
+
+    def _start_record(self, depth):
+        self.record_depth = depth
+        self.values = {rule.name: [] for rule in self.rules.fields}
+
+    def _finish_record(self):
+        record = {}
+        for rule in self.rules.fields:
+            found = self.values[rule.name]
+            record[rule.name] = found if rule.many else (found[0] if found else None)
+        self.records.append(record)
+        self.record_depth = None
+        self.values = None
+
+    def _match_fields(self, depth):
+        floor = self.record_depth
+        if self.rules.record is not None and depth - 1 == floor:
+            return  # Fields are matched inside the record element, not on it
+        for rule in self.rules.fields:
+            values = self.values[rule.name]
+            if not rule.many and values:
+                continue
+            if not rule.selector.matches(self.stack, floor):
+                continue
+            element = self.stack[-1]
+            if rule.attr:
+                value = element.attrs.get(rule.attr)
+                if value is not None:
+                    values.append(value.strip() if rule.strip else value)
+            else:
+                values.append(None)  # Reserve the slot, so values stay in document order
+                self.captures.append(_Capture(rule, depth, values, len(values) - 1))
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(_Element(tag, attrs))
+        depth = len(self.stack)
+        if self.record_depth is None and self.rules.record.matches(self.stack):
+            self._start_record(depth - 1)
+        if self.values is not None:
+            self._match_fields(depth)
+        if tag in VOID_ELEMENTS:
+            self._close_to(depth - 1)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._close_to(len(self.stack) - 1)
+
+    def handle_endtag(self, tag):
+        # Close the innermost open element with this tag, along with any
+        # unclosed elements inside it; stray end tags are ignored
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                self._close_to(index)
+                return
+
+    def handle_data(self, data):
+        if self.stack and self.stack[-1].tag in NON_TEXT_ELEMENTS:
+            return
+        for capture in self.captures:
+            capture.fragments.append(data)
+
+    def _close_to(self, depth):
+        """
+        Pop open elements until `depth` remain, finishing their captures and records.
+        """
+        while len(self.stack) > depth:
+            closing = len(self.stack)
+            while self.captures and self.captures[-1].depth >= closing:
+                capture = self.captures.pop()
+                text = ''.join(capture.fragments)
+                capture.values[capture.slot] = text.strip() if capture.rule.strip else text
+            self.stack.pop()
+            if self.rules.record is not None and self.record_depth == closing - 1:
+                self._finish_record()
+
+    def close(self):
+        super().close()
+        self._close_to(0)
+        if self.rules.record is None:
+            self._finish_record()
@@ -0,0 +1,213 @@
+import argparse
+import collections
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import sudoku_solver_logic
+
+INVALID = "invalid"
+UNSOLVED = "no solution"
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-scale histogram of latencies.
+
+    Memory stays constant no matter how many puzzles are recorded; reported
+    percentiles are accurate to within one bucket (about 5%).
+    """
+
+    MIN_SECONDS = 1e-6
+    GROWTH = 1.05
+    BUCKETS = 400
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+
+    def record(self, seconds):
+        if seconds <= self.MIN_SECONDS:
+            bucket = 0
+        else:
+            bucket = int(math.log(seconds / self.MIN_SECONDS, self.GROWTH)) + 1
+        self.counts[min(bucket, self.BUCKETS - 1)] += 1
+        self.total += 1
+
+    def percentile(self, pct):
+        """
+        Return the upper bound of the bucket holding the given percentile.
+
+        :param pct: Percentile between 0 and 100
+        :return: Latency in seconds, or 0.0 if nothing was recorded
+        """
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.MIN_SECONDS * self.GROWTH ** bucket
+        return self.MIN_SECONDS * self.GROWTH ** (self.BUCKETS - 1)
+
+
+def read_puzzles(stream):
+    """
+    Lazily yield puzzle lines from a text stream, skipping blank lines.
+
+    :param stream: File object with one 81-character puzzle per line
+    """
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def read_chunks(lines, chunk_size):
+    """
+    Group an iterable of puzzle lines into lists of at most chunk_size lines.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def solve_chunk(lines, engine):
+    """
+    Solve a chunk of puzzle lines. Runs inside the worker processes.
+
+    :param lines: List of puzzle strings
+    :param engine: Name of the solver engine
+    :return: List of (output line, seconds) in input order
+    """
+    solver = sudoku_solver_logic.get_solver(engine)
+    results = []
+    for line in lines:
+        start = time.perf_counter()
+        try:
+            board = sudoku_solver_logic.parse_puzzle(line)
+        except ValueError:
+            results.append((INVALID, time.perf_counter() - start))
+            continue
+        if solver(board):
+            output = sudoku_solver_logic.format_puzzle(board)
+        else:
+            output = UNSOLVED
+        results.append((output, time.perf_counter() - start))
+    return results
+
+
+def solve_stream(input_stream, output_stream, workers=None, chunk_size=64,
+                 engine="bitmask", max_pending=None):
+    """
+    Solve every puzzle in input_stream and write solutions in input order.
+
+    Chunks are submitted to the pool as the input is read, and at most
+    max_pending chunks are in flight at once, so memory use is bounded by
+    the window rather than the size of the corpus.
+
+    :param input_stream: File object with one puzzle per line
+    :param output_stream: File object that receives one line per puzzle
+    :param workers: Number of worker processes (default: CPU count)
+    :param chunk_size: Number of puzzles sent to a worker per task
+    :param engine: Name of the solver engine
+    :param max_pending: Maximum chunks in flight (default: 4 per worker)
+    :return: Dictionary of run statistics
+    """
+    sudoku_solver_logic.get_solver(engine)  # Fail fast on a bad engine name
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    histogram = LatencyHistogram()
+    counts = collections.Counter()
+
+    def write_results(results):
+        for output, seconds in results:
+            output_stream.write(output + "\n")
+            histogram.record(seconds)
+            if output == INVALID:
+                counts["invalid"] += 1
+            elif output == UNSOLVED:
+                counts["unsolved"] += 1
+            else:
+                counts["solved"] += 1
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for chunk in read_chunks(read_puzzles(input_stream), chunk_size):
+            if len(pending) >= max_pending:
+                write_results(pending.popleft().get())
+            pending.append(pool.apply_async(solve_chunk, (chunk, engine)))
+        while pending:
+            write_results(pending.popleft().get())
+    elapsed = time.perf_counter() - start
+
+    total = histogram.total
+    return {
+        "puzzles": total,
+        "solved": counts["solved"],
+        "unsolved": counts["unsolved"],
+        "invalid": counts["invalid"],
+        "seconds": elapsed,
+        "puzzles_per_second": total / elapsed if elapsed else 0.0,
+        "p50": histogram.percentile(50),
+        "p90": histogram.percentile(90),
+        "p99": histogram.percentile(99),
+        "max": histogram.percentile(100),
+    }
+
+
+def print_report(stats, stream=sys.stderr):
+    """
+    Print a throughput and latency summary for a batch run.
+    """
+    print(f"Puzzles: {stats['puzzles']} (solved {stats['solved']}, "
+          f"unsolved {stats['unsolved']}, invalid {stats['invalid']})", file=stream)
+    print(f"Elapsed: {stats['seconds']:.2f} s, "
+          f"{stats['puzzles_per_second']:.1f} puzzles/second", file=stream)
+    print("Latency per puzzle: " + ", ".join(
+        f"{name} {stats[name] * 1000:.3f} ms" for name in ("p50", "p90", "p99", "max")),
+        file=stream)
+
+
+def main():
+    """
+    Main function to solve a file of puzzles in parallel.
+    """
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles in batch, one 81-character puzzle per line.")
+    parser.add_argument("input", nargs="?", default="-", help="Puzzle file, or '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="Solution file, or '-' for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=64, help="Puzzles per worker task (default: 64)")
+    parser.add_argument("-e", "--engine", default="bitmask", choices=list(sudoku_solver_logic.SOLVER_ENGINES))
+    args = parser.parse_args()
+
+    if args.chunk_size < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--workers and --chunk-size must be positive")
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input)
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        stats = solve_stream(input_stream, output_stream, args.workers, args.chunk_size, args.engine)
+    except OSError as e:
+        print(f"Error during batch solve: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+import sudoku_solver_logic
+
+# Hard puzzles used when no corpus file is given. Most are minimal 17-clue
+# puzzles; the last two are well-known hard puzzles for backtracking solvers.
+HARD_PUZZLES = [
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "000000010400000000020000000000050604008000300001090000300400200050100000000807000",
+    "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+    "000000012003600000000007000410020000000500300700000600280000040000300500000000000",
+    "000000012008030000000000040120500000000004700060000000507000300000620000000100000",
+    "400000805030000000000700000020000060000080400000010000000603070500200000104000000",
+    "520006000000000701300000000000400800600000050000000000041800000000030020008700000",
+    "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "100000002090400050006000700050903000000070000000850040700000600030009080002000001",
+]
+
+# Puzzles the plain backtracker finishes quickly, used where every engine and
+# representation has to solve the whole corpus.
+SAMPLE_PUZZLES = [
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+]
+
+
+def load_puzzles(file_path=None, default=HARD_PUZZLES):
+    """
+    Load the benchmark corpus.
+
+    :param file_path: Optional path to a file with one 81-character puzzle per line
+    :param default: Puzzles to use when no file is given
+    :return: List of puzzle strings
+    """
+    if file_path is None:
+        return list(default)
+    with open(file_path) as puzzle_file:
+        return [line.strip() for line in puzzle_file if line.strip()]
+
+
+def _time_solve(engine, puzzle):
+    """
+    Solve one puzzle with the given engine and time it.
+
+    :return: (solved, seconds)
+    """
+    solver = sudoku_solver_logic.get_solver(engine)
+    board = sudoku_solver_logic.parse_puzzle(puzzle)
+    start = time.perf_counter()
+    solved = solver(board)
+    return solved, time.perf_counter() - start
+
+
+def time_with_timeout(engine, puzzle, timeout):
+    """
+    Time one solve in a child process so a slow engine can be abandoned.
+
+    :param engine: Name of the solver engine
+    :param puzzle: 81-character puzzle string
+    :param timeout: Seconds to wait before giving up
+    :return: (solved, seconds), or None if the solve timed out
+    """
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply_async(_time_solve, (engine, puzzle)).get(timeout)
+    except multiprocessing.TimeoutError:
+        return None
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def benchmark_engines(puzzles, engines, timeout):
+    """
+    Compare solver engines puzzle by puzzle and print a summary table.
+
+    :param puzzles: List of puzzle strings
+    :param engines: Names of the engines to compare
+    :param timeout: Per-puzzle time limit in seconds for each engine
+    """
+    totals = {engine: 0.0 for engine in engines}
+    timeouts = {engine: 0 for engine in engines}
+
+    header = "puzzle".ljust(12) + "".join(engine.rjust(16) for engine in engines)
+    print(header)
+    print("-" * len(header))
+    for number, puzzle in enumerate(puzzles, start=1):
+        cells = []
+        for engine in engines:
+            result = time_with_timeout(engine, puzzle, timeout)
+            if result is None:
+                timeouts[engine] += 1
+                totals[engine] += timeout
+                cells.append(f">{timeout:.0f}s")
+            elif not result[0]:
+                cells.append("unsolved")
+            else:
+                totals[engine] += result[1]
+                cells.append(f"{result[1] * 1000:.1f} ms")
+        print(f"#{number}".ljust(12) + "".join(cell.rjust(16) for cell in cells))
+
+    print("-" * len(header))
+    print("total".ljust(12) + "".join(f"{totals[engine]:.2f} s".rjust(16) for engine in engines))
+    print("timeouts".ljust(12) + "".join(str(timeouts[engine]).rjust(16) for engine in engines))
+    print("Timed-out puzzles count as the full timeout in the totals.")
+
+
+BOARD_TYPES = {
+    "list": sudoku_solver_logic.parse_puzzle,
+    "SudokuBoard": lambda puzzle: sudoku_solver_logic.SudokuBoard.from_rows(
+        sudoku_solver_logic.parse_puzzle(puzzle)),
+}
+
+
+def measure_board_memory(puzzle, count=10000):
+    """
+    Measure the average memory allocated per board for each representation.
+
+    :param puzzle: Puzzle string used to build the boards
+    :param count: Number of boards to keep alive during the measurement
+    :return: Dictionary of board type name to bytes per board
+    """
+    results = {}
+    for name, build in BOARD_TYPES.items():
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        boards = [build(puzzle) for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[name] = (after - before) / len(boards)
+    return results
+
+
+def measure_solve_throughput(puzzles, engine, build, repeat):
+    """
+    Solve every puzzle repeat times on freshly built boards.
+
+    :return: Puzzles solved per second (board construction is not timed)
+    """
+    solver = sudoku_solver_logic.get_solver(engine)
+    elapsed = 0.0
+    for _ in range(repeat):
+        for puzzle in puzzles:
+            board = build(puzzle)
+            start = time.perf_counter()
+            solver(board)
+            elapsed += time.perf_counter() - start
+    return len(puzzles) * repeat / elapsed
+
+
+def benchmark_boards(puzzles, engines, repeat):
+    """
+    Compare memory per board and solve throughput of the board representations.
+
+    :param puzzles: List of puzzle strings
+    :param engines: Names of the engines to run on each representation
+    :param repeat: Number of passes over the corpus per measurement
+    """
+    memory = measure_board_memory(puzzles[0])
+    print("Memory per board:")
+    for name, size in memory.items():
+        print(f"  {name.ljust(12)} {size:8.0f} bytes")
+
+    print(f"Solve throughput ({len(puzzles)} puzzles x {repeat}):")
+    for engine in engines:
+        for name, build in BOARD_TYPES.items():
+            rate = measure_solve_throughput(puzzles, engine, build, repeat)
+            print(f"  {engine.ljust(14)} {name.ljust(12)} {rate:10.1f} puzzles/second")
+
+
+def generate_puzzle(size, blank_ratio, rng):
+    """
+    Generate an NxN puzzle by blanking cells of a shuffled pattern solution.
+
+    The result is always solvable but not necessarily unique.
+
+    :param size: Board size (a perfect square)
+    :param blank_ratio: Fraction of cells to empty
+    :param rng: random.Random instance
+    :return: NxN 2D list
+    """
+    box_size = math.isqrt(size)
+    digits = list(range(1, size + 1))
+    rng.shuffle(digits)
+    board = [[digits[(box_size * (row % box_size) + row // box_size + col) % size]
+              for col in range(size)] for row in range(size)]
+    for row in range(size):
+        for col in range(size):
+            if rng.random() < blank_ratio:
+                board[row][col] = 0
+    return board
+
+
+def benchmark_uniqueness(count, blank_ratio, sizes, seed=0):
+    """
+    Measure exact-cover uniqueness-check throughput (search stops at 2 solutions).
+
+    9x9 checks run on the hard puzzle corpus; the other sizes use generated
+    puzzles.
+
+    :param count: Number of generated puzzles per board size
+    :param blank_ratio: Fraction of cells emptied in generated puzzles
+    :param sizes: Board sizes to benchmark
+    :param seed: Seed for the puzzle generator
+    """
+    rng = random.Random(seed)
+    print("size     puzzles    unique    checks/second")
+    for size in sizes:
+        if size == 9:
+            boards = [sudoku_solver_logic.parse_puzzle(puzzle) for puzzle in HARD_PUZZLES]
+        else:
+            boards = [generate_puzzle(size, blank_ratio, rng) for _ in range(count)]
+        start = time.perf_counter()
+        unique = sum(sudoku_solver_logic.has_unique_solution(board) for board in boards)
+        elapsed = time.perf_counter() - start
+        print(f"{size}x{size}".ljust(9) + str(len(boards)).rjust(7)
+              + str(unique).rjust(10) + f"{len(boards) / elapsed:17.1f}")
+
+
+def main():
+    """
+    Main function to run the Sudoku benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Sudoku solver benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    engines_parser = subparsers.add_parser("engines", help="Compare solver engines on hard puzzles")
+    engines_parser.add_argument("--file", help="Puzzle file (one 81-character puzzle per line)")
+    engines_parser.add_argument("--engines", nargs="+", default=list(sudoku_solver_logic.SOLVER_ENGINES),
+                                choices=list(sudoku_solver_logic.SOLVER_ENGINES))
+    engines_parser.add_argument("--timeout", type=float, default=10.0,
+                                help="Per-puzzle time limit in seconds (default: 10)")
+
+    boards_parser = subparsers.add_parser("boards", help="Compare list and SudokuBoard representations")
+    boards_parser.add_argument("--file", help="Puzzle file (one 81-character puzzle per line)")
+    boards_parser.add_argument("--engines", nargs="+", default=list(sudoku_solver_logic.SOLVER_ENGINES),
+                               choices=list(sudoku_solver_logic.SOLVER_ENGINES))
+    boards_parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus (default: 3)")
+
+    uniqueness_parser = subparsers.add_parser("uniqueness", help="Exact-cover uniqueness-check throughput")
+    uniqueness_parser.add_argument("--count", type=int, default=20, help="Generated puzzles per size (default: 20)")
+    uniqueness_parser.add_argument("--blank-ratio", type=float, default=0.4,
+                                   help="Fraction of cells emptied in generated puzzles (default: 0.4)")
+    uniqueness_parser.add_argument("--sizes", type=int, nargs="+", default=[4, 9, 16, 25])
+
+    args = parser.parse_args()
+    if args.command == "engines":
+        benchmark_engines(load_puzzles(args.file), args.engines, args.timeout)
+    elif args.command == "boards":
+        benchmark_boards(load_puzzles(args.file, SAMPLE_PUZZLES), args.engines, args.repeat)
+    elif args.command == "uniqueness":
+        benchmark_uniqueness(args.count, args.blank_ratio, args.sizes)
+
+
+if __name__ == "__main__":
+    main()
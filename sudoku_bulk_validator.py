@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+
+import sudoku_solver_logic
+
+# Failure flags returned per board; a board is valid when its flags are 0.
+ROW_CONFLICT = 1
+COLUMN_CONFLICT = 2
+BOX_CONFLICT = 4
+VALUE_OUT_OF_RANGE = 8
+
+FAILURE_NAMES = {
+    ROW_CONFLICT: "row",
+    COLUMN_CONFLICT: "column",
+    BOX_CONFLICT: "box",
+    VALUE_OUT_OF_RANGE: "value",
+}
+
+# Rough peak working memory per board while a chunk is validated: the
+# transposed and sorted copies of the units plus the boolean comparisons.
+BYTES_PER_BOARD = 1024
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+
+def _unit_conflicts(units: np.ndarray) -> np.ndarray:
+    """
+    Find repeated non-zero digits in every unit.
+
+    :param units: (n, 9, 9) array holding one unit (row, column or box) per
+                  row of the last two axes; it is sorted in place.
+    :return: (n,) boolean array, True where any unit has a repeated digit.
+    """
+    units.sort(axis=-1)
+    repeated = (units[..., 1:] == units[..., :-1]) & (units[..., 1:] != 0)
+    return repeated.any(axis=(1, 2))
+
+
+def _validate_chunk(chunk: np.ndarray) -> np.ndarray:
+    """
+    Compute the failure flags of a chunk of boards.
+
+    :param chunk: (n, 9, 9) array of boards.
+    :return: (n,) uint8 array of failure flags.
+    """
+    flags = np.zeros(len(chunk), dtype=np.uint8)
+    out_of_range = (chunk < 0) | (chunk > 9)
+    bad_boards = out_of_range.any(axis=(1, 2))
+    flags[bad_boards] |= VALUE_OUT_OF_RANGE
+    if bad_boards.any():
+        # Blank those cells before the cast, which would wrap them onto real
+        # digits (-1 to 255, 265 to 9) and report conflicts that are not there
+        chunk = np.where(out_of_range, 0, chunk)
+    chunk = chunk.astype(np.uint8, copy=False)
+
+    # Copies, so sorting never touches the caller's boards
+    rows = chunk.copy()
+    columns = chunk.transpose(0, 2, 1).copy()
+    boxes = chunk.reshape(-1, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(-1, 9, 9)
+
+    flags[_unit_conflicts(rows)] |= ROW_CONFLICT
+    flags[_unit_conflicts(columns)] |= COLUMN_CONFLICT
+    flags[_unit_conflicts(boxes)] |= BOX_CONFLICT
+    return flags
+
+
+def validate_boards(boards: np.ndarray, memory_budget: int = DEFAULT_MEMORY_BUDGET) -> np.ndarray:
+    """
+    Check a stack of complete or partial boards for conflicts.
+
+    Applies the rules of sudoku_solver_logic.is_valid to every board at once:
+    a non-zero digit may appear only once per row, column and 3x3 box, and 0
+    marks an empty cell. Boards are processed in chunks sized so the working
+    memory stays within memory_budget, so very large stacks (including
+    np.memmap arrays) can be validated in one call.
+
+    :param boards: (N, 9, 9) array of boards, ideally uint8.
+    :param memory_budget: Approximate working memory in bytes per chunk.
+    :return: (N,) uint8 array of failure flags (0 for a valid board).
+    :raises ValueError: If the array does not have shape (N, 9, 9).
+    """
+    boards = np.asarray(boards)
+    if boards.ndim != 3 or boards.shape[1:] != (9, 9):
+        raise ValueError(f"Expected an array of shape (N, 9, 9), got {boards.shape}")
+
+    chunk_size = max(1, memory_budget // BYTES_PER_BOARD)
+    flags = np.empty(len(boards), dtype=np.uint8)
+    for start in range(0, len(boards), chunk_size):
+        stop = start + chunk_size
+        flags[start:stop] = _validate_chunk(boards[start:stop])
+    return flags
+
+
+def describe_failures(flags: int) -> list:
+    """
+    Name the constraints that failed for one board.
+
+    :param flags: Failure flags of a single board.
+    :return: List of failed constraint names, empty for a valid board.
+    """
+    return [name for flag, name in FAILURE_NAMES.items() if flags & flag]
+
+
+def is_board_valid(board) -> bool:
+    """
+    Reference check of a single board with sudoku_solver_logic.is_valid.
+
+    :param board: 2D list representing the Sudoku board.
+    :return: True if no filled cell conflicts with another, False otherwise.
+    """
+    board = [list(row) for row in board]
+    for row in range(9):
+        for col in range(9):
+            num = board[row][col]
+            if num:
+                board[row][col] = 0
+                valid = sudoku_solver_logic.is_valid(board, row, col, num)
+                board[row][col] = num
+                if not valid:
+                    return False
+    return True
+
+
+def main():
+    """
+    Main function to validate a generated corpus of boards and time it.
+    """
+    rng = np.random.default_rng(0)
+    solved = sudoku_solver_logic.parse_puzzle(
+        "530070000600195000098000060800060003400803001700020006060000280000419005000080079")
+    sudoku_solver_logic.solve_sudoku_bitmask(solved)
+
+    # One million copies of a solved board, a third of them with a random
+    # cell overwritten and a third with a random cell cleared
+    count = 1_000_000
+    boards = np.tile(np.array(solved, dtype=np.uint8), (count, 1, 1))
+    corrupt = rng.random(count) < 1 / 3
+    clear = ~corrupt & (rng.random(count) < 0.5)
+    cells = rng.integers(0, 81, size=count)
+    boards.reshape(count, 81)[corrupt, cells[corrupt]] = rng.integers(1, 10, size=corrupt.sum())
+    boards.reshape(count, 81)[clear, cells[clear]] = 0
+
+    start = time.perf_counter()
+    flags = validate_boards(boards)
+    elapsed = time.perf_counter() - start
+    print(f"Validated {count} boards in {elapsed:.2f} s ({count / elapsed:,.0f} boards/second)")
+    print(f"Valid: {(flags == 0).sum()}, invalid: {(flags != 0).sum()}")
+    for flag, name in FAILURE_NAMES.items():
+        print(f"  {name} failures: {((flags & flag) != 0).sum()}")
+
+    # Cross-check a sample against the pure-Python rules
+    sample = rng.choice(count, size=200, replace=False)
+    mismatches = sum(is_board_valid(boards[i].tolist()) != (flags[i] == 0) for i in sample)
+    print(f"Mismatches against is_valid on a {len(sample)}-board sample: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
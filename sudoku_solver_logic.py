@@ -1,13 +1,105 @@
+import math
+
+# Lookup tables for the flat board and the bitmask engine. Cells are addressed
+# by their flat index (row * 9 + col) and digit d is stored as the bit 1 << (d - 1).
+ALL_DIGITS = 0x1FF
+ROW_OF = [idx // 9 for idx in range(81)]
+COL_OF = [idx % 9 for idx in range(81)]
+BOX_OF = [3 * (idx // 27) + (idx % 9) // 3 for idx in range(81)]
+POPCOUNT = [bin(mask).count("1") for mask in range(ALL_DIGITS + 1)]
+BIT_TO_DIGIT = {1 << (d - 1): d for d in range(1, 10)}
+UNITS = (
+    [[row * 9 + col for col in range(9)] for row in range(9)]
+    + [[row * 9 + col for row in range(9)] for col in range(9)]
+    + [[idx for idx in range(81) if BOX_OF[idx] == box] for box in range(9)]
+)
+# Every cell sharing a row, column or box with a cell (including itself)
+NEIGHBOURHOOD = [
+    tuple(other for other in range(81)
+          if ROW_OF[other] == ROW_OF[idx] or COL_OF[other] == COL_OF[idx] or BOX_OF[other] == BOX_OF[idx])
+    for idx in range(81)
+]
+
+class SudokuBoard:
+    """
+    Compact Sudoku board backed by a flat 81-byte bytearray.
+
+    Cells are stored row-major with 0 for empty cells. ``board[row]`` returns
+    a writable zero-copy memoryview of that row, so code written for the
+    list-of-lists form (``board[row][col]``) works unchanged, while
+    is_valid, solve_sudoku and solve_sudoku_bitmask use fast paths on the
+    flat buffer.
+    """
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells=None):
+        """
+        :param cells: Optional 81-byte bytearray, wrapped without copying;
+                      other bytes-like objects are copied
+        """
+        if cells is None:
+            cells = bytearray(81)
+        elif not isinstance(cells, bytearray):
+            cells = bytearray(cells)
+        if len(cells) != 81:
+            raise ValueError(f"Expected 81 cells, got {len(cells)}")
+        self.cells = cells
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a board from the list-of-lists form.
+
+        :param rows: 2D list representing the Sudoku board
+        :return: SudokuBoard
+        """
+        return cls(bytearray(num for row in rows for num in row))
+
+    def to_rows(self):
+        """
+        Convert the board to the list-of-lists form.
+
+        :return: 2D list representing the Sudoku board
+        """
+        return [list(self.cells[row * 9:row * 9 + 9]) for row in range(9)]
+
+    def copy(self):
+        return SudokuBoard(bytearray(self.cells))
+
+    def __getitem__(self, row):
+        return memoryview(self.cells)[row * 9:row * 9 + 9]
+
+    def __len__(self):
+        return 9
+
+    def __iter__(self):
+        for row in range(9):
+            yield self[row]
+
+    def __eq__(self, other):
+        if not isinstance(other, SudokuBoard):
+            return NotImplemented
+        return self.cells == other.cells
+
+    def __repr__(self):
+        return f"SudokuBoard({format_puzzle(self)!r})"
+
+
 def is_valid(board, row, col, num):
     """
     Check if it's valid to place the number in the given row and column.
 
-    :param board: 2D list representing the Sudoku board
+    :param board: 2D list or SudokuBoard representing the Sudoku board
     :param row: Row index
     :param col: Column index
     :param num: Number to be placed
     :return: True if valid, False otherwise
     """
+    if isinstance(board, SudokuBoard):
+        cells = board.cells
+        return all(cells[idx] != num for idx in NEIGHBOURHOOD[row * 9 + col])
+
     # Check if the number is not repeated in the current row
     if num in board[row]:
         return False
@@ -29,9 +121,12 @@ def solve_sudoku(board):
     """
     Solve the Sudoku puzzle using backtracking.
 
-    :param board: 2D list representing the Sudoku board
+    :param board: 2D list or SudokuBoard representing the Sudoku board
     :return: True if the board is solved, False otherwise
     """
+    if isinstance(board, SudokuBoard):
+        return _solve_flat(board.cells)
+
     for row in range(9):
         for col in range(9):
             if board[row][col] == 0:  # Find an empty cell
@@ -48,11 +143,390 @@ def solve_sudoku(board):
 
     return True  # Puzzle solved
 
+def _solve_flat(cells):
+    """
+    Backtracking search of solve_sudoku on a flat 81-byte buffer.
+
+    :param cells: bytearray of 81 cells, filled in place
+    :return: True if the board is solved, False otherwise
+    """
+    idx = cells.find(0)  # Find the first empty cell
+    if idx == -1:
+        return True  # Puzzle solved
+
+    used = {cells[other] for other in NEIGHBOURHOOD[idx]}
+    for num in range(1, 10):
+        if num not in used:
+            cells[idx] = num  # Place the number
+            if _solve_flat(cells):
+                return True
+    cells[idx] = 0  # Reset and backtrack
+    return False
+
+class _BitmaskState:
+    """
+    Incrementally maintained candidate state for the bitmask engine.
+
+    ``rows``, ``cols`` and ``boxes`` hold a bitmask of the digits already
+    placed in each unit, so the candidates of an empty cell are the digits
+    missing from all three masks.
+    """
+
+    __slots__ = ("cells", "rows", "cols", "boxes")
+
+    def __init__(self):
+        self.cells = [0] * 81
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+
+    def candidates(self, idx):
+        return ~(self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]]
+                 | self.boxes[BOX_OF[idx]]) & ALL_DIGITS
+
+    def place(self, idx, bit):
+        self.cells[idx] = BIT_TO_DIGIT[bit]
+        self.rows[ROW_OF[idx]] |= bit
+        self.cols[COL_OF[idx]] |= bit
+        self.boxes[BOX_OF[idx]] |= bit
+
+    def remove(self, idx):
+        bit = 1 << (self.cells[idx] - 1)
+        self.cells[idx] = 0
+        self.rows[ROW_OF[idx]] ^= bit
+        self.cols[COL_OF[idx]] ^= bit
+        self.boxes[BOX_OF[idx]] ^= bit
+
+    def propagate(self, trail):
+        """
+        Apply naked and hidden singles until nothing changes.
+
+        Every placement is appended to ``trail`` so the caller can undo it.
+
+        :return: (ok, idx) where ok is False on a contradiction and idx is the
+                 empty cell with the fewest candidates, or None when solved
+        """
+        cells = self.cells
+        while True:
+            best_idx, best_count = None, 10
+            progress = False
+            # Naked singles: cells left with exactly one candidate
+            for idx in range(81):
+                if cells[idx]:
+                    continue
+                cand = self.candidates(idx)
+                count = POPCOUNT[cand]
+                if count == 0:
+                    return False, None
+                if count == 1:
+                    self.place(idx, cand)
+                    trail.append(idx)
+                    progress = True
+                elif count < best_count:
+                    best_idx, best_count = idx, count
+            if progress:
+                continue
+            if best_idx is None:
+                return True, None
+
+            # Hidden singles: digits with a single possible cell in a unit
+            for unit in UNITS:
+                placed = once = twice = 0
+                for idx in unit:
+                    if cells[idx]:
+                        placed |= 1 << (cells[idx] - 1)
+                    else:
+                        cand = self.candidates(idx)
+                        twice |= once & cand
+                        once |= cand
+                if (placed | once) != ALL_DIGITS:
+                    return False, None
+                singles = once & ~twice
+                if singles:
+                    bit = singles & -singles
+                    for idx in unit:
+                        if not cells[idx] and self.candidates(idx) & bit:
+                            self.place(idx, bit)
+                            trail.append(idx)
+                            break
+                    progress = True
+                    break
+            if not progress:
+                return True, best_idx
+
+    def search(self):
+        """
+        Depth-first search branching on the minimum-remaining-values cell.
+
+        :return: True if the state was completed, False otherwise
+        """
+        trail = []
+        ok, idx = self.propagate(trail)
+        if ok:
+            if idx is None:
+                return True
+            cand = self.candidates(idx)
+            while cand:
+                bit = cand & -cand
+                cand ^= bit
+                self.place(idx, bit)
+                if self.search():
+                    return True
+                self.remove(idx)
+
+        for placed_idx in reversed(trail):
+            self.remove(placed_idx)
+        return False
+
+def solve_sudoku_bitmask(board):
+    """
+    Solve the Sudoku puzzle using bitmask constraint propagation.
+
+    Drop-in replacement for solve_sudoku: the board is filled in place and
+    the return value has the same meaning. Candidates are tracked with
+    per-row/column/box bitmasks, naked and hidden singles are propagated
+    before every branch, and the search branches on the cell with the fewest
+    remaining candidates.
+
+    :param board: 2D list or SudokuBoard representing the Sudoku board
+    :return: True if the board is solved, False otherwise
+    """
+    if isinstance(board, SudokuBoard):
+        givens = board.cells
+    else:
+        givens = [num for row in board for num in row]
+
+    state = _BitmaskState()
+    for idx, num in enumerate(givens):
+        if num:
+            bit = 1 << (num - 1)
+            if not state.candidates(idx) & bit:
+                return False  # The givens already conflict
+            state.place(idx, bit)
+
+    if not state.search():
+        return False
+
+    if isinstance(board, SudokuBoard):
+        board.cells[:] = bytes(state.cells)
+    else:
+        for idx in range(81):
+            board[ROW_OF[idx]][COL_OF[idx]] = state.cells[idx]
+    return True
+
+def _exact_cover_problem(board):
+    """
+    Build the exact-cover matrix for an NxN Sudoku board.
+
+    Each candidate placement (row, col, num) is an exact-cover row that
+    satisfies four constraints: the cell is filled, and num appears once in
+    the row, the column and the box. Everything is encoded as ints.
+
+    :param board: NxN 2D list (N a perfect square) or SudokuBoard
+    :return: (size, columns, rows, givens) where columns maps a constraint to
+             the set of placements covering it, rows maps a placement to its
+             constraints, and givens lists the placements of the clues
+    :raises: ValueError if the board is not a square board with square boxes
+    """
+    size = len(board)
+    box_size = math.isqrt(size)
+    if box_size * box_size != size or any(len(board[row]) != size for row in range(size)):
+        raise ValueError(f"Board must be NxN with N a perfect square, got {size} rows")
+
+    area = size * size
+    rows = {}
+    for row in range(size):
+        for col in range(size):
+            box = (row // box_size) * box_size + col // box_size
+            for num in range(size):
+                rows[(row * size + col) * size + num] = (
+                    row * size + col,
+                    area + row * size + num,
+                    2 * area + col * size + num,
+                    3 * area + box * size + num,
+                )
+
+    columns = {constraint: set() for constraint in range(4 * area)}
+    for placement, constraints in rows.items():
+        for constraint in constraints:
+            columns[constraint].add(placement)
+
+    givens = []
+    for row in range(size):
+        for col in range(size):
+            num = board[row][col]
+            if num:
+                if not 1 <= num <= size:
+                    raise ValueError(f"Invalid value {num} at ({row}, {col})")
+                givens.append((row * size + col) * size + num - 1)
+    return size, columns, rows, givens
+
+def _cover(columns, rows, placement):
+    """
+    Remove the constraints satisfied by placement and every placement that
+    conflicts with it. Returns what was removed so _uncover can restore it.
+    """
+    removed = []
+    for constraint in rows[placement]:
+        for other in columns[constraint]:
+            for other_constraint in rows[other]:
+                if other_constraint != constraint:
+                    columns[other_constraint].remove(other)
+        removed.append(columns.pop(constraint))
+    return removed
+
+def _uncover(columns, rows, placement, removed):
+    for constraint in reversed(rows[placement]):
+        columns[constraint] = removed.pop()
+        for other in columns[constraint]:
+            for other_constraint in rows[other]:
+                if other_constraint != constraint:
+                    columns[other_constraint].add(other)
+
+def _search_exact_cover(columns, rows, partial):
+    """
+    Algorithm X: recursively yield every exact cover of the remaining columns.
+    Always branches on the constraint with the fewest candidate placements.
+    """
+    if not columns:
+        yield partial
+        return
+
+    constraint, fewest = None, None
+    for candidate, placements in columns.items():
+        if fewest is None or len(placements) < fewest:
+            constraint, fewest = candidate, len(placements)
+            if fewest <= 1:
+                break  # Cannot do better than a forced (or impossible) constraint
+    for placement in list(columns[constraint]):
+        partial.append(placement)
+        removed = _cover(columns, rows, placement)
+        yield from _search_exact_cover(columns, rows, partial)
+        _uncover(columns, rows, placement, removed)
+        partial.pop()
+
+def iter_solutions(board, limit=None):
+    """
+    Enumerate the solutions of a Sudoku board with an exact-cover search.
+
+    Works on any NxN board whose size is a perfect square (4x4, 9x9, 16x16,
+    25x25, ...). The board itself is not modified.
+
+    :param board: NxN 2D list or SudokuBoard (0 represents empty cells)
+    :param limit: Stop after this many solutions (None for all of them)
+    :return: Generator of solved boards as 2D lists
+    :raises: ValueError if the board has an unsupported shape
+    """
+    size, columns, rows, givens = _exact_cover_problem(board)
+    for placement in givens:
+        if any(constraint not in columns or placement not in columns[constraint]
+               for constraint in rows[placement]):
+            return  # The givens already conflict
+        _cover(columns, rows, placement)
+
+    found = 0
+    for partial in _search_exact_cover(columns, rows, []):
+        solution = [[0] * size for _ in range(size)]
+        for placement in givens + partial:
+            cell, num = divmod(placement, size)
+            solution[cell // size][cell % size] = num + 1
+        yield solution
+        found += 1
+        if limit is not None and found >= limit:
+            return
+
+def count_solutions(board, limit=None):
+    """
+    Count the solutions of a Sudoku board.
+
+    :param board: NxN 2D list or SudokuBoard (0 represents empty cells)
+    :param limit: Stop counting at this many solutions (None for all of them)
+    :return: Number of solutions found, at most limit
+    """
+    return sum(1 for _ in iter_solutions(board, limit))
+
+def has_unique_solution(board):
+    """
+    Check that a Sudoku board has exactly one solution.
+
+    The search stops as soon as a second solution is found.
+
+    :param board: NxN 2D list or SudokuBoard (0 represents empty cells)
+    :return: True if the board has exactly one solution, False otherwise
+    """
+    return count_solutions(board, limit=2) == 1
+
+def solve_sudoku_exact_cover(board):
+    """
+    Solve the Sudoku puzzle using an exact-cover (Algorithm X) search.
+
+    Same contract as solve_sudoku, but also accepts NxN boards.
+
+    :param board: NxN 2D list or SudokuBoard representing the Sudoku board
+    :return: True if the board is solved, False otherwise
+    """
+    for solution in iter_solutions(board, limit=1):
+        for row, values in enumerate(solution):
+            for col, num in enumerate(values):
+                board[row][col] = num
+        return True
+    return False
+
+SOLVER_ENGINES = {
+    "backtracking": solve_sudoku,
+    "bitmask": solve_sudoku_bitmask,
+    "exact_cover": solve_sudoku_exact_cover,
+}
+
+def get_solver(engine="backtracking"):
+    """
+    Look up a solver engine by name.
+
+    Every engine shares the solve_sudoku(board) signature, so callers can
+    switch engines without changing how they call the solver.
+
+    :param engine: Name of the engine (see SOLVER_ENGINES)
+    :return: The solver function
+    :raises: ValueError if the engine name is unknown
+    """
+    try:
+        return SOLVER_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown solver engine: {engine}")
+
+def parse_puzzle(line):
+    """
+    Parse an 81-character puzzle string into a board.
+
+    Digits 1-9 are givens; '0' or '.' mark empty cells.
+
+    :param line: Puzzle string (surrounding whitespace is ignored)
+    :return: 2D list representing the Sudoku board
+    :raises: ValueError if the string is not a valid puzzle line
+    """
+    line = line.strip()
+    if len(line) != 81:
+        raise ValueError(f"Expected 81 characters, got {len(line)}")
+    try:
+        values = [0 if ch == "." else int(ch) for ch in line]
+    except ValueError:
+        raise ValueError(f"Invalid puzzle line: {line}")
+    return [values[row * 9:row * 9 + 9] for row in range(9)]
+
+def format_puzzle(board):
+    """
+    Format a board as an 81-character puzzle string.
+
+    :param board: 2D list or SudokuBoard representing the Sudoku board
+    :return: Puzzle string with '0' for empty cells
+    """
+    return "".join(str(num) for row in board for num in row)
+
 def print_board(board):
     """
     Print the Sudoku board in a readable format.
 
-    :param board: 2D list representing the Sudoku board
+    :param board: 2D list or SudokuBoard representing the Sudoku board
     """
     for row in range(9):
         for col in range(9):
@@ -0,0 +1,321 @@
+import argparse
+import os
+import stat
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+import instagram_style_image_filter as filters
+from batch_image_filter import parse_filter_spec
+
+# Formats whose pixels are stored raw and row-major after a small header, so
+# they can be read and written one strip at a time.
+PNM_EXTENSIONS = {'.ppm', '.pgm', '.pnm'}
+NPY_EXTENSIONS = {'.npy'}
+
+
+def _read_pnm_token(image_file):
+    """
+    Read one whitespace-separated header token, skipping '#' comments.
+    """
+    token = b''
+    while True:
+        char = image_file.read(1)
+        if not char:
+            return token
+        if char == b'#':
+            image_file.readline()
+            if token:
+                return token
+        elif char.isspace():
+            if token:
+                return token
+        else:
+            token += char
+
+
+class RawImageReader:
+    """
+    Sequential strip reader for binary PPM/PGM (maxval 255) and uint8 .npy images.
+
+    Strips are returned in BGR order like cv2.imread, so PPM rows are
+    converted from RGB as they are read.
+    """
+
+    def __init__(self, file_path):
+        self.file = open(file_path, 'rb')
+        try:
+            if os.path.splitext(file_path)[1].lower() in NPY_EXTENSIONS:
+                self.shape = self._read_npy_header()
+                self.rgb = False
+            else:
+                self.shape = self._read_pnm_header()
+                self.rgb = len(self.shape) == 3
+        except (ValueError, OSError):
+            self.file.close()
+            raise
+
+    def _read_npy_header(self):
+        version = np.lib.format.read_magic(self.file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self.file)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(self.file)
+        else:
+            raise ValueError(f"Unsupported .npy format version {version}")
+        if dtype != np.uint8 or fortran_order or len(shape) not in (2, 3):
+            raise ValueError("Only C-ordered uint8 images can be streamed from .npy files")
+        return shape
+
+    def _read_pnm_header(self):
+        magic = _read_pnm_token(self.file)
+        if magic not in (b'P5', b'P6'):
+            raise ValueError("Only binary PGM (P5) and PPM (P6) files can be streamed")
+        cols, rows, maxval = (int(_read_pnm_token(self.file)) for _ in range(3))
+        if maxval != 255:
+            raise ValueError("Only 8-bit PNM files (maxval 255) can be streamed")
+        return (rows, cols, 3) if magic == b'P6' else (rows, cols)
+
+    def read_rows(self, buffer):
+        """
+        Fill buffer with the next rows of the image.
+        """
+        if self.file.readinto(memoryview(buffer).cast('B')) != buffer.nbytes:
+            raise ValueError("Unexpected end of image data")
+        if self.rgb:
+            cv2.cvtColor(buffer, cv2.COLOR_RGB2BGR, dst=buffer)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _output_mode(file_path):
+    """
+    Permission bits for a new output file: those of the file it replaces,
+    or what the umask allows for a newly created file.
+    """
+    try:
+        return stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class RawImageWriter:
+    """
+    Sequential strip writer for binary PPM/PGM and uint8 .npy images.
+
+    Rows go to a temporary file next to file_path, which replaces file_path
+    only when the writer is closed after a successful pass, so a failed run
+    never leaves a partly filtered image behind.
+    """
+
+    def __init__(self, file_path, shape):
+        self.file_path = file_path
+        directory = os.path.dirname(os.path.abspath(file_path))
+        self.file = tempfile.NamedTemporaryFile('wb', dir=directory, delete=False, suffix='.tmp')
+        self.rgb = False
+        self.buffer = None
+        if os.path.splitext(file_path)[1].lower() in NPY_EXTENSIONS:
+            header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.uint8)),
+                      'fortran_order': False, 'shape': tuple(shape)}
+            np.lib.format.write_array_header_1_0(self.file, header)
+        else:
+            magic = b'P6' if len(shape) == 3 else b'P5'
+            self.file.write(magic + b'\n%d %d\n255\n' % (shape[1], shape[0]))
+            self.rgb = len(shape) == 3
+
+    def write_rows(self, strip):
+        """
+        Append the next rows of the image.
+        """
+        if self.rgb:
+            if self.buffer is None or self.buffer.shape[0] < strip.shape[0]:
+                self.buffer = np.empty(strip.shape, dtype=np.uint8)
+            converted = self.buffer[:strip.shape[0]]
+            cv2.cvtColor(strip, cv2.COLOR_BGR2RGB, dst=converted)
+            strip = converted
+        self.file.write(np.ascontiguousarray(strip).data)
+
+    def close(self, commit=True):
+        """
+        Finish the file, or discard it if commit is False.
+        """
+        self.file.close()
+        if commit:
+            # NamedTemporaryFile creates the file with mode 0600
+            os.chmod(self.file.name, _output_mode(self.file_path))
+            os.replace(self.file.name, self.file_path)
+        else:
+            os.remove(self.file.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(commit=exc_type is None)
+
+
+class InMemoryImageReader:
+    """
+    Fallback reader for compressed formats, which must be decoded whole.
+    """
+
+    def __init__(self, file_path):
+        self.image = filters.load_image(file_path)
+        if self.image is None:
+            raise ValueError(f"Could not decode {file_path}")
+        self.shape = self.image.shape
+        self.position = 0
+
+    def read_rows(self, buffer):
+        buffer[...] = self.image[self.position:self.position + len(buffer)]
+        self.position += len(buffer)
+
+    def close(self):
+        self.image = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class InMemoryImageWriter:
+    """
+    Fallback writer for compressed formats, which must be encoded whole.
+    """
+
+    def __init__(self, file_path, shape):
+        self.file_path = file_path
+        self.image = np.empty(shape, dtype=np.uint8)
+        self.position = 0
+
+    def write_rows(self, strip):
+        self.image[self.position:self.position + len(strip)] = strip
+        self.position += len(strip)
+
+    def close(self, commit=True):
+        """
+        Encode and save the image, or drop it if commit is False.
+        """
+        if commit:
+            filters.save_image(self.image, self.file_path)
+        self.image = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(commit=exc_type is None)
+
+
+def is_streamable(file_path):
+    """
+    Check whether an image can be read or written strip by strip.
+    """
+    return os.path.splitext(file_path)[1].lower() in PNM_EXTENSIONS | NPY_EXTENSIONS
+
+
+def open_reader(file_path):
+    if is_streamable(file_path):
+        return RawImageReader(file_path)
+    return InMemoryImageReader(file_path)
+
+
+def open_writer(file_path, shape):
+    if is_streamable(file_path):
+        return RawImageWriter(file_path, shape)
+    return InMemoryImageWriter(file_path, shape)
+
+
+def filter_image_tiled(input_path, output_path, pipeline, memory_budget=filters.DEFAULT_TILE_MEMORY_BUDGET):
+    """
+    Filter an image file strip by strip within a memory budget.
+
+    Binary PPM/PGM and .npy images are streamed from input to output without
+    ever holding either image whole, keeping peak memory near memory_budget.
+    Other formats are decoded or encoded whole by OpenCV, so only the filter
+    working memory is bounded for them. If filtering fails, output_path is
+    left untouched.
+
+    :param input_path: Path of the input image.
+    :param output_path: Path of the output image.
+    :param pipeline: FilterPipeline to apply.
+    :param memory_budget: Approximate peak working memory in bytes.
+    """
+    with open_reader(input_path) as reader:
+        with open_writer(output_path, pipeline.output_shape(reader.shape)) as writer:
+            pipeline.apply_tiled(reader.shape, reader.read_rows, writer.write_rows, memory_budget)
+
+
+def check_tiled_matches(pipeline, shape=(1531, 2047, 3), memory_budget=1024 * 1024, seed=0):
+    """
+    Check that tiled output matches whole-image output exactly.
+
+    A random image is filtered with pipeline.apply and with apply_tiled
+    using a small budget, so the image is split into many strips.
+
+    :return: True if both outputs are identical.
+    """
+    image = np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+    expected = pipeline.apply(image)
+
+    position = 0
+    strips = []
+
+    def read_rows(buffer):
+        nonlocal position
+        buffer[...] = image[position:position + len(buffer)]
+        position += len(buffer)
+
+    pipeline.apply_tiled(image.shape, read_rows, lambda strip: strips.append(strip.copy()), memory_budget)
+    return np.array_equal(np.concatenate(strips), expected)
+
+
+def main():
+    """
+    Main function to filter a very large image within a memory budget.
+    """
+    parser = argparse.ArgumentParser(description="Filter very large images strip by strip.")
+    parser.add_argument('input', nargs='?', help="Input image (PPM/PGM/.npy are streamed)")
+    parser.add_argument('output', nargs='?', help="Output image (PPM/PGM/.npy are streamed)")
+    parser.add_argument('--filters', nargs='+', default=['sepia', 'vignette'],
+                        help="Filter chain, e.g. 'sepia vignette:0.3' (default: sepia vignette)")
+    parser.add_argument('--memory-mb', type=float, default=filters.DEFAULT_TILE_MEMORY_BUDGET / 2 ** 20,
+                        help="Peak working memory in MiB (default: 64)")
+    parser.add_argument('--check', action='store_true',
+                        help="Verify that tiled output matches whole-image output and exit")
+    args = parser.parse_args()
+
+    try:
+        pipeline = filters.FilterPipeline([parse_filter_spec(spec) for spec in args.filters])
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.check:
+        matches = check_tiled_matches(pipeline)
+        print("Tiled output matches whole-image output." if matches else "Tiled output DIFFERS from whole-image output!")
+        sys.exit(0 if matches else 1)
+
+    if not args.input or not args.output:
+        parser.error("input and output are required unless --check is given")
+    try:
+        filter_image_tiled(args.input, args.output, pipeline, int(args.memory_mb * 2 ** 20))
+    except (ValueError, OSError) as e:
+        print(f"Error filtering image: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+import instagram_style_image_filter as filters
+from tiled_image_filter import check_tiled_matches, filter_image_tiled
+
+PIPELINES = [
+    ["sepia"],
+    ["grayscale"],
+    ["vignette"],
+    ["sepia", "vignette"],
+    ["grayscale", ("vignette", {"strength": 0.3})],
+    ["vignette", "sepia", "grayscale"],
+]
+
+# (shape, memory budget in bytes); small budgets force many strips
+CASES = [
+    ((1531, 2047, 3), 1024 * 1024),
+    ((257, 129, 3), 4096),
+    ((1, 5, 3), 1),
+    ((300, 200), 10_000),
+]
+
+
+def random_image(shape, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def check_in_memory():
+    """
+    Tiled output must equal whole-image output for every pipeline, shape and budget.
+    """
+    for specs in PIPELINES:
+        pipeline = filters.FilterPipeline(specs)
+        for shape, budget in CASES:
+            try:
+                pipeline.output_shape(shape)
+            except ValueError:
+                continue  # Sepia and grayscale need a 3-channel image
+            assert check_tiled_matches(pipeline, shape, budget), f"{specs} differs on {shape}, budget {budget}"
+
+
+def check_files(directory):
+    """
+    Streamed (.ppm, .npy) and whole-image (.png) files must match pipeline.apply.
+    """
+    pipeline = filters.FilterPipeline(["sepia", "vignette"])
+    image = random_image((515, 333, 3))
+    expected = pipeline.apply(image)
+    input_path = os.path.join(directory, "input.ppm")
+    cv2.imwrite(input_path, image)
+    for extension in (".ppm", ".npy", ".png"):
+        output_path = os.path.join(directory, "output" + extension)
+        filter_image_tiled(input_path, output_path, pipeline, memory_budget=50_000)
+        output = np.load(output_path) if extension == ".npy" else cv2.imread(output_path)
+        assert np.array_equal(output, expected), f"{extension} output differs from pipeline.apply"
+
+
+def check_failure_keeps_output(directory):
+    """
+    A pass that fails part way must leave an existing output file untouched.
+    """
+    pipeline = filters.FilterPipeline(["sepia"])
+    input_path = os.path.join(directory, "truncated.ppm")
+    cv2.imwrite(input_path, random_image((400, 300, 3)))
+    with open(input_path, "r+b") as input_file:
+        input_file.truncate(os.path.getsize(input_path) // 2)
+    for extension in (".ppm", ".png"):
+        output_path = os.path.join(directory, "previous" + extension)
+        previous = random_image((10, 10, 3), seed=1)
+        cv2.imwrite(output_path, previous)
+        before = open(output_path, "rb").read()
+        try:
+            filter_image_tiled(input_path, output_path, pipeline, memory_budget=50_000)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Filtering a truncated image did not fail")
+        assert open(output_path, "rb").read() == before, f"Failed run overwrote the {extension} output"
+    leftovers = [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    assert not leftovers, f"Failed run left temporary files: {leftovers}"
+
+
+def main():
+    """
+    Main function to check that tiled filtering matches whole-image filtering.
+    """
+    check_in_memory()
+    with tempfile.TemporaryDirectory() as directory:
+        check_files(directory)
+        check_failure_keeps_output(directory)
+    print("All tiled filtering checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+import basic_web_scraper as scraper
+from bs4 import BeautifulSoup
+from selector_rules import compile_rules
+
+QUOTE_RULES = {
+    "record": "div.quote",
+    "fields": {
+        "text": "span.text",
+        "author": "small.author",
+        "author_url": {"css": "span > a", "attr": "href"},
+        "tags": {"css": "a.tag", "many": True},
+    },
+}
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua").split()
+
+
+def generate_page(size_mb, seed=0):
+    """
+    Build a synthetic article page of roughly size_mb megabytes.
+
+    Paragraphs mix plain text with inline markup and entities, and sit among
+    navigation, tables and scripts that the extractor has to skip.
+    """
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Benchmark</title>",
+             "<script>var data = {\"a\": [1, 2, 3]};</script></head><body>"]
+    size = 0
+    target = int(size_mb * 1e6)
+    section = 0
+    while size < target:
+        words = rng.choices(WORDS, k=rng.randint(20, 80))
+        words[rng.randrange(len(words))] = f'<a href="/link/{section}">{words[0]}</a>'
+        words[rng.randrange(len(words))] = f"<b>{words[1]}</b> &amp; <em>{words[2]}</em>"
+        block = (f'<div class="section" id="s{section}"><ul class="nav"><li><a href="#">Home</a></li></ul>'
+                 f"<p>{' '.join(words)}</p>"
+                 f"<table><tr><td>{section}</td><td>{rng.random():.6f}</td></tr></table></div>\n")
+        parts.append(block)
+        size += len(block)
+        section += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def generate_quotes_page(quotes, seed=0):
+    """
+    Build a page laid out like quotes.toscrape.com with the given number of quotes.
+    """
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Quotes</title></head><body><div class="container">'
+             '<div class="row header-box"><h1><a href="/">Quotes to Scrape</a></h1></div><div class="col-md-8">']
+    for number in range(quotes):
+        tags = "".join(f'<a class="tag" href="/tag/{tag}/page/1/">{tag}</a>'
+                       for tag in rng.sample(WORDS, rng.randint(1, 5)))
+        author = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+        parts.append(
+            f'<div class="quote" itemscope itemtype="http://schema.org/CreativeWork">'
+            f'<span class="text" itemprop="text">“{" ".join(rng.choices(WORDS, k=rng.randint(8, 40)))}”</span>'
+            f'<span>by <small class="author" itemprop="author">{author}</small>'
+            f' <a href="/author/{author.replace(" ", "-")}">(about)</a></span>'
+            f'<div class="tags">Tags: <meta class="keywords" itemprop="keywords" content="x"> {tags}</div></div>')
+    parts.append('<nav><ul class="pager"><li class="next"><a href="/page/2/">Next</a></li></ul></nav>'
+                 '</div></div></body></html>')
+    return "".join(parts)
+
+
+# Markup where the streaming parser must still agree with BeautifulSoup
+PARITY_CASES = [
+    "<div><p>a</div><p>b</p>",  # <p> closed by its enclosing element
+    "<p>a<p>b</p>c",  # Nested and unclosed paragraphs
+    "<p>a<p>b<p>c",
+    "<p>x<script>y</script>z</p><p>s<style>p {}</style>t</p>",  # Code is not text
+    "<p>a<b>b</p>c</b>",  # </p> closes the <b> opened inside it
+    "<p>a</b>c</p></p><p>q",  # Stray end tags
+    "<p/>x<p>y<br/>z<br>w</p>",  # Self-closing and void elements
+    "<p>caf&eacute; &amp; &#x263A;</p>",
+]
+
+
+def generate_fuzz_page(rng, elements=60):
+    """
+    Build a page of random, often badly nested markup for parity checks.
+    """
+    parts = []
+    for _ in range(elements):
+        roll = rng.random()
+        if roll < 0.3:
+            parts.append(f"<{rng.choice(('p', 'p', 'div', 'b', 'span'))}>")
+        elif roll < 0.55:
+            parts.append(f"</{rng.choice(('p', 'p', 'div', 'b', 'span'))}>")
+        elif roll < 0.6:
+            parts.append(rng.choice(("<br>", "<p/>", "<script>if (a < b) {}</script>", "<style>p {}</style>")))
+        else:
+            parts.append(rng.choice(WORDS) + rng.choice((" ", "&amp;", "")))
+    return "".join(parts)
+
+
+def check_parity(fuzz_pages, seed=0):
+    """
+    Check that the stream backend returns what the soup backend returns,
+    whole and fed in small chunks, on PARITY_CASES, a generated article page
+    and random badly nested pages.
+
+    :return: Number of mismatching documents
+    """
+    rng = random.Random(seed)
+    documents = PARITY_CASES + [generate_page(0.2)] + [generate_fuzz_page(rng) for _ in range(fuzz_pages)]
+    failures = 0
+    for html in documents:
+        expected = scraper.parse_html(html, "soup")
+        for chunk_size in (None, 1, 7, 4096):
+            if chunk_size is None:
+                paragraphs = scraper.parse_html(html, "stream")
+            else:
+                paragraphs = list(scraper.iter_paragraphs(chunked(html, chunk_size)))
+            if paragraphs != expected:
+                failures += 1
+                print(f"Mismatch (chunk size {chunk_size}) for {html[:200]!r}:\n"
+                      f"  soup:   {expected[:5]}\n  stream: {paragraphs[:5]}")
+                break
+    print(f"{len(documents) - failures} of {len(documents)} documents identical")
+    return failures
+
+
+def extract_quotes_find(html):
+    """
+    The hand-written approach: build a tree, then walk it again per field.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    records = []
+    for quote_div in soup.find_all("div", class_="quote"):
+        link = quote_div.select_one("span > a")
+        records.append({
+            "text": quote_div.find("span", class_="text").get_text(),
+            "author": quote_div.find("small", class_="author").get_text(),
+            "author_url": link["href"] if link else None,
+            "tags": [tag.get_text() for tag in quote_div.find_all("a", class_="tag")],
+        })
+    return records
+
+
+def chunked(text, chunk_size):
+    """
+    Split text into chunks, as a streamed response body would arrive.
+    """
+    return (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+
+def measure(func, repeat):
+    """
+    Time func and record its peak traced memory.
+
+    :return: (fastest run in seconds, peak memory in bytes, result)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def benchmark_parse(sizes, repeat):
+    """
+    Compare the BeautifulSoup and streaming parse_html backends.
+
+    :param sizes: Page sizes in megabytes
+    :param repeat: Runs per measurement (the fastest is reported)
+    """
+    print("page     backend           MB/s   peak MiB   paragraphs   identical")
+    for size_mb in sizes:
+        html = generate_page(size_mb)
+        megabytes = len(html) / 1e6
+        runs = {
+            "soup": lambda: scraper.parse_html(html, "soup"),
+            "stream": lambda: scraper.parse_html(html, "stream"),
+            "rules": lambda: scraper.parse_html(html, "rules"),
+            "stream 64K": lambda: list(scraper.iter_paragraphs(chunked(html, scraper.STREAM_CHUNK_SIZE))),
+        }
+        expected = None
+        for backend, func in runs.items():
+            seconds, peak, paragraphs = measure(func, repeat)
+            expected = paragraphs if expected is None else expected
+            print(f"{megabytes:5.1f}MB  {backend.ljust(12)}{megabytes / seconds:10.1f}{peak / 2 ** 20:11.1f}"
+                  f"{len(paragraphs):13d}{str(paragraphs == expected).rjust(12)}")
+
+
+def benchmark_extract(quote_counts, repeat):
+    """
+    Compare multi-find BeautifulSoup extraction with precompiled selector rules.
+
+    :param quote_counts: Quotes per benchmark document
+    :param repeat: Runs per measurement (the fastest is reported)
+    """
+    rules = compile_rules(QUOTE_RULES)
+    print("quotes     find ms/doc   rules ms/doc   speedup   identical")
+    for quotes in quote_counts:
+        html = generate_quotes_page(quotes)
+        find_seconds, _, expected = measure(lambda: extract_quotes_find(html), repeat)
+        rules_seconds, _, records = measure(lambda: rules.extract(html), repeat)
+        print(f"{quotes:6d}{find_seconds * 1000:16.2f}{rules_seconds * 1000:15.2f}"
+              f"{find_seconds / rules_seconds:9.2f}x{str(records == expected).rjust(12)}")
+
+
+def main():
+    """
+    Main function to run the web scraper benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Web scraper benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse_parser = subparsers.add_parser("parse", help="BeautifulSoup vs streaming paragraph extraction")
+    parse_parser.add_argument("--sizes", nargs="+", type=float, default=[1, 5],
+                              help="Page sizes in MB (default: 1 5)")
+    parse_parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+
+    extract_parser = subparsers.add_parser("extract", help="Multi-find extraction vs precompiled selector rules")
+    extract_parser.add_argument("--quotes", nargs="+", type=int, default=[10, 100, 1000],
+                                help="Quotes per document (default: 10 100 1000)")
+    extract_parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5)")
+
+    parity_parser = subparsers.add_parser("parity", help="Check the stream backend against BeautifulSoup")
+    parity_parser.add_argument("--fuzz", type=int, default=500, help="Random pages to check (default: 500)")
+
+    args = parser.parse_args()
+    if args.command == "parity":
+        sys.exit(1 if check_parity(args.fuzz) else 0)
+    elif args.command == "parse":
+        benchmark_parse(args.sizes, args.repeat)
+    elif args.command == "extract":
+        benchmark_extract(args.quotes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()